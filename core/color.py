@@ -1,5 +1,7 @@
 from maya import cmds
 
+from riggler.core import session
+
 
 class indexColors:
     default=0
@@ -39,7 +41,7 @@ class indexColors:
 def applyMaterial(objs, mat):
     if isinstance(objs, str):
         objs = [objs]
-    mat_set = cmds.listConnections(f'{mat}.outColor', source=False, destination=True)[0]
+    mat_set = session.cached(('shading_group', mat), lambda: cmds.listConnections(f'{mat}.outColor', source=False, destination=True)[0])
     shape_nodes = []
     for obj in objs:
         if cmds.nodeType(obj) == 'transform':
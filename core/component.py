@@ -1,6 +1,8 @@
+import logging
 import os
 import sys
 
+from contextlib import ExitStack
 from functools import partial
 from pathlib import Path
 from typing import Union, Optional, Tuple, Any
@@ -11,9 +13,11 @@ from maya import cmds, mel, OpenMayaUI
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from riggler.core import attribute, color, nodes
+from riggler.core import attribute, color, cost, graph, handles, incremental, instrument, lint, mayaascii, naming, network, nodes, optimize, scheduler, snapshot
 
 
+logger = logging.getLogger(__name__)  # build reports, shown once the logger is set to INFO
+
 def add_underscore_to_string(string: str) -> str:
     if string:
         string = string + '_'
@@ -27,14 +31,18 @@ def cleanup_name(name_orig):
     return name
 
 
-def checkDuplicateName(name_orig):
-    name = name_orig
-    if cmds.objExists(name_orig):
-        i = 1
-        while cmds.objExists(name_orig + str(i)):
-            i += 1
-        name = name_orig + str(i)
-    return name
+def connect_parent_outputs(component_name: str, parent_guide_input: str, parent_input: str) -> None:
+    """
+    Drives a component's parent input groups with the outputs of the component it's parented to
+
+    Args:
+        component_name: The name of the parent component
+        parent_guide_input: The child component's parent guide input group
+        parent_input: The child component's parent input group
+    """
+    parent_guide_out, parent_out = cmds.listRelatives(component_name + '_outputs')
+    cmds.connectAttr(f'{parent_guide_out}.worldMatrix[0]', f'{parent_guide_input}.offsetParentMatrix', force=True)
+    cmds.connectAttr(f'{parent_out}.worldMatrix[0]', f'{parent_input}.offsetParentMatrix', force=True)
 
 
 class Component(guide.GuideElements):
@@ -57,6 +65,22 @@ class Component(guide.GuideElements):
         "Finalize",
     ]
     settings = {}
+    deferred_build = False  # Apply each step's nodes.py work in one undoable modifier pass at the end of the step
+    fold_constants = False  # Compute nodes.py math nodes with constant inputs in Python instead of creating them
+    share_nodes = False  # Reuse identical nodes.py nodes instead of creating duplicates
+    elide_defaults = False  # Skip nodes.py writes that would set a new node's plug to its default value
+    collapse_matrix_chains = False  # Merge chained multMatrix nodes once the component is built
+    fuse_scalar_chains = False  # Flatten chained sum, multiply, min and max nodes once the component is built
+    preserve_units = False  # Build angle and distance math with unit carrying nodes so Maya doesn't insert unitConversion nodes
+    eliminate_dead_nodes = False  # Delete the nodes.py nodes nothing consumes once the component is built
+    dead_nodes_dry_run = False  # Only report the nodes eliminate_dead_nodes would delete
+    report_cost = False  # Log the node counts, depth and estimated cost of the component's network once it's built
+    node_budget = None  # Limits on the built network such as {'nodes': 150, 'depth': 30}, see cost.check_budget
+    fail_over_budget = False  # Raise instead of warning when the component goes over node_budget
+    lint_evaluation = False  # Report nodes and patterns that keep parallel evaluation and cached playback from working once the component is built
+    instrument_build = False  # Measure the time, cmds and OpenMaya calls, nodes and Python memory of every step into build_report and log it
+    instrument_api_calls = True  # Count OpenMaya calls while instrumenting, which slows the build down through a profile hook
+    incremental = False  # Skip the build when the inputs hash the same as at the last build, otherwise replace the last build
 
     def __init__(self, name: str, parent: str=None) -> None:
         super().__init__()
@@ -74,11 +98,228 @@ class Component(guide.GuideElements):
         self.name = cleanup_name(name)
         self.parent = parent
         self.comp_root = ''
-        self.stepMethods = [
-            getattr(self, f"step_0{i}")()
-            for i in range(len(self.steps))
-        ]
+        self.created_nodes = []  # every node created through nodes.py while building, in creation order
+        self.graph = graph.BuildGraph()  # the nodes.py work done while building, before the post-build passes, for offline evaluation
+        self.build_report = None  # per step measurements while instrumenting, see instrument.measure_component
+        self.input_hash = ''  # see compute_input_hash, only computed for incremental builds
+        self.skipped = False  # whether an incremental build found the last build up to date
+        self.stepMethods = []
+        self._build_stack = ExitStack()  # contexts spanning every step of the build
+        self._guide_matrices = {}  # guides of the replaced build, put back once rebuilt
+        self._skipped_writes = 0
+        self._attributes_before_steps = set()  # see get_step_outputs
+        if scheduler.register(self):
+            # The scheduler runs the steps of every registered component phase by phase
+            return
+        if self.begin_build():
+            with self._build_stack:
+                self.stepMethods = [
+                    self.run_step(i)
+                    for i in range(len(self.steps))
+                ]
+            self.finish_build()
+
+    def begin_build(self, force: bool=False) -> bool:
+        """
+        Gets the component ready to run its steps. An incremental build whose inputs haven't changed reuses the last build instead.
+
+        Args:
+            force: Rebuild even if the inputs haven't changed, e.g. because the parent is being rebuilt
+
+        Returns:
+            Whether the steps should run
+        """
+        if self.incremental:
+            root = f'{self.name}_cmpt'
+            self.input_hash = self.compute_input_hash()
+            if not force and self.input_hash == incremental.get_stored_hash(root):
+                self.reuse_build(root)
+                logger.info('%s: inputs unchanged, skipping the build', self.name)
+                return False
+            self._guide_matrices = incremental.get_guide_matrices(f'{self.name}_guides')
+            incremental.delete_build(root)
+        self._skipped_writes = nodes.get_skipped_writes()
+        self._attributes_before_steps = set(vars(self))
+        nodes.clear_caches()
+        self._build_stack.enter_context(naming.unique_names())
+        if self.fold_constants:
+            # Placeholders of folded nodes stay valid in every step, since steps keep their results on the component
+            self._build_stack.enter_context(nodes.constant_folding())
+        if self.share_nodes:
+            # Identical nodes are shared across every step, and across components when an outer context is open
+            self._build_stack.enter_context(nodes.node_sharing())
+        if self.instrument_build or instrument.is_collecting():
+            self.build_report = self._build_stack.enter_context(
+                instrument.measure_component(self.name, type(self).__name__, self.instrument_api_calls)
+            )
+        return True
+
+    def finish_build(self):
+        """
+        Runs the post-build passes and reports once every step has run
+        """
+        self._build_stack.close()
+        if self.instrument_build:
+            logger.info(instrument.format_report(self.build_report))
+        if self._guide_matrices:
+            incremental.restore_guide_matrices(self._guide_matrices)
+        if self.elide_defaults:
+            self.skipped_writes = nodes.get_skipped_writes() - self._skipped_writes
+            logger.info('%s: skipped %d default value writes', self.name, self.skipped_writes)
+        if self.collapse_matrix_chains:
+            removed = optimize.collapse_matrix_chains(self.created_nodes)
+            logger.info('%s: removed %d multMatrix nodes by collapsing matrix chains', self.name, removed)
+        if self.fuse_scalar_chains:
+            before = self.count_created_nodes()
+            optimize.fuse_scalar_chains(self.created_nodes)
+            logger.info('%s: fused scalar chains, %d -> %d nodes', self.name, before, self.count_created_nodes())
+        if self.eliminate_dead_nodes:
+            # After the passes above, which can leave nodes without consumers
+            self.remove_dead_nodes(self.dead_nodes_dry_run)
+        if self.preserve_units:
+            unit_conversions = optimize.find_unit_conversions(self.created_nodes)
+            if unit_conversions:
+                cmds.warning(f'{self.name}: Maya inserted {len(unit_conversions)} unitConversion nodes: {", ".join(unit_conversions)}')
+        if self.report_cost or self.node_budget:
+            self.check_budget()
+        if self.lint_evaluation:
+            self.find_evaluation_issues()
+        if self.incremental and self.comp_root:
+            nodes.flush()
+            self.input_hash = self.compute_input_hash()
+            created = [node for node in self.created_nodes if cmds.objExists(node)]
+            incremental.store_build(self.comp_root, self.input_hash, created, self.get_step_outputs())
+
+    def run_step(self, index: int):
+        step = getattr(self, f"step_0{index}")
+        with ExitStack() as stack:
+            if self.build_report is not None:
+                # Entered first so the step's measurements include flushing deferred work
+                stack.enter_context(instrument.measure_step(self.build_report, self.steps[index]))
+            created = stack.enter_context(nodes.record_nodes())
+            stack.enter_context(nodes.record_graph(self.graph))
+            if self.deferred_build:
+                stack.enter_context(nodes.deferred_build())
+            # Entered either way, so components that don't fold constants don't join a folding context of another component
+            stack.enter_context(nodes.constant_folding(self.fold_constants))
+            # Entered either way, so components that don't share nodes don't join an outer sharing context either
+            stack.enter_context(nodes.node_sharing(self.share_nodes))
+            if self.elide_defaults:
+                stack.enter_context(nodes.default_elision())
+            if self.preserve_units:
+                stack.enter_context(nodes.unit_preservation())
+            result = step()
+        self.created_nodes.extend(created)
+        return result
     
+    def compute_input_hash(self) -> str:
+        """
+        Hashes everything the build depends on: the module sources and settings.json, the settings, the guide matrices
+        and the parent component's own input hash, so a change upstream makes every component downstream rebuild too
+        """
+        return incremental.hash_inputs({
+            'name': self.name,
+            'type': f'{type(self).__module__}.{type(self).__qualname__}',
+            'sources': incremental.hash_sources(type(self)),
+            'settings': self.settings,
+            'guides': incremental.get_guide_matrices(f'{self.name}_guides'),
+            'parent': self.parent,
+            'parent_hash': incremental.get_stored_hash(f'{self.parent}_cmpt') if self.parent else '',
+        })
+
+    def reuse_build(self, root: str):
+        """
+        Points the component at the build already in the scene instead of building it again, with the step outputs its last build stored
+        """
+        self.skipped = True
+        self.comp_root = root
+        for org_grp, part in self.org_grps.items():
+            if cmds.objExists(f'{self.name}_{part}'):
+                self.org_grps[org_grp] = f'{self.name}_{part}'
+        self.created_nodes = incremental.get_stored_nodes(root)
+        for key, value in incremental.get_stored_outputs(root).items():
+            setattr(self, key, value)
+        self.stepMethods = []
+
+    def get_step_outputs(self) -> dict:
+        """
+        Returns the attributes the steps added to the component, such as its guide and control names, with handles as names.
+        Incremental builds store them, so a reused build has them too.
+        """
+        return {
+            key: handles.to_string(value) for key, value in vars(self).items()
+            if not key.startswith('_') and key not in self._attributes_before_steps
+        }
+
+    def count_created_nodes(self) -> int:
+        return len([node for node in self.created_nodes if cmds.objExists(node)])
+
+    def estimate_cost(self) -> dict:
+        """
+        Measures the network of nodes created through nodes.py, see cost.estimate_cost
+        """
+        nodes.flush()
+        guides = cmds.listRelatives(self.org_grps['guides_grp'], allDescendents=True, type='transform') or []
+        return cost.estimate_cost(self.created_nodes, guides)
+
+    def check_budget(self) -> dict:
+        """
+        Reports the cost of the component's network if report_cost is set, and warns or raises when it goes over node_budget
+
+        Returns:
+            The cost report
+        """
+        report = self.estimate_cost()
+        if self.report_cost:
+            logger.info(cost.format_report(report, self.name))
+        violations = cost.check_budget(report, self.node_budget or {})
+        if violations:
+            message = f'{self.name} is over its node budget: {"; ".join(violations)}'
+            if self.fail_over_budget:
+                raise RuntimeError(message)
+            cmds.warning(message)
+        return report
+
+    def find_evaluation_issues(self) -> list[dict]:
+        """
+        Warns about and returns what keeps the component from evaluating in parallel or in cached playback, see lint.lint_nodes
+        """
+        nodes.flush()
+        issues = lint.lint_nodes(lint.get_component_nodes(self.comp_root, self.created_nodes))
+        if issues:
+            cmds.warning(lint.format_issues(issues, self.name))
+        else:
+            logger.info(lint.format_issues(issues, self.name))
+        return issues
+
+    def get_network(self) -> network.NetworkTable:
+        """
+        Reads the network of nodes created through nodes.py back from the scene into a NetworkTable
+        """
+        nodes.flush()
+        return network.NetworkTable.from_scene(self.created_nodes)
+
+    def export_snapshot(self, path: Path) -> dict:
+        """
+        Saves everything the component is made of as a snapshot, which snapshot.restore_snapshot rebuilds without running the build steps
+        """
+        nodes.flush()
+        component_snapshot = snapshot.capture_snapshot(lint.get_component_nodes(self.comp_root, self.created_nodes))
+        snapshot.save_snapshot(component_snapshot, path)
+        return component_snapshot
+
+    def export_maya_ascii(self, path: Path) -> dict:
+        """
+        Writes everything the component is made of as a Maya ASCII file, see mayaascii.emit_snapshot
+
+        Returns:
+            The snapshot the file was written from, which mayaascii.save_snapshot can write again without Maya
+        """
+        nodes.flush()
+        component_snapshot = snapshot.capture_snapshot(lint.get_component_nodes(self.comp_root, self.created_nodes))
+        mayaascii.save_snapshot(component_snapshot, path)
+        return component_snapshot
+
     def step_00(self):
         self.create_initial_component()
         self.connect_to_parent(self.parent)
@@ -112,10 +353,7 @@ class Component(guide.GuideElements):
             parent = self.name + '_' + parent
         if not name.startswith(self.name):
             name = self.name + '_' + name
-        if parent is None:
-            org_part = cmds.group(name=name, world=True, empty=True)
-        else:
-            org_part = cmds.group(name=name, parent=parent, empty=True)
+        org_part = naming.create_node('transform', name, parent)
         attribute.hideAttributes(org_part)
         cmds.addAttr(org_part, longName='is_cmpt_org', attributeType='bool', defaultValue=True)
         if org_grp:
@@ -131,9 +369,7 @@ class Component(guide.GuideElements):
         """
         if component_name is None:
             return
-        parent_guide_out, parent_out = cmds.listRelatives(component_name + '_outputs')
-        cmds.connectAttr(f'{parent_guide_out}.worldMatrix[0]', f'{self.org_grps["parent_guide_inputs_grp"]}.offsetParentMatrix', force=True)
-        cmds.connectAttr(f'{parent_out}.worldMatrix[0]', f'{self.org_grps["parent_inputs_grp"]}.offsetParentMatrix', force=True)
+        connect_parent_outputs(component_name, self.org_grps['parent_guide_inputs_grp'], self.org_grps['parent_inputs_grp'])
 
     def connect_to_input(self, obj: str, input_attr: str='offsetParentMatrix') -> None:
         """
@@ -143,24 +379,23 @@ class Component(guide.GuideElements):
             obj: The object to connect the input nodes to
             input_attr: The node attribute to connect everything to
         """
-        in_matrix_0 = cmds.listConnections(f'{obj}.{input_attr}', destination=False, plugs=True)
-        if not in_matrix_0:
-            in_matrix_0 = [[1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]]  # Identity Matrix
-        obj_POM = nodes.create_multMatrix_node(
-            in_matrix=[in_matrix_0[0], f'{self.org_grps["parent_guide_inputs_grp"]}.worldInverseMatrix[0]'],
-            name=f'{obj}_POM'
-        )
+        in_matrix_0 = nodes.get_source_plug(f'{obj}.{input_attr}')
+        parent_guide_inverse = f'{self.org_grps["parent_guide_inputs_grp"]}.worldInverseMatrix[0]'
+        if in_matrix_0:
+            obj_POM = nodes.create_multMatrix_node(in_matrix=[in_matrix_0, parent_guide_inverse], name=f'{obj}_POM')
+            parent_guide_inverse = f'{obj_POM}.matrixSum'
+        # Without an incoming matrix the same node serves every object, so node sharing can pool it
         obj_WM = nodes.create_multMatrix_node(
-            in_matrix=[f'{obj_POM}.matrixSum', f'{self.org_grps["parent_inputs_grp"]}.offsetParentMatrix'],
+            in_matrix=[parent_guide_inverse, f'{self.org_grps["parent_inputs_grp"]}.offsetParentMatrix'],
             name=f'{obj}_WM'
         )
-        cmds.connectAttr(f'{obj_WM}.matrixSum', f'{obj}.{input_attr}', force=True)
+        nodes.connect_attr(f'{obj_WM}.matrixSum', f'{obj}.{input_attr}', force=True)
 
         return obj_WM
 
     def create_output(self, obj: str, is_guide: bool=False):
         suffix = 'guide_output' if is_guide else 'output'
-        output_node = cmds.group(name=f'{obj}_{suffix}', parent=self.org_grps['outputs_grp'], empty=True)
+        output_node = naming.create_node('transform', f'{obj}_{suffix}', self.org_grps['outputs_grp'])
         attribute.hideAttributes(output_node)
         cmds.connectAttr(f'{obj}.worldMatrix[0]', f'{output_node}.offsetParentMatrix')
         cmds.select(clear=True)
@@ -183,3 +418,21 @@ class Component(guide.GuideElements):
     
     def finalize(self):
         cmds.warning('THIS STEP IS NOT IMPLEMENTED, SKIPPING.')
+
+    def remove_dead_nodes(self, dry_run: bool=False) -> list[str]:
+        """
+        Deletes the nodes created through nodes.py during the build that nothing downstream consumes.
+        Nodes an open node_sharing() context can still hand out to a later build are kept.
+
+        Args:
+            dry_run: Only log the nodes that would be deleted
+
+        Returns:
+            The dead nodes
+        """
+        nodes.flush()
+        shared = set(nodes.get_shared_nodes())
+        dead = optimize.eliminate_dead_nodes([node for node in self.created_nodes if node not in shared], dry_run)
+        action = 'would delete' if dry_run else 'deleted'
+        logger.info('%s: %s %d dead nodes%s', self.name, action, len(dead), f': {", ".join(dead)}' if dead else '')
+        return dead
@@ -0,0 +1,147 @@
+"""
+A static estimate of how expensive a component's node network is to evaluate, and budgets that keep modules in check.
+Nothing is evaluated: the estimate only looks at which nodes exist and how they're connected.
+"""
+import maya.cmds as cmds
+
+from riggler.core import optimize
+
+
+# node type: relative per frame cost, with a multMatrix as 1. Tune these to profiler measurements, anything missing costs DEFAULT_WEIGHT.
+NODE_WEIGHTS = {
+    'multMatrix': 1.0,
+    'addMatrix': 1.0,
+    'inverseMatrix': 1.5,
+    'holdMatrix': 0.2,
+    'fourByFourMatrix': 0.8,
+    'pickMatrix': 2.0,
+    'decomposeMatrix': 2.0,
+    'composeMatrix': 1.5,
+    'blendMatrix': 3.0,
+    'aimMatrix': 2.5,
+    'parentMatrix': 3.0,
+    'choice': 0.3,
+    'distanceBetween': 0.6,
+    'angleBetween': 0.8,
+    'unitConversion': 0.4,
+    'ikHandle': 10.0,
+    'ikEffector': 1.0,
+    'cluster': 5.0,
+    'skinCluster': 20.0,
+    'curveInfo': 2.0,
+}
+DEFAULT_WEIGHT = 0.5  # the 2024 scalar and vector math nodes
+
+
+def estimate_cost(created_nodes: list[str], guide_nodes: list[str]=None, weights: dict=None) -> dict:
+    """
+    Measures the node network a component created.
+
+    Args:
+        created_nodes: The nodes to measure, usually Component.created_nodes. unitConversion nodes Maya inserted between them are included.
+        guide_nodes: Nodes whose outgoing plugs are counted for the fan out, usually the component's guides
+        weights: Per node type costs overriding NODE_WEIGHTS
+
+    Returns:
+        A report with the 'node_count', the 'counts_by_type', the 'depth' and nodes of the 'longest_chain',
+        the number of destinations of each guide plug as 'guide_fan_out' and the estimated per frame 'cost'
+    """
+    weights = {**NODE_WEIGHTS, **(weights or {})}
+    existing = [node for node in created_nodes if cmds.objExists(node)]
+    measured = existing + [node for node in optimize.find_unit_conversions(existing) if node not in existing]
+
+    counts_by_type = {}
+    cost = 0.0
+    for node in measured:
+        node_type = cmds.nodeType(node)
+        counts_by_type[node_type] = counts_by_type.get(node_type, 0) + 1
+        cost += weights.get(node_type, DEFAULT_WEIGHT)
+
+    longest_chain = _find_longest_chain(measured)
+    return {
+        'node_count': len(measured),
+        'counts_by_type': dict(sorted(counts_by_type.items(), key=lambda item: (-item[1], item[0]))),
+        'depth': len(longest_chain),
+        'longest_chain': longest_chain,
+        'guide_fan_out': _count_fan_out(guide_nodes or []),
+        'cost': cost,
+    }
+
+
+def check_budget(report: dict, budget: dict) -> list[str]:
+    """
+    Compares a report from estimate_cost against a budget.
+
+    Args:
+        report: The measured network
+        budget: Limits by name: 'nodes', 'depth', 'cost' and 'fan_out', the most destinations any single guide plug may have. Missing limits aren't checked.
+
+    Returns:
+        A message for every limit the report goes over
+    """
+    measured = {
+        'nodes': report['node_count'],
+        'depth': report['depth'],
+        'cost': report['cost'],
+        'fan_out': max(report['guide_fan_out'].values(), default=0),
+    }
+    unknown = set(budget) - set(measured)
+    if unknown:
+        raise RuntimeError(f'Unknown budget limits: {", ".join(sorted(unknown))}. Use {", ".join(measured)}')
+    return [
+        f'{limit} is {measured[limit]:g}, over the budget of {maximum:g}'
+        for limit, maximum in budget.items() if maximum is not None and measured[limit] > maximum
+    ]
+
+
+def format_report(report: dict, name: str='') -> str:
+    lines = [
+        f'{name}: {report["node_count"]} nodes, depth {report["depth"]}, estimated cost {report["cost"]:.1f}',
+        '    ' + ', '.join(f'{node_type} {count}' for node_type, count in report['counts_by_type'].items()),
+    ]
+    if report['longest_chain']:
+        lines.append(f'    longest chain: {" -> ".join(report["longest_chain"])}')
+    fan_out = sorted(report['guide_fan_out'].items(), key=lambda item: -item[1])[:5]
+    if fan_out:
+        lines.append('    guide fan out: ' + ', '.join(f'{plug} {count}' for plug, count in fan_out))
+    return '\n'.join(lines)
+
+
+def _find_longest_chain(measured: list[str]) -> list[str]:
+    """
+    Returns the longest path of connections through the measured nodes, from the node closest to the inputs to the one closest to the outputs
+    """
+    measured_set = set(measured)
+    upstream = {
+        node: [source for source in set(cmds.listConnections(node, source=True, destination=False) or []) if source in measured_set]
+        for node in measured
+    }
+    chains = {}  # node: the longest chain ending at the node
+    for node in measured:
+        stack = [(node, False)]
+        visiting = set()
+        while stack:
+            current, expanded = stack.pop()
+            if current in chains:
+                continue
+            if expanded:
+                visiting.discard(current)
+                # Connections back into a node that is still being measured close a cycle, which Maya evaluates once
+                longest = max((chains[source] for source in upstream[current] if source in chains), key=len, default=[])
+                chains[current] = longest + [current]
+                continue
+            visiting.add(current)
+            stack.append((current, True))
+            stack.extend((source, False) for source in upstream[current] if source not in chains and source not in visiting)
+    return max(chains.values(), key=len, default=[])
+
+
+def _count_fan_out(guide_nodes: list[str]) -> dict:
+    fan_out = {}
+    for guide in guide_nodes:
+        if not cmds.objExists(guide):
+            continue
+        connections = cmds.listConnections(guide, source=False, destination=True, connections=True, plugs=True) or []
+        for source in connections[::2]:
+            fan_out[source] = fan_out.get(source, 0) + 1
+    return fan_out
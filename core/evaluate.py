@@ -0,0 +1,735 @@
+"""
+Evaluates node graphs recorded with riggler.core.nodes.record_graph outside of Maya, with NumPy.
+Every plug holds a batch of values, so a rig can be checked over thousands of poses in one pass:
+matrices are (N, 4, 4) arrays, vectors (N, 3) and scalars (N,).
+
+Matrices follow Maya's row vector convention, so translation sits in the last row and multMatrix multiplies left to right.
+Plugs are computed in internal units, radians and centimeters. Values set on angle plugs and angle inputs are read in degrees,
+like cmds.setAttr does with the default UI units.
+
+Every node type riggler.core.nodes creates can be evaluated, except curveInfo, which reads curve geometry.
+Passing the wanted outputs to evaluate() only computes the nodes they depend on, so the rest of the graph may hold any node type.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from riggler.core import graph, schema
+
+
+class GraphEvaluator:
+    def __init__(self, build_graph: graph.BuildGraph):
+        """
+        Args:
+            build_graph: The recorded graph to evaluate, e.g. Component.graph
+        """
+        if np is None:
+            raise RuntimeError('The offline evaluator needs NumPy')
+
+        self.nodes = dict(build_graph.nodes)
+        self.connections = {_normalize_plug(destination): _normalize_plug(source) for destination, (source, _) in build_graph.connections.items()}
+        self.values = {_normalize_plug(plug): value for plug, value in build_graph.values.items()}
+        self.dependencies = {node: set() for node in self.nodes}  # node: the nodes in the graph it reads from
+        for destination, source in self.connections.items():
+            destination_node, source_node = destination.partition('.')[0], source.partition('.')[0]
+            if destination_node in self.nodes and source_node in self.nodes:
+                self.dependencies[destination_node].add(source_node)
+        self.order = self._sort_nodes()
+        self.array_indices = {}  # array plug: its connected or set indices
+        for plug in list(self.connections) + list(self.values):
+            node, _, attr = plug.partition('.')
+            if '[' in attr:
+                array_attr, _, index = attr.partition('[')
+                self.array_indices.setdefault(f'{node}.{array_attr}', set()).add(int(index.partition(']')[0]))
+        self._inputs = {}
+        self._results = {}
+
+    def get_inputs(self, outputs: list[str]=None) -> list[str]:
+        """
+        Returns the plugs outside of the graph that feed it, such as guide and control world matrices
+
+        Args:
+            outputs: Only return the plugs that these plugs depend on
+        """
+        nodes = self.nodes if outputs is None else self._get_upstream_nodes(outputs)
+        return sorted({
+            source for destination, source in self.connections.items()
+            if destination.partition('.')[0] in nodes and source.partition('.')[0] not in self.nodes
+        })
+
+    def evaluate(self, inputs: dict, outputs: list[str]=None) -> dict:
+        """
+        Computes the outputs of the nodes in the graph.
+
+        Args:
+            inputs: A value or a batch of values for each plug returned by get_inputs(), e.g. {'arm_wrist_ik_ctl.worldMatrix[0]': (N, 4, 4) array}.
+                Matrices may also be given flat, as 16 values per pose.
+            outputs: The node outputs, or plugs outside of the graph driven by one, to compute. Only the nodes they depend on are evaluated.
+                Every node is evaluated by default.
+
+        Returns:
+            The batched value of every requested plug, or by default of every node output and of every plug outside of the graph
+            that a node output drives, by plug name
+        """
+        order = self.order
+        if outputs is not None:
+            upstream = self._get_upstream_nodes(outputs)
+            order = [node for node in order if node in upstream]
+        unsupported = sorted({self.nodes[node] for node in order if self.nodes[node] not in _EVALUATORS})
+        if unsupported:
+            raise RuntimeError(f'The offline evaluator does not support these node types: {", ".join(unsupported)}')
+
+        self._inputs = {_normalize_plug(plug): value for plug, value in inputs.items()}
+        self._results = {}
+        for node in order:
+            node_type = self.nodes[node]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                node_outputs = _EVALUATORS[node_type](_NodeReader(self, node))
+            for attr, value in node_outputs.items():
+                self._store(node, node_type, attr, value)
+
+        results = dict(self._results)
+        for destination, source in self.connections.items():
+            if destination.partition('.')[0] not in self.nodes and source in self._results:
+                results[destination] = self._results[source]
+        if outputs is not None:
+            missing = [plug for plug in outputs if _normalize_plug(plug) not in results]
+            if missing:
+                raise RuntimeError(f'The graph does not compute {", ".join(missing)}')
+            results = {plug: results[_normalize_plug(plug)] for plug in outputs}
+        count = max(len(value) for value in results.values()) if results else 0
+        return {plug: np.broadcast_to(value, (count,) + value.shape[1:]) for plug, value in results.items()}
+
+    def _sort_nodes(self) -> list[str]:
+        """
+        Orders the nodes so every node comes after the nodes it reads from, keeping the creation order otherwise
+        """
+        dependencies = self.dependencies
+        order = []
+        visited = set()
+        for root in self.nodes:
+            stack = [(root, False)]
+            visiting = set()
+            while stack:
+                node, expanded = stack.pop()
+                if expanded:
+                    visiting.discard(node)
+                    if node not in visited:
+                        visited.add(node)
+                        order.append(node)
+                    continue
+                if node in visited:
+                    continue
+                if node in visiting:
+                    raise RuntimeError(f'The graph has a cycle through {node}')
+                visiting.add(node)
+                stack.append((node, True))
+                stack.extend((dependency, False) for dependency in dependencies[node] if dependency not in visited)
+        return order
+
+    def _get_upstream_nodes(self, plugs: list[str]) -> set:
+        """
+        Returns the nodes that compute the given plugs, and every node those read from
+        """
+        stack = []
+        for plug in plugs:
+            plug = _normalize_plug(plug)
+            node = plug.partition('.')[0]
+            if node not in self.nodes:
+                # A plug outside of the graph depends on the node output driving it
+                source = self.connections.get(plug)
+                if source is None or source.partition('.')[0] not in self.nodes:
+                    raise RuntimeError(f'{plug} is not driven by the graph')
+                node = source.partition('.')[0]
+            stack.append(node)
+
+        upstream = set()
+        while stack:
+            node = stack.pop()
+            if node not in upstream:
+                upstream.add(node)
+                stack.extend(self.dependencies[node])
+        return upstream
+
+    def _store(self, node: str, node_type: str, attr: str, value):
+        self._results[f'{node}.{attr}'] = value
+        info = schema.get_attribute(node_type, attr)
+        for i, child in enumerate((info or {}).get('children') or []):
+            self._results[f'{node}.{child}'] = value[..., i]
+
+    def _read(self, node: str, attr: str):
+        """
+        Returns the batched value of an input plug: its source's value, the value set on it, or its default
+        """
+        plug = f'{node}.{attr}'
+        known_info = schema.get_attribute(self.nodes[node], attr)
+        info = known_info or {'type': 'generic', 'default': None}
+        source = self.connections.get(plug)
+        if source is not None:
+            return self._read_source(source, info)
+        if plug in self.values:
+            value, is_matrix = self.values[plug]
+            return _to_batch(value, 'matrix' if is_matrix else info['type'], info.get('unit'))
+        if known_info is None:
+            # The shipped schema is curated, so a missing attribute may just not be listed, and its default can't be guessed
+            raise RuntimeError(f'{plug} is neither set nor connected, and the schema doesn\'t know its default. Regenerate schema.json with mayapy.')
+        if info.get('children'):
+            # The children of an array element sit under it, e.g. input3D[0].input3Dx, other children sit next to their parent
+            prefix = attr if attr.endswith(']') else attr.rpartition('.')[0]
+            children = [self._read(node, f'{prefix}.{child}' if prefix else child) for child in info['children']]
+            return np.stack(np.broadcast_arrays(*children), axis=-1)
+        if info['type'] == 'matrix':
+            return np.eye(4)[None]
+        return _to_batch(info['default'] or 0, info['type'])
+
+    def _read_source(self, source: str, info: dict):
+        if source in self._results:
+            value = self._results[source]
+            source_node, _, source_attr = source.partition('.')
+            source_info = schema.get_attribute(self.nodes[source_node], source_attr) or {}
+            source_is_angle = source_info.get('unit') == 'angle'
+            # Maya converts between angles and plain doubles in UI units when it connects them
+            if 'generic' not in (info['type'], source_info.get('type')) and source_is_angle != (info.get('unit') == 'angle'):
+                value = np.degrees(value) if source_is_angle else np.radians(value)
+            return value
+        if source in self._inputs:
+            return _to_batch(self._inputs[source], info['type'], info.get('unit'))
+        if source.partition('.')[0] in self.nodes:
+            raise RuntimeError(f'{source} is not computed by the offline evaluator')
+        raise RuntimeError(f'No value for {source}, pass it in the inputs')
+
+
+class _NodeReader:
+    """
+    Gives a node evaluator access to the node's inputs
+    """
+    __slots__ = ('evaluator', 'node')
+
+    def __init__(self, evaluator: GraphEvaluator, node: str):
+        self.evaluator = evaluator
+        self.node = node
+
+    def __call__(self, attr: str):
+        return self.evaluator._read(self.node, attr)
+
+    def indices(self, attr: str) -> list[int]:
+        """
+        Returns the connected or set indices of an array attribute
+        """
+        return sorted(self.evaluator.array_indices.get(f'{self.node}.{attr}', ()))
+
+    def array(self, attr: str, child: str=None) -> list:
+        return [self(f'{attr}[{i}].{child}' if child else f'{attr}[{i}]') for i in self.indices(attr)]
+
+
+def evaluate_graph(build_graph: graph.BuildGraph, inputs: dict) -> dict:
+    """
+    Shortcut for GraphEvaluator(build_graph).evaluate(inputs)
+    """
+    return GraphEvaluator(build_graph).evaluate(inputs)
+
+
+########## Conversions ##########
+
+def _normalize_plug(plug: str) -> str:
+    """
+    Drops the parent compounds from a plug path, e.g. 'aim.primary.primaryTargetMatrix' becomes 'aim.primaryTargetMatrix'.
+    Array compounds are kept, since the index is part of the path.
+    """
+    node, _, attr = plug.partition('.')
+    parts = attr.split('.')
+    return '.'.join([node] + [part for part in parts[:-1] if '[' in part] + parts[-1:])
+
+
+def _to_batch(value, attr_type: str, unit: str=None):
+    """
+    Turns a value into an array with a leading batch dimension
+    """
+    array = np.asarray(value, dtype=float)
+    if attr_type == 'matrix':
+        if array.shape[-2:] != (4, 4):
+            array = array.reshape(array.shape[:-1] + (4, 4))
+        return array if array.ndim == 3 else array[None]
+    if attr_type in ('double3', 'float3', 'long3', 'short3'):
+        array = array if array.ndim == 2 else array[None]
+    elif attr_type == 'double4':
+        array = array if array.ndim == 2 else array[None]
+    else:
+        array = array if array.ndim == 1 else array[None]
+    return np.radians(array) if unit == 'angle' else array
+
+
+def _stack(values: list):
+    return np.stack(np.broadcast_arrays(*values))
+
+
+########## Matrix helpers ##########
+
+def _normalize(vector):
+    return vector / np.linalg.norm(vector, axis=-1, keepdims=True)
+
+
+def _transform_point(point, matrix):
+    return np.einsum('...i,...ij->...j', point, matrix[..., :3, :3]) + matrix[..., 3, :3]
+
+
+def _transform_vector(vector, matrix):
+    return np.einsum('...i,...ij->...j', vector, matrix[..., :3, :3])
+
+
+def _decompose(matrix) -> tuple:
+    """
+    Splits matrices into translation, rotation, scale and shear, the way Maya's transformation matrices compose them:
+    the upper 3x3 block is scale * shear * rotation, with shear holding the xy, xz and yz terms.
+    """
+    rows = matrix[..., :3, :3]
+    row0, row1, row2 = rows[..., 0, :], rows[..., 1, :], rows[..., 2, :]
+    dot = lambda a, b: np.sum(a * b, axis=-1, keepdims=True)
+
+    scale_x = np.linalg.norm(row0, axis=-1, keepdims=True)
+    axis_x = row0 / scale_x
+    shear_xy = dot(axis_x, row1)
+    row1 = row1 - shear_xy * axis_x
+    scale_y = np.linalg.norm(row1, axis=-1, keepdims=True)
+    axis_y = row1 / scale_y
+    shear_xz = dot(axis_x, row2)
+    shear_yz = dot(axis_y, row2)
+    row2 = row2 - shear_xz * axis_x - shear_yz * axis_y
+    scale_z = np.linalg.norm(row2, axis=-1, keepdims=True)
+    axis_z = row2 / scale_z
+
+    # A mirrored matrix keeps a proper rotation and carries the flip in its Z scale
+    flip = np.where(np.einsum('...i,...i->...', np.cross(axis_x, axis_y), axis_z) < 0, -1.0, 1.0)[..., None]
+    scale_z = scale_z * flip
+    axis_z = axis_z * flip
+
+    rotation = np.stack([axis_x, axis_y, axis_z], axis=-2)
+    scale = np.concatenate([scale_x, scale_y, scale_z], axis=-1)
+    shear = np.concatenate([shear_xy / scale_y, shear_xz / scale_z, shear_yz / scale_z], axis=-1)
+    return matrix[..., 3, :3], rotation, scale, shear
+
+
+def _compose(translation, rotation, scale, shear):
+    translation, rotation, scale, shear = np.broadcast_arrays(
+        translation[..., None, :], rotation, scale[..., None, :], shear[..., None, :]
+    )
+    translation, scale, shear = translation[..., 0, :], scale[..., 0, :], shear[..., 0, :]
+    shear_matrix = np.zeros(rotation.shape)
+    shear_matrix[..., [0, 1, 2], [0, 1, 2]] = 1
+    shear_matrix[..., 1, 0] = shear[..., 0]
+    shear_matrix[..., 2, 0] = shear[..., 1]
+    shear_matrix[..., 2, 1] = shear[..., 2]
+
+    matrix = np.zeros(rotation.shape[:-2] + (4, 4))
+    matrix[..., :3, :3] = scale[..., :, None] * (shear_matrix @ rotation)
+    matrix[..., 3, :3] = translation
+    matrix[..., 3, 3] = 1
+    return matrix
+
+
+def _to_quaternion(rotation):
+    """
+    Converts row vector rotation matrices to (x, y, z, w) quaternions
+    """
+    m = np.swapaxes(rotation, -1, -2)
+    trace = m[..., 0, 0] + m[..., 1, 1] + m[..., 2, 2]
+    candidates = np.stack([
+        np.stack([m[..., 2, 1] - m[..., 1, 2], m[..., 0, 2] - m[..., 2, 0], m[..., 1, 0] - m[..., 0, 1], 1 + trace], axis=-1),
+        np.stack([1 + m[..., 0, 0] - m[..., 1, 1] - m[..., 2, 2], m[..., 0, 1] + m[..., 1, 0], m[..., 0, 2] + m[..., 2, 0], m[..., 2, 1] - m[..., 1, 2]], axis=-1),
+        np.stack([m[..., 0, 1] + m[..., 1, 0], 1 - m[..., 0, 0] + m[..., 1, 1] - m[..., 2, 2], m[..., 1, 2] + m[..., 2, 1], m[..., 0, 2] - m[..., 2, 0]], axis=-1),
+        np.stack([m[..., 0, 2] + m[..., 2, 0], m[..., 1, 2] + m[..., 2, 1], 1 - m[..., 0, 0] - m[..., 1, 1] + m[..., 2, 2], m[..., 1, 0] - m[..., 0, 1]], axis=-1),
+    ], axis=-2)
+    # The candidate built around the largest diagonal term is the numerically stable one
+    best = np.argmax(np.stack([trace, m[..., 0, 0], m[..., 1, 1], m[..., 2, 2]], axis=-1), axis=-1)
+    quaternion = np.take_along_axis(candidates, best[..., None, None], axis=-2)[..., 0, :]
+    return _normalize(quaternion)
+
+
+def _from_quaternion(quaternion):
+    x, y, z, w = np.moveaxis(quaternion, -1, 0)
+    m = np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)], axis=-1),
+        np.stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)], axis=-1),
+        np.stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], axis=-1),
+    ], axis=-2)
+    return np.swapaxes(m, -1, -2)
+
+
+def _slerp(start, end, weight):
+    weight = weight[..., None]
+    cosine = np.sum(start * end, axis=-1, keepdims=True)
+    end = np.where(cosine < 0, -end, end)
+    cosine = np.abs(cosine)
+    angle = np.arccos(np.clip(cosine, -1, 1))
+    sine = np.sin(angle)
+    # Nearly identical rotations are blended linearly, where slerp would divide by almost zero
+    close = sine < 1e-6
+    safe_sine = np.where(close, 1, sine)
+    start_weight = np.where(close, 1 - weight, np.sin((1 - weight) * angle) / safe_sine)
+    end_weight = np.where(close, weight, np.sin(weight * angle) / safe_sine)
+    return _normalize(start_weight * start + end_weight * end)
+
+
+# Maya's rotate order enum: (first axis, whether the axes run backwards), e.g. xzy starts at X and runs backwards
+_ROTATE_ORDERS = ((0, False), (1, False), (2, False), (0, True), (1, True), (2, True))
+
+
+def _to_euler(rotation, rotate_order):
+    """
+    Converts row vector rotation matrices to X, Y and Z rotations in radians, applied in the given rotate order
+    """
+    m = np.swapaxes(rotation, -1, -2)
+    order = np.broadcast_to(np.asarray(rotate_order, dtype=int), m.shape[:-2])
+    euler = np.zeros(m.shape[:-1])
+    for value, (i, backwards) in enumerate(_ROTATE_ORDERS):
+        j, k = ((i + 2) % 3, (i + 1) % 3) if backwards else ((i + 1) % 3, (i + 2) % 3)
+        sign = -1 if backwards else 1
+        cosine_j = np.hypot(m[..., i, i], m[..., j, i])
+        # At gimbal lock the first and last rotations share an axis, so the last one is left at 0
+        locked = cosine_j < 1e-9
+        angles = np.zeros(m.shape[:-1])
+        angles[..., i] = np.where(locked, np.arctan2(-m[..., j, k], m[..., j, j]), np.arctan2(m[..., k, j], m[..., k, k]))
+        angles[..., j] = np.arctan2(-m[..., k, i], cosine_j)
+        angles[..., k] = np.where(locked, 0, np.arctan2(m[..., j, i], m[..., i, i]))
+        euler = np.where((order == value)[..., None], sign * angles, euler)
+    return euler
+
+
+def _from_axis_angle(axis, angle):
+    """
+    Builds row vector rotation matrices turning by angle around axis
+    """
+    half = angle[..., None] / 2
+    return _from_quaternion(np.concatenate([_normalize(axis) * np.sin(half), np.cos(half)], axis=-1))
+
+
+def _frame(primary, secondary):
+    """
+    Builds orthonormal row frames whose X row follows primary and whose Y row lies in the primary/secondary plane
+    """
+    primary, secondary = np.broadcast_arrays(primary, secondary)
+    axis_x = _normalize(primary)
+    axis_y = _normalize(secondary - np.sum(secondary * axis_x, axis=-1, keepdims=True) * axis_x)
+    return np.stack([axis_x, axis_y, np.cross(axis_x, axis_y)], axis=-2)
+
+
+########## Node evaluators ##########
+# Each evaluator reads the inputs of one node and returns its outputs by attribute name
+
+def _evaluate_multMatrix(read: _NodeReader) -> dict:
+    result = np.eye(4)[None]
+    for matrix in read.array('matrixIn'):
+        result = result @ matrix
+    return {'matrixSum': result}
+
+
+def _evaluate_addMatrix(read: _NodeReader) -> dict:
+    return {'matrixSum': sum(read.array('matrixIn'), np.zeros((1, 4, 4)))}
+
+
+def _evaluate_fourByFourMatrix(read: _NodeReader) -> dict:
+    values = _stack([read(f'in{i}{j}') for i in range(4) for j in range(4)])
+    return {'output': np.moveaxis(values, 0, -1).reshape(values.shape[1:] + (4, 4))}
+
+
+def _evaluate_pickMatrix(read: _NodeReader) -> dict:
+    translation, rotation, scale, shear = _decompose(read('inputMatrix'))
+    use = lambda attr: read(attr).astype(bool)[..., None]
+    translation = np.where(use('useTranslate'), translation, 0)
+    rotation = np.where(use('useRotate')[..., None], rotation, np.eye(3))
+    scale = np.where(use('useScale'), scale, 1)
+    shear = np.where(use('useShear'), shear, 0)
+    return {'outputMatrix': _compose(translation, rotation, scale, shear)}
+
+
+def _evaluate_blendMatrix(read: _NodeReader) -> dict:
+    result = read('inputMatrix')
+    envelope = read('envelope')
+    for i in read.indices('target'):
+        weight = read(f'target[{i}].weight') * envelope
+        translation, rotation, scale, shear = _decompose(result)
+        target_translation, target_rotation, target_scale, target_shear = _decompose(read(f'target[{i}].targetMatrix'))
+        lerp = lambda start, end, attr: start + (end - start) * (weight * read(f'target[{i}].{attr}'))[..., None]
+        blended_rotation = _slerp(_to_quaternion(rotation), _to_quaternion(target_rotation), weight * read(f'target[{i}].rotateWeight'))
+        result = _compose(
+            lerp(translation, target_translation, 'translateWeight'),
+            _from_quaternion(blended_rotation),
+            lerp(scale, target_scale, 'scaleWeight'),
+            lerp(shear, target_shear, 'shearWeight'),
+        )
+    return {'outputMatrix': result}
+
+
+def _evaluate_aimMatrix(read: _NodeReader) -> dict:
+    input_matrix = read('inputMatrix')
+    translation, rotation, scale, shear = _decompose(input_matrix)
+
+    def get_direction(prefix: str, mode):
+        input_axis = read(f'{prefix}InputAxis')
+        target_matrix = read(f'{prefix}TargetMatrix')
+        aim = target_matrix[..., 3, :3] - translation
+        align = _transform_vector(read(f'{prefix}TargetVector'), target_matrix)
+        current = _transform_vector(input_axis, rotation)
+        mode = mode[..., None]
+        return input_axis, np.where(mode == 1, aim, np.where(mode == 2, align, current))
+
+    primary_axis, primary_direction = get_direction('primary', read('primaryMode'))
+    secondary_axis, secondary_direction = get_direction('secondary', read('secondaryMode'))
+    # The rotation that carries the input axes frame onto the target directions frame
+    aimed = np.swapaxes(_frame(primary_axis, secondary_axis), -1, -2) @ _frame(primary_direction, secondary_direction)
+    return {'outputMatrix': _compose(translation, aimed, scale, np.zeros_like(shear))}
+
+
+def _evaluate_parentMatrix(read: _NodeReader) -> dict:
+    # Blends the offset target matrices like blendMatrix does its targets, weighted by each target's share of the total weight
+    input_matrix = read('inputMatrix')
+    pre_space, post_space = read('preSpaceMatrix'), read('postSpaceMatrix')
+    result = input_matrix
+    total = np.zeros(1)
+    for i in read.indices('target'):
+        weight = read(f'target[{i}].weight') * read(f'target[{i}].enableTarget')
+        total = total + weight
+        translation, rotation, scale, shear = _decompose(result)
+        target = pre_space @ read(f'target[{i}].offsetMatrix') @ read(f'target[{i}].targetMatrix') @ post_space
+        target_translation, target_rotation, target_scale, target_shear = _decompose(target)
+        share = np.where(total > 0, weight / np.where(total > 0, total, 1), 0)
+        lerp = lambda start, end: start + (end - start) * share[..., None]
+        result = _compose(
+            lerp(translation, target_translation),
+            _from_quaternion(_slerp(_to_quaternion(rotation), _to_quaternion(target_rotation), share)),
+            lerp(scale, target_scale),
+            lerp(shear, target_shear),
+        )
+    envelope = np.clip(read('envelope') * np.minimum(total, 1), 0, 1)
+    translation, rotation, scale, shear = _decompose(input_matrix)
+    blended_translation, blended_rotation, blended_scale, blended_shear = _decompose(result)
+    lerp = lambda start, end: start + (end - start) * envelope[..., None]
+    return {'outputMatrix': _compose(
+        lerp(translation, blended_translation),
+        _from_quaternion(_slerp(_to_quaternion(rotation), _to_quaternion(blended_rotation), envelope)),
+        lerp(scale, blended_scale),
+        lerp(shear, blended_shear),
+    )}
+
+
+def _evaluate_decomposeMatrix(read: _NodeReader) -> dict:
+    translation, rotation, scale, shear = _decompose(read('inputMatrix'))
+    return {
+        'outputTranslate': translation,
+        'outputRotate': _to_euler(rotation, read('inputRotateOrder')),
+        'outputScale': scale,
+        'outputShear': shear,
+        'outputQuat': _to_quaternion(rotation),
+    }
+
+
+def _matrix_slice_evaluator(column: bool):
+    def evaluate(read: _NodeReader) -> dict:
+        matrix, index = read('matrix'), np.clip(read('input').astype(int), 0, 3)
+        count = max(len(matrix), len(index))
+        matrix, index = np.broadcast_to(matrix, (count, 4, 4)), np.broadcast_to(index, (count,))
+        return {'output': matrix[np.arange(count), :, index] if column else matrix[np.arange(count), index]}
+    return evaluate
+
+
+def _evaluate_pointMatrixMult(read: _NodeReader) -> dict:
+    point, matrix = read('inPoint'), read('inMatrix')
+    vector_multiply = read('vectorMultiply').astype(bool)[..., None]
+    return {'output': np.where(vector_multiply, _transform_vector(point, matrix), _transform_point(point, matrix))}
+
+
+def _evaluate_vectorProduct(read: _NodeReader) -> dict:
+    input1, input2, matrix, operation = read('input1'), read('input2'), read('matrix'), read('operation')[..., None]
+    dot = np.sum(input1 * input2, axis=-1, keepdims=True)
+    output = np.where(operation == 1, dot, input1)
+    output = np.where(operation == 2, np.cross(input1, input2), output)
+    output = np.where(operation == 3, _transform_vector(input1, matrix), output)
+    output = np.where(operation == 4, _transform_point(input1, matrix), output)
+    # A dot product is a single value, so it isn't normalized
+    normalize = read('normalizeOutput').astype(bool)[..., None] & (operation != 1)
+    return {'output': np.where(normalize, _normalize(output), output)}
+
+
+def _evaluate_angleBetween(read: _NodeReader) -> dict:
+    vector1, vector2 = read('vector1'), read('vector2')
+    cross = np.cross(vector1, vector2)
+    angle = np.arctan2(np.linalg.norm(cross, axis=-1), np.sum(vector1 * vector2, axis=-1))
+    axis = _normalize(cross)
+    return {'angle': angle, 'axis': axis, 'euler': _to_euler(_from_axis_angle(axis, angle), 0)}
+
+
+def _evaluate_condition(read: _NodeReader) -> dict:
+    first, second, operation = read('firstTerm'), read('secondTerm'), read('operation')
+    # Equal, not equal, greater than, greater or equal, less than, less or equal
+    results = np.stack(np.broadcast_arrays(first == second, first != second, first > second, first >= second, first < second, first <= second))
+    condition = np.take_along_axis(results, np.broadcast_to(np.clip(operation, 0, 5).astype(int), results.shape[1:])[None], axis=0)[0]
+    return {'outColor': np.where(condition[..., None], read('colorIfTrue'), read('colorIfFalse'))}
+
+
+def _evaluate_multiplyDivide(read: _NodeReader) -> dict:
+    input1, input2, operation = read('input1'), read('input2'), read('operation')[..., None]
+    # No operation, multiply, divide, power
+    output = np.where(operation == 1, input1 * input2, input1)
+    output = np.where(operation == 2, input1 / input2, output)
+    return {'output': np.where(operation == 3, np.power(input1, input2), output)}
+
+
+def _evaluate_plusMinusAverage(read: _NodeReader) -> dict:
+    operation = read('operation')
+    outputs = {}
+    for attr, output, size in (('input1D', 'output1D', 0), ('input2D', 'output2D', 2), ('input3D', 'output3D', 3)):
+        inputs = read.array(attr)
+        if not inputs:
+            outputs[output] = np.zeros((1, size) if size else 1)
+            continue
+        inputs = _stack(inputs)
+        operation_shape = operation[..., None] if size else operation
+        # No operation, sum, subtract, average
+        result = np.where(operation_shape == 1, inputs.sum(axis=0), inputs[0])
+        result = np.where(operation_shape == 2, inputs[0] - inputs[1:].sum(axis=0), result)
+        outputs[output] = np.where(operation_shape == 3, inputs.mean(axis=0), result)
+    return outputs
+
+
+def _evaluate_remapValue(read: _NodeReader) -> dict:
+    # With the default linear ramp from (0, 0) to (1, 1), which holds its end values outside of the input range
+    input_min, input_max = read('inputMin'), read('inputMax')
+    t = np.clip((read('inputValue') - input_min) / (input_max - input_min), 0, 1)
+    output_min = read('outputMin')
+    return {'outValue': output_min + (read('outputMax') - output_min) * t}
+
+
+def _evaluate_setRange(read: _NodeReader) -> dict:
+    old_min, old_max, minimum, maximum = read('oldMin'), read('oldMax'), read('min'), read('max')
+    t = np.clip((read('value') - old_min) / (old_max - old_min), 0, 1)
+    return {'outValue': minimum + (maximum - minimum) * t}
+
+
+def _evaluate_inverseLerp(read: _NodeReader) -> dict:
+    input1 = read('input1')
+    t = (read('input') - input1) / (read('input2') - input1)
+    interpolation = read('interpolation')
+    clamped = np.clip(t, 0, 1)
+    # Linear, smooth step, smoother step
+    output = np.where(interpolation == 1, clamped * clamped * (3 - 2 * clamped), t)
+    return {'output': np.where(interpolation == 2, clamped ** 3 * (clamped * (clamped * 6 - 15) + 10), output)}
+
+
+def _evaluate_choice(read: _NodeReader) -> dict:
+    inputs = _stack(read.array('input'))
+    selector = np.clip(read('selector').astype(int), 0, len(inputs) - 1)
+    count = max(inputs.shape[1], len(selector))
+    inputs = np.broadcast_to(inputs, inputs.shape[:1] + (count,) + inputs.shape[2:])
+    return {'output': inputs[np.broadcast_to(selector, (count,)), np.arange(count)]}
+
+
+def _evaluate_distanceBetween(read: _NodeReader) -> dict:
+    start = _transform_point(read('point1'), read('inMatrix1'))
+    end = _transform_point(read('point2'), read('inMatrix2'))
+    return {'distance': np.linalg.norm(end - start, axis=-1)}
+
+
+def _evaluate_axisFromMatrix(read: _NodeReader) -> dict:
+    axis = read('axis').astype(int)
+    axes = np.concatenate([np.eye(3), -np.eye(3)])[axis]
+    return {'output': _transform_vector(axes, read('input'))}
+
+
+def _scalar_evaluator(operation, *attrs, output='output'):
+    return lambda read: {output: operation(*[read(attr) for attr in attrs])}
+
+
+def _array_evaluator(operation):
+    return lambda read: {'output': operation(_stack(read.array('input')), axis=0)}
+
+
+def _smooth_step(value, left_edge, right_edge):
+    t = np.clip((value - left_edge) / (right_edge - left_edge), 0, 1)
+    return t * t * (3 - 2 * t)
+
+
+_EVALUATORS = {
+    # Matrix
+    'multMatrix': _evaluate_multMatrix,
+    'addMatrix': _evaluate_addMatrix,
+    'inverseMatrix': _scalar_evaluator(lambda matrix: np.linalg.inv(matrix), 'inputMatrix', output='outputMatrix'),
+    'holdMatrix': _scalar_evaluator(lambda matrix: matrix, 'inMatrix', output='outMatrix'),
+    'fourByFourMatrix': _evaluate_fourByFourMatrix,
+    'pickMatrix': _evaluate_pickMatrix,
+    'blendMatrix': _evaluate_blendMatrix,
+    'aimMatrix': _evaluate_aimMatrix,
+    'parentMatrix': _evaluate_parentMatrix,
+    'passMatrix': _scalar_evaluator(lambda matrix, scale: matrix * scale[..., None, None], 'inMatrix', 'inScale', output='outMatrix'),
+    'decomposeMatrix': _evaluate_decomposeMatrix,
+    'rotationFromMatrix': _scalar_evaluator(lambda matrix, order: _to_euler(_decompose(matrix)[1], order), 'input', 'rotationOrder'),
+    'scaleFromMatrix': _scalar_evaluator(lambda matrix: _decompose(matrix)[2], 'input'),
+    'rowFromMatrix': _matrix_slice_evaluator(column=False),
+    'columnFromMatrix': _matrix_slice_evaluator(column=True),
+    'pointMatrixMult': _evaluate_pointMatrixMult,
+    'determinant': _scalar_evaluator(lambda matrix: np.linalg.det(matrix), 'input'),
+    'translationFromMatrix': _scalar_evaluator(lambda matrix: matrix[..., 3, :3], 'input'),
+    'axisFromMatrix': _evaluate_axisFromMatrix,
+    'multiplyPointByMatrix': _scalar_evaluator(_transform_point, 'input', 'matrix'),
+    'multiplyVectorByMatrix': _scalar_evaluator(_transform_vector, 'input', 'matrix'),
+    'choice': _evaluate_choice,
+    # Vector
+    'distanceBetween': _evaluate_distanceBetween,
+    'length': _scalar_evaluator(lambda vector: np.linalg.norm(vector, axis=-1), 'input'),
+    'normalize': _scalar_evaluator(_normalize, 'input'),
+    'dotProduct': _scalar_evaluator(lambda a, b: np.sum(a * b, axis=-1), 'input1', 'input2'),
+    'crossProduct': _scalar_evaluator(np.cross, 'input1', 'input2'),
+    'vectorProduct': _evaluate_vectorProduct,
+    'angleBetween': _evaluate_angleBetween,
+    # Operation
+    'sum': _array_evaluator(np.sum),
+    'multiply': _array_evaluator(np.prod),
+    'average': _array_evaluator(np.mean),
+    'subtract': _scalar_evaluator(np.subtract, 'input1', 'input2'),
+    'divide': _scalar_evaluator(np.divide, 'input1', 'input2'),
+    'negate': _scalar_evaluator(np.negative, 'input'),
+    'absolute': _scalar_evaluator(np.abs, 'input'),
+    'power': _scalar_evaluator(np.power, 'input', 'exponent'),
+    'modulo': _scalar_evaluator(np.mod, 'input', 'modulus'),
+    'log': _scalar_evaluator(lambda value, base: np.log(value) / np.log(base), 'input', 'base'),
+    'inverseLerp': _evaluate_inverseLerp,
+    'addDoubleLinear': _scalar_evaluator(np.add, 'input1', 'input2'),
+    'multDoubleLinear': _scalar_evaluator(np.multiply, 'input1', 'input2'),
+    'multiplyDivide': _evaluate_multiplyDivide,
+    'plusMinusAverage': _evaluate_plusMinusAverage,
+    'reverse': _scalar_evaluator(lambda input: 1 - input, 'input'),
+    'lerp': _scalar_evaluator(lambda input1, input2, weight: input1 + (input2 - input1) * weight, 'input1', 'input2', 'weight'),
+    'animBlendNodeAdditiveDA': _scalar_evaluator(lambda a, b, weight_a, weight_b: a * weight_a + b * weight_b, 'inputA', 'inputB', 'weightA', 'weightB'),
+    'animBlendNodeAdditiveDL': _scalar_evaluator(lambda a, b, weight_a, weight_b: a * weight_a + b * weight_b, 'inputA', 'inputB', 'weightA', 'weightB'),
+    'unitConversion': _scalar_evaluator(np.multiply, 'input', 'conversionFactor'),
+    # Comparison
+    'min': _array_evaluator(np.min),
+    'max': _array_evaluator(np.max),
+    'equal': _scalar_evaluator(lambda input1, input2, epsilon: (np.abs(input1 - input2) <= epsilon).astype(float), 'input1', 'input2', 'epsilon'),
+    'greaterThan': _scalar_evaluator(lambda input1, input2: (input1 > input2).astype(float), 'input1', 'input2'),
+    'lessThan': _scalar_evaluator(lambda input1, input2: (input1 < input2).astype(float), 'input1', 'input2'),
+    'and': _scalar_evaluator(lambda input1, input2: np.logical_and(input1, input2).astype(float), 'input1', 'input2'),
+    'or': _scalar_evaluator(lambda input1, input2: np.logical_or(input1, input2).astype(float), 'input1', 'input2'),
+    'not': _scalar_evaluator(lambda input: np.logical_not(input).astype(float), 'input'),
+    'condition': _evaluate_condition,
+    'blendColors': _scalar_evaluator(lambda color1, color2, blender: color2 + (color1 - color2) * blender[..., None], 'color1', 'color2', 'blender'),
+    # Rounding
+    'ceil': _scalar_evaluator(np.ceil, 'input'),
+    'floor': _scalar_evaluator(np.floor, 'input'),
+    # Halves round away from zero like Maya's round node, np.round rounds them to the even neighbour
+    'round': _scalar_evaluator(lambda input: np.copysign(np.floor(np.abs(input) + 0.5), input), 'input'),
+    'truncate': _scalar_evaluator(np.trunc, 'input'),
+    'clampRange': _scalar_evaluator(np.clip, 'input', 'minimum', 'maximum'),
+    'clamp': _scalar_evaluator(lambda input, minimum, maximum: np.minimum(np.maximum(input, minimum), maximum), 'input', 'min', 'max'),
+    'remapValue': _evaluate_remapValue,
+    'setRange': _evaluate_setRange,
+    'smoothStep': _scalar_evaluator(_smooth_step, 'input', 'leftEdge', 'rightEdge'),
+    # Trigonometry
+    'acos': _scalar_evaluator(np.arccos, 'input'),
+    'asin': _scalar_evaluator(np.arcsin, 'input'),
+    'atan': _scalar_evaluator(np.arctan, 'input'),
+    'atan2': _scalar_evaluator(np.arctan2, 'input1', 'input2'),
+    'cos': _scalar_evaluator(np.cos, 'input'),
+    'sin': _scalar_evaluator(np.sin, 'input'),
+    'tan': _scalar_evaluator(np.tan, 'input'),
+}
@@ -0,0 +1,316 @@
+"""
+Compiles math expressions over plugs into networks of Maya 2024+ math nodes, e.g.
+
+    expression.compile_expression('acos((a*a + c*c - b*b) / (2*a*c))', targets='joint1.rotateY', a='upper.output', b='lower.output', c='length.distance')
+
+Constant subexpressions are computed in Python, sums and products are flattened into single multi input nodes,
+and repeated subexpressions are built once.
+"""
+import ast
+import math
+from typing import Union
+
+from riggler.core import handles, nodes
+
+
+_CONSTANTS = {'pi': math.pi, 'tau': math.tau, 'e': math.e}
+
+
+def _round(value: float) -> float:
+    # Maya's round node rounds halves away from zero, Python's round rounds them to the even neighbour
+    return math.copysign(math.floor(abs(value) + 0.5), value)
+
+
+def _modulo(value: float, modulus: float) -> float:
+    # Maya's modulo node gives the result the sign of the modulus, like Python's % and unlike math.fmod
+    return value % modulus
+
+
+# function name: (operation used to compute constant arguments, number of arguments, a tuple of allowed numbers, or None for any)
+_FUNCTIONS = {
+    'abs': (abs, 1),
+    'min': (min, None),
+    'max': (max, None),
+    'average': (lambda *values: math.fsum(values) / len(values), None),
+    'floor': (math.floor, 1),
+    'ceil': (math.ceil, 1),
+    'round': (_round, 1),
+    'trunc': (math.trunc, 1),
+    'sqrt': (math.sqrt, 1),
+    'log': (math.log, (1, 2)),
+    'clamp': (lambda value, minimum, maximum: min(max(value, minimum), maximum), 3),
+    'lerp': (lambda input1, input2, weight: input1 + (input2 - input1) * weight, 3),
+    'acos': (math.acos, 1),
+    'asin': (math.asin, 1),
+    'atan': (math.atan, 1),
+    'atan2': (math.atan2, 2),
+    'cos': (math.cos, 1),
+    'sin': (math.sin, 1),
+    'tan': (math.tan, 1),
+}
+_COMMUTATIVE_FUNCTIONS = ('min', 'max', 'average')
+
+
+def compile_expression(expression: str, targets: list[str]=None, name: str=None, **variables) -> Union[str, float]:
+    """
+    Builds the node network for an expression.
+
+    Args:
+        expression: A Python style formula using +, -, *, /, **, %, the functions in _FUNCTIONS and the constants pi, tau and e
+        targets: Plugs to drive with the result
+        name: Name of the node producing the result. The other nodes are named after it.
+        variables: The plug, handle or number each name in the expression stands for
+
+    Returns:
+        The output plug of the result, or its value if the expression turned out to be constant
+
+    Identical subexpressions are always built once. Nodes are only shared with the rest of the build inside an open nodes.node_sharing().
+    """
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as error:
+        raise RuntimeError(f'Invalid expression "{expression}": {error.msg}')
+    variables = {key: handles.to_string(value) for key, value in variables.items()}
+    lowered = _lower(tree.body, variables)
+
+    targets = handles.to_string(targets)
+    targets = [targets] if isinstance(targets, str) else list(targets or [])
+
+    result = _emit(lowered, {}, name, name, targets)
+    if lowered[0] in ('plug', 'const'):
+        # No node was created for the result, so drive the targets directly
+        for target in targets:
+            if isinstance(result, str):
+                nodes.connect_attr(result, target, force=True)
+            else:
+                nodes.set_attr(target, result)
+    return result
+
+
+########## Lowering ##########
+# Expressions are lowered to hashable tuples, so identical subexpressions compare equal:
+# ('const', value), ('plug', plug), ('sum', positive terms, negative terms), ('product', factors, divisors),
+# ('power', base, exponent), ('modulo', input, modulus) and ('call', function name, arguments)
+
+def _lower(node: ast.AST, variables: dict) -> tuple:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return ('const', node.value)
+    if isinstance(node, ast.Name):
+        if node.id in variables:
+            value = variables[node.id]
+            return ('plug', value) if isinstance(value, str) else ('const', value)
+        if node.id in _CONSTANTS:
+            return ('const', _CONSTANTS[node.id])
+        raise RuntimeError(f'Unknown name "{node.id}" in expression')
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _lower(node.operand, variables)
+        return operand if isinstance(node.op, ast.UAdd) else _sum([(operand, -1)])
+    if isinstance(node, ast.BinOp):
+        left, right = _lower(node.left, variables), _lower(node.right, variables)
+        if isinstance(node.op, (ast.Add, ast.Sub)):
+            return _sum([(left, 1), (right, 1 if isinstance(node.op, ast.Add) else -1)])
+        if isinstance(node.op, (ast.Mult, ast.Div)):
+            return _product([(left, 1), (right, 1 if isinstance(node.op, ast.Mult) else -1)])
+        if isinstance(node.op, ast.Pow):
+            return _power(left, right)
+        if isinstance(node.op, ast.Mod):
+            if left[0] == 'const' and right[0] == 'const':
+                return ('const', _compute('%', _modulo, left[1], right[1]))
+            return ('modulo', left, right)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS and not node.keywords:
+        return _call(node.func.id, [_lower(arg, variables) for arg in node.args])
+    raise RuntimeError(f'Unsupported expression: {ast.unparse(node)}')
+
+
+def _sum(signed_terms: list[tuple]) -> tuple:
+    constant = 0
+    positive, negative = [], []
+    for term, sign in signed_terms:
+        if term[0] == 'const':
+            constant += sign * term[1]
+        elif term[0] == 'sum':
+            # Nested sums are flattened into one node, keeping their constant term separate so it merges with this one
+            for nested in term[1]:
+                if nested[0] == 'const':
+                    constant += sign * nested[1]
+                else:
+                    (positive if sign > 0 else negative).append(nested)
+            (negative if sign > 0 else positive).extend(term[2])
+        else:
+            (positive if sign > 0 else negative).append(term)
+    if constant:
+        positive.append(('const', constant))
+    # Subtracting a product only flips the sign of its constant factor, which saves a subtract or negate node
+    positive.extend(_product([(term, 1), (('const', -1), 1)]) for term in negative if term[0] == 'product')
+    negative = [term for term in negative if term[0] != 'product']
+
+    if not negative:
+        if not positive:
+            return ('const', 0)
+        if len(positive) == 1:
+            return positive[0]
+    return ('sum', _sorted(positive), _sorted(negative))
+
+
+def _product(signed_factors: list[tuple]) -> tuple:
+    constant = 1
+    factors, divisors = [], []
+    for factor, sign in signed_factors:
+        if factor[0] == 'const':
+            if sign < 0 and factor[1] == 0:
+                raise RuntimeError('Division by zero in expression')
+            constant = constant * factor[1] if sign > 0 else constant / factor[1]
+        elif factor[0] == 'product':
+            # Nested products are flattened into one node, keeping their constant factor separate so it merges with this one
+            for nested in factor[1]:
+                if nested[0] == 'const':
+                    constant = constant * nested[1] if sign > 0 else constant / nested[1]
+                else:
+                    (factors if sign > 0 else divisors).append(nested)
+            (divisors if sign > 0 else factors).extend(factor[2])
+        else:
+            (factors if sign > 0 else divisors).append(factor)
+
+    if constant == 0:
+        return ('const', 0)
+    if constant != 1 or not factors:
+        # Dividing by a constant is multiplying by its inverse, which keeps it inside the multiply node
+        factors.append(('const', constant))
+    if not divisors and len(factors) == 1:
+        return factors[0]
+    return ('product', _sorted(factors), _sorted(divisors))
+
+
+def _power(base: tuple, exponent: tuple) -> tuple:
+    if exponent[0] == 'const':
+        if base[0] == 'const':
+            return ('const', _compute('**', pow, base[1], exponent[1]))
+        if exponent[1] == 1:
+            return base
+        if exponent[1] == 0:
+            return ('const', 1)
+    return ('power', base, exponent)
+
+
+def _call(function: str, arguments: list[tuple]) -> tuple:
+    operation, arity = _FUNCTIONS[function]
+    arities = arity if isinstance(arity, tuple) else (arity,)
+    if arity is not None and len(arguments) not in arities:
+        raise RuntimeError(f'{function}() takes {" or ".join(map(str, arities))} arguments, got {len(arguments)}')
+    if not arguments:
+        raise RuntimeError(f'{function}() needs at least one argument')
+    if all(argument[0] == 'const' for argument in arguments):
+        return ('const', _compute(f'{function}()', operation, *[argument[1] for argument in arguments]))
+    if function == 'sqrt':
+        return _power(arguments[0], ('const', 0.5))
+    if function in ('min', 'max'):
+        # Nested calls merge into one node, and so do their constant arguments
+        flattened = []
+        for argument in arguments:
+            flattened.extend(argument[2] if argument[:2] == ('call', function) else [argument])
+        constants = [argument[1] for argument in flattened if argument[0] == 'const']
+        arguments = [argument for argument in flattened if argument[0] != 'const']
+        if constants:
+            arguments.append(('const', operation(constants)))
+        if len(arguments) == 1:
+            return arguments[0]
+    if function in _COMMUTATIVE_FUNCTIONS:
+        arguments = _sorted(arguments)
+    return ('call', function, tuple(arguments))
+
+
+def _compute(operator: str, operation, *values) -> float:
+    """
+    Computes a constant subexpression, which has to be a real number since it's set on a plug
+    """
+    try:
+        value = operation(*values)
+    except (ArithmeticError, ValueError) as error:
+        raise RuntimeError(f'{operator} cannot be computed for {", ".join(map(repr, values))} in expression: {error}')
+    if isinstance(value, complex):
+        raise RuntimeError(f'{operator} of {", ".join(map(repr, values))} has no real result in expression')
+    return value
+
+
+def _sorted(terms: list[tuple]) -> tuple:
+    return tuple(sorted(terms, key=repr))
+
+
+########## Emission ##########
+
+def _emit(expression: tuple, emitted: dict, base_name: str=None, name: str=None, targets: list[str]=None):
+    """
+    Creates the nodes for a lowered expression, reusing the result of identical subexpressions from emitted.
+    Only the outermost node gets the targets and the exact name, the others are named after base_name and their node type.
+    """
+    if expression[0] in ('const', 'plug'):
+        return expression[1]
+    if expression in emitted:
+        return emitted[expression]
+
+    get_name = lambda node_type: name or (f'{base_name}_{node_type}' if base_name else None)
+    emit = lambda child: _emit(child, emitted, base_name)
+    combine = lambda create_function, node_type, operands: _emit_operand(create_function, operands, base_name and f'{base_name}_{node_type}')
+    kind = expression[0]
+    if kind == 'sum':
+        positive = [emit(term) for term in expression[1]]
+        negative = [emit(term) for term in expression[2]]
+        if not negative:
+            node = nodes.create_sum_node(positive, targets, name=get_name('sum'))
+        elif not positive:
+            node = nodes.create_negate_node(combine(nodes.create_sum_node, 'sum', negative), targets, name=get_name('negate'))
+        else:
+            node = nodes.create_subtract_node(
+                combine(nodes.create_sum_node, 'sum', positive),
+                combine(nodes.create_sum_node, 'sum', negative),
+                targets, name=get_name('subtract')
+            )
+    elif kind == 'product':
+        factors = [emit(factor) for factor in expression[1]]
+        divisors = [emit(divisor) for divisor in expression[2]]
+        if not divisors:
+            node = nodes.create_multiply_node(factors, targets, name=get_name('multiply'))
+        else:
+            node = nodes.create_divide_node(
+                combine(nodes.create_multiply_node, 'multiply', factors),
+                combine(nodes.create_multiply_node, 'multiply', divisors),
+                targets, name=get_name('divide')
+            )
+    elif kind == 'power':
+        node = nodes.create_power_node(emit(expression[1]), targets, exponent=emit(expression[2]), name=get_name('power'))
+    elif kind == 'modulo':
+        node = nodes.create_modulo_node(emit(expression[1]), targets, modulus=emit(expression[2]), name=get_name('modulo'))
+    else:
+        node = _emit_call(expression[1], [emit(argument) for argument in expression[2]], targets, get_name(expression[1]))
+
+    plug = f'{node}.output'
+    emitted[expression] = plug
+    return plug
+
+
+def _emit_operand(create_function, operands: list, name: str=None):
+    """
+    Returns a single operand as is, and combines several into one node
+    """
+    if len(operands) == 1:
+        return operands[0]
+    return f'{create_function(operands, name=name)}.output'
+
+
+def _emit_call(function: str, arguments: list, targets: list[str]=None, name: str=None) -> str:
+    if function in ('min', 'max', 'average'):
+        create_function = {'min': nodes.create_min_node, 'max': nodes.create_max_node, 'average': nodes.create_average_node}[function]
+        return create_function(arguments, targets, name=name)
+    if function == 'log':
+        return nodes.create_log_node(arguments[0], targets, base=arguments[1] if len(arguments) > 1 else math.e, name=name)
+    if function == 'clamp':
+        return nodes.create_clampRange_node(arguments[0], targets, minimum=arguments[1], maximum=arguments[2], name=name)
+    if function == 'lerp':
+        return nodes.create_lerp_node(arguments[0], arguments[1], targets, weight=arguments[2], name=name)
+    if function == 'atan2':
+        return nodes.create_atan2_node(arguments[0], arguments[1], targets, name=name)
+    create_function = getattr(nodes, {
+        'abs': 'create_absolute_node',
+        'trunc': 'create_truncate_node',
+    }.get(function, f'create_{function}_node'))
+    return create_function(arguments[0], targets, name=name)
@@ -0,0 +1,198 @@
+"""
+An in-memory record of the nodes, connections and constant values generated by riggler.core.nodes.
+The record can be applied to the scene in one pass through OpenMaya modifiers instead of one command per operation.
+"""
+try:
+    import maya.cmds as cmds
+    from maya.api import OpenMaya as om2
+except ImportError:
+    # Recorded graphs are read without Maya too, e.g. by riggler.core.evaluate and riggler.core.mayaascii
+    cmds = om2 = None
+
+from riggler.core import handles, undoable
+
+
+_dag_types = {}  # node type: whether it's a DAG node type
+
+
+class BuildGraph:
+    def __init__(self):
+        self.nodes = {}  # name: node type, in creation order
+        self.connections = {}  # destination plug: (source plug, force)
+        self.values = {}  # plug: (value, is_matrix)
+        self.handles = {}  # name: [handles.Node bound to the node once it's created]
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node: str):
+        return node in self.nodes
+
+    def add_node(self, node_type: str, name: str) -> str:
+        self.nodes[name] = node_type
+        return name
+
+    def add_connection(self, source: str, destination: str, force: bool=False):
+        if destination in self.connections and not force:
+            raise RuntimeError(f'{destination} already has an incoming connection from {self.connections[destination][0]}')
+        self.values.pop(destination, None)
+        self.connections[destination] = (source, force)
+
+    def add_value(self, plug: str, value, is_matrix: bool=False):
+        if plug in self.connections:
+            raise RuntimeError(f'{plug} is connected to {self.connections[plug][0]} and cannot be set')
+        self.values[plug] = (value, is_matrix)
+
+    def add_nodes(self, node_type: str, names: list[str]):
+        self.nodes.update(dict.fromkeys(names, node_type))
+
+    def add_connections(self, connections: list[tuple]):
+        """
+        Adds [(source plug, destination plug, force)] at once, after checking none of them replaces a connection it mustn't
+        """
+        for source, destination, force in connections:
+            if destination in self.connections and not force:
+                raise RuntimeError(f'{destination} already has an incoming connection from {self.connections[destination][0]}')
+        for _, destination, _ in connections:
+            self.values.pop(destination, None)
+        self.connections.update((destination, (source, force)) for source, destination, force in connections)
+
+    def add_values(self, values: list[tuple]):
+        """
+        Adds [(plug, value, is_matrix)] at once, after checking none of the plugs is connected
+        """
+        for plug, _, _ in values:
+            if plug in self.connections:
+                raise RuntimeError(f'{plug} is connected to {self.connections[plug][0]} and cannot be set')
+        self.values.update((plug, (value, is_matrix)) for plug, value, is_matrix in values)
+
+    def bind_handle(self, name: str, handle: handles.Node):
+        """
+        Binds a handle to the MObject of a recorded node as soon as apply creates it
+        """
+        self.handles.setdefault(name, []).append(handle)
+
+    def remove_node(self, name: str):
+        """
+        Forgets a recorded node along with every connection and value that involves it
+        """
+        self.nodes.pop(name, None)
+        self.handles.pop(name, None)
+        prefix = name + '.'
+        self.connections = {
+            destination: (source, force) for destination, (source, force) in self.connections.items()
+            if not destination.startswith(prefix) and not source.startswith(prefix)
+        }
+        self.values = {plug: value for plug, value in self.values.items() if not plug.startswith(prefix)}
+
+    def get_source(self, destination: str):
+        """
+        Returns the pending source plug connected to the given destination plug, or None
+        """
+        connection = self.connections.get(destination)
+        return connection[0] if connection else None
+
+    def clear(self):
+        self.nodes.clear()
+        self.connections.clear()
+        self.values.clear()
+        self.handles.clear()
+
+    def apply(self) -> list[str]:
+        """
+        Creates every recorded node through one MDagModifier, then makes every recorded connection and sets every recorded value
+        through a second one, since plugs can only be found once their nodes exist.
+        Both run inside an undoable command, so the work is a single step in Maya's undo queue.
+
+        Returns:
+            The names of the created nodes
+        """
+        created = list(self.nodes)
+        undoable.apply(self._apply)
+        self.clear()
+        return created
+
+    def _apply(self, modifiers: list):
+        modifier = om2.MDagModifier()
+        modifiers.append(modifier)
+        objects = {}  # name: MObject of the created node
+        for name, node_type in self.nodes.items():
+            if is_dag_type(node_type):
+                objects[name] = modifier.createNode(node_type)
+            else:
+                # MDagModifier.createNode only makes DAG nodes
+                objects[name] = om2.MDGModifier.createNode(modifier, node_type)
+            modifier.renameNode(objects[name], name)
+        modifier.doIt()
+        for name, node_handles in self.handles.items():
+            for handle in node_handles:
+                handle.bind(objects[name])
+
+        modifier = om2.MDGModifier()
+        modifiers.append(modifier)
+        for destination, (source, force) in self.connections.items():
+            source_plug = _get_plug(source, objects)
+            destination_plug = _get_plug(destination, objects)
+            if destination_plug.isDestination:
+                if not force:
+                    raise RuntimeError(f'{destination} already has an incoming connection')
+                modifier.disconnect(destination_plug.source(), destination_plug)
+            modifier.connect(source_plug, destination_plug)
+        for plug, (value, is_matrix) in self.values.items():
+            _set_plug_value(modifier, _get_plug(plug, objects), value, is_matrix)
+        modifier.doIt()
+
+
+def is_dag_type(node_type: str) -> bool:
+    if node_type not in _dag_types:
+        _dag_types[node_type] = 'dagNode' in (cmds.nodeType(node_type, isTypeName=True, inherited=True) or [])
+    return _dag_types[node_type]
+
+
+def _get_plug(plug: str, objects: dict=None):
+    """
+    Finds a plug on the MObject of a node created by apply, or through its handle when it's a handles.PlugName,
+    and looks any other plug up by name
+    """
+    if isinstance(plug, handles.PlugName) and plug.plug.node.exists():
+        return plug.plug.mplug
+    node, _, attr = plug.partition('.')
+    if objects and node in objects:
+        return handles.find_plug(objects[node], attr)
+    selection = om2.MSelectionList()
+    selection.add(plug)
+    return selection.getPlug(0)
+
+
+def _set_plug_value(modifier, plug, value, is_matrix: bool=False):
+    if is_matrix:
+        data = om2.MFnMatrixData().create(om2.MMatrix(value))
+        modifier.newPlugValue(plug, data)
+        return
+    if isinstance(value, (list, tuple)):
+        for i, child_value in enumerate(value):
+            _set_plug_value(modifier, plug.child(i), child_value)
+        return
+
+    attribute = plug.attribute()
+    if attribute.hasFn(om2.MFn.kUnitAttribute):
+        # Match cmds.setAttr, which takes unit values in the current UI units
+        unit_type = om2.MFnUnitAttribute(attribute).unitType()
+        if unit_type == om2.MFnUnitAttribute.kAngle:
+            modifier.newPlugValueMAngle(plug, om2.MAngle(value, om2.MAngle.uiUnit()))
+        elif unit_type == om2.MFnUnitAttribute.kDistance:
+            modifier.newPlugValueMDistance(plug, om2.MDistance(value, om2.MDistance.uiUnit()))
+        else:
+            modifier.newPlugValueDouble(plug, value)
+    elif attribute.hasFn(om2.MFn.kEnumAttribute):
+        modifier.newPlugValueInt(plug, int(value))
+    elif attribute.hasFn(om2.MFn.kNumericAttribute):
+        numeric_type = om2.MFnNumericAttribute(attribute).numericType()
+        if numeric_type == om2.MFnNumericData.kBoolean:
+            modifier.newPlugValueBool(plug, bool(value))
+        elif numeric_type in (om2.MFnNumericData.kByte, om2.MFnNumericData.kChar, om2.MFnNumericData.kShort, om2.MFnNumericData.kInt):
+            modifier.newPlugValueInt(plug, int(value))
+        else:
+            modifier.newPlugValueDouble(plug, value)
+    else:
+        modifier.newPlugValueDouble(plug, value)
@@ -11,7 +11,7 @@ from maya import cmds, mel, OpenMayaUI
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from riggler.core import color
+from riggler.core import color, session
 
 
 def createDisplayCurve(objs, degree=1, width=5):
@@ -44,7 +44,7 @@ class GuideElements:
         self.createGuideMaterials()
 
     def createGuideMaterials(self):
-        guide_materials = cmds.ls('riggler*', type='lambert')
+        guide_materials = session.cached('guide_materials', lambda: set(cmds.ls('riggler*', type='lambert')))
         color_values = {
             self.red_mat:(1,0,0), 
             self.green_mat:(0,1,0), 
@@ -55,6 +55,7 @@ class GuideElements:
         for name, rgb in color_values.items():
             if name not in guide_materials:
                 color.createMaterial(name, rgb)
+                guide_materials.add(name)
 
     def createRootGuide(self, name, parent=None, show_axis=False):
         base = self._createRootGuideBase(name)
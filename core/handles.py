@@ -0,0 +1,215 @@
+"""
+Lightweight node and plug handles backed by MObjectHandle and MPlug.
+A handle is bound to its node's MObject as soon as the node exists, so it keeps pointing at the same node when it's renamed,
+and its plugs are found on the MObject instead of by looking the node's name or DAG path up again.
+The create_*_node functions accept handles wherever they accept node or plug names, and return handles to callers that pass them.
+"""
+try:
+    from maya.api import OpenMaya as om2
+except ImportError:
+    om2 = None
+
+
+class Node:
+    __slots__ = ('_handle', '_name')
+
+    def __init__(self, node):
+        """
+        Args:
+            node: A node name, an MObject or another Node. A name is bound to the node it names right away when the node exists.
+        """
+        self._handle = None
+        self._name = None
+        if isinstance(node, Node):
+            self._handle, self._name = node._handle, node._name
+        elif isinstance(node, str):
+            self._name = node
+            self._handle = _find_node(node)
+        else:
+            self._handle = om2.MObjectHandle(node)
+
+    @classmethod
+    def pending(cls, name: str) -> 'Node':
+        """
+        Returns a handle on a node that doesn't exist yet, without looking its name up. Bind it once the node is created.
+        """
+        node = cls.__new__(cls)
+        node._handle, node._name = None, name
+        return node
+
+    @property
+    def name(self) -> str:
+        """
+        The node's current name, or its shortest unique path for DAG nodes
+        """
+        handle = self.handle
+        if handle is None or not handle.isValid():
+            return self._name
+        obj = handle.object()
+        if obj.hasFn(om2.MFn.kDagNode):
+            self._name = om2.MFnDagNode(obj).partialPathName()
+        else:
+            self._name = om2.MFnDependencyNode(obj).name()
+        return self._name
+
+    @property
+    def handle(self):
+        """
+        The node's MObjectHandle, or None while the node doesn't exist yet, e.g. until deferred work is applied.
+        Once bound, the handle is never swapped for another node of the same name, it becomes invalid when its node is deleted.
+        """
+        if self._handle is None:
+            self._handle = _find_node(self._name)
+        return self._handle
+
+    def bind(self, obj):
+        """
+        Binds the handle to the MObject of its node, e.g. once a deferred node has been created
+        """
+        self._handle = om2.MObjectHandle(obj)
+
+    def exists(self) -> bool:
+        handle = self.handle
+        return handle is not None and handle.isValid()
+
+    def plug(self, attr: str) -> 'Plug':
+        return Plug(self, attr)
+
+    def __getitem__(self, attr: str) -> 'Plug':
+        return Plug(self, attr)
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f'Node({self.name!r})'
+
+
+class Plug:
+    __slots__ = ('node', 'attr', '_mplug')
+
+    def __init__(self, node, attr: str=None):
+        """
+        Args:
+            node: A Node, a node name, or a full plug path such as 'locator1.worldMatrix[0]' when attr is left out
+            attr: The attribute path on the node, such as 'target[0].targetMatrix'
+        """
+        if attr is None:
+            node, _, attr = str(node).partition('.')
+        self.node = node if isinstance(node, Node) else Node(node)
+        self.attr = attr
+        self._mplug = None
+
+    @property
+    def name(self) -> str:
+        return f'{self.node.name}.{self.attr}'
+
+    @property
+    def mplug(self):
+        """
+        The MPlug behind this plug, found on the node's MObject once and reused afterwards
+        """
+        if self._mplug is None or self._mplug.isNull:
+            if not self.node.exists():
+                raise RuntimeError(f'{self.name} cannot be found, its node does not exist')
+            self._mplug = find_plug(self.node.handle.object(), self.attr)
+        return self._mplug
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f'Plug({self.name!r})'
+
+
+class PlugName(str):
+    """
+    A plug's name that keeps its Plug, so riggler.core.nodes and riggler.core.graph connect and set it through the Plug's MPlug
+    instead of looking the name up again. It's a str everywhere else, e.g. for signatures and recorded graphs.
+    """
+    def __new__(cls, plug: Plug):
+        name = super().__new__(cls, plug.name)
+        name.plug = plug
+        return name
+
+
+class Folded:
+    """
+    Stands in for a node that constant_folding() computed in Python instead of creating.
+    Every plug of it is the constant value the node would have output, or the Plug it would have passed through.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def exists(self) -> bool:
+        return False
+
+    def plug(self, attr: str):
+        return self.value
+
+    def __getitem__(self, attr: str):
+        return self.value
+
+    def __str__(self):
+        # A folded node has no name, formatting one into a plug path such as f'{folded}.output' would name a missing node
+        raise RuntimeError(f'{self!r} stands for a folded node and has no name, use its plugs, e.g. folded["output"]')
+
+    def __repr__(self):
+        return f'Folded({self.value!r})'
+
+
+def to_string(value):
+    """
+    Replaces handles with their current names, including inside lists and tuples, and folded nodes with what they stand for.
+    Plugs become PlugName, which still finds the plug through its MPlug. Other values are returned unchanged.
+    """
+    if isinstance(value, Node):
+        return value.name
+    if isinstance(value, Plug):
+        return PlugName(value)
+    if isinstance(value, Folded):
+        return to_string(value.value)
+    if isinstance(value, list):
+        return [to_string(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(to_string(item) for item in value)
+    return value
+
+
+def contains_handles(value) -> bool:
+    if isinstance(value, (Node, Plug, Folded)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return any(contains_handles(item) for item in value)
+    return False
+
+
+def find_plug(obj, attr: str):
+    """
+    Finds a plug such as 'target[0].targetMatrix' on a node's MObject, without looking the node up by name
+
+    Args:
+        obj: The node's MObject
+        attr: The attribute path on the node
+    """
+    fn = om2.MFnDependencyNode(obj)
+    plug = None
+    for part in attr.split('.'):
+        attr_name, _, index = part.partition('[')
+        plug = fn.findPlug(attr_name, False) if plug is None else plug.child(fn.attribute(attr_name))
+        if index:
+            plug = plug.elementByLogicalIndex(int(index[:-1]))
+    return plug
+
+
+def _find_node(name: str):
+    if om2 is None or not name:
+        return None
+    selection = om2.MSelectionList()
+    try:
+        selection.add(name)
+    except RuntimeError:
+        return None
+    return om2.MObjectHandle(selection.getDependNode(0))
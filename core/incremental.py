@@ -0,0 +1,165 @@
+"""
+Content hashes of a component's build inputs, stored on the component's root so the next build can tell whether anything changed.
+A component whose inputs hash the same as last time doesn't need rebuilding. A changed one is deleted and rebuilt
+with its guides put back where the rigger left them.
+"""
+import hashlib
+import inspect
+import json
+import sys
+from pathlib import Path
+
+import maya.cmds as cmds
+
+
+HASH_ATTR = 'input_hash'
+CREATED_NODES_ATTR = 'created_nodes'
+OUTPUTS_ATTR = 'step_outputs'
+
+
+def hash_inputs(inputs: dict) -> str:
+    """
+    Returns a hash of JSON friendly inputs. Floats are rounded, so evaluation noise doesn't count as a change.
+    """
+    data = json.dumps(_round_floats(inputs), sort_keys=True, default=repr)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def hash_sources(component_type: type) -> dict:
+    """
+    Hashes the source file of the component's class and of every riggler class it inherits from, plus the settings.json next to the class.
+    Every loaded riggler.core module is hashed too, since the build goes through helpers such as nodes, shapes and optimize.
+
+    Returns:
+        The hashes by module name, and by settings.json
+    """
+    files = {}
+    for cls in inspect.getmro(component_type):
+        module_file = getattr(sys.modules.get(cls.__module__), '__file__', None)
+        if module_file and cls.__module__.startswith('riggler'):
+            files[cls.__module__] = Path(module_file)
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, '__file__', None)
+        if module_file and name.startswith('riggler.core.'):
+            files[name] = Path(module_file)
+    module_file = getattr(sys.modules.get(component_type.__module__), '__file__', None)
+    if module_file:
+        files['settings.json'] = Path(module_file).with_name('settings.json')
+    return {key: hashlib.sha1(path.read_bytes()).hexdigest() for key, path in files.items() if path.is_file()}
+
+
+def get_guide_matrices(guides_grp: str) -> dict:
+    """
+    Returns the world matrix of every transform under the guides group, parents before their children
+    """
+    if not cmds.objExists(guides_grp):
+        return {}
+    guides = list(reversed(cmds.listRelatives(guides_grp, allDescendents=True, type='transform', fullPath=True) or []))
+    return {guide: cmds.xform(guide, query=True, matrix=True, worldSpace=True) for guide in guides}
+
+
+def restore_guide_matrices(matrices: dict):
+    """
+    Puts guides back at the world matrices from get_guide_matrices. Guides that no longer exist or can't be moved are skipped.
+    """
+    for guide, matrix in matrices.items():
+        if not cmds.objExists(guide):
+            continue
+        try:
+            cmds.xform(guide, matrix=matrix, worldSpace=True)
+        except RuntimeError:
+            cmds.warning(f'Could not restore the guide {guide}, it is locked or driven')
+
+
+def get_stored_hash(root: str) -> str:
+    """
+    Returns the input hash stored by the component's last build, or an empty string
+    """
+    if not root or not cmds.objExists(f'{root}.{HASH_ATTR}'):
+        return ''
+    return cmds.getAttr(f'{root}.{HASH_ATTR}') or ''
+
+
+def get_stored_nodes(root: str) -> list[str]:
+    """
+    Returns the nodes the component's last build created through nodes.py
+    """
+    if not root or not cmds.objExists(f'{root}.{CREATED_NODES_ATTR}'):
+        return []
+    return json.loads(cmds.getAttr(f'{root}.{CREATED_NODES_ATTR}') or '[]')
+
+
+def get_stored_outputs(root: str) -> dict:
+    """
+    Returns the step outputs stored by the component's last build, see store_build
+    """
+    if not root or not cmds.objExists(f'{root}.{OUTPUTS_ATTR}'):
+        return {}
+    return json.loads(cmds.getAttr(f'{root}.{OUTPUTS_ATTR}') or '{}')
+
+
+def store_build(root: str, input_hash: str, created_nodes: list[str], outputs: dict=None):
+    """
+    Stores the input hash, created nodes and step outputs of a finished build on the component's root.
+    Outputs that can't be stored as JSON are left out, tuples come back as lists.
+    """
+    stored_outputs = {}
+    for key, value in (outputs or {}).items():
+        try:
+            stored_outputs[key] = json.loads(json.dumps(value))
+        except (TypeError, ValueError):
+            continue
+    stored = ((HASH_ATTR, input_hash), (CREATED_NODES_ATTR, json.dumps(created_nodes)), (OUTPUTS_ATTR, json.dumps(stored_outputs)))
+    for attr, value in stored:
+        if not cmds.objExists(f'{root}.{attr}'):
+            cmds.addAttr(root, longName=attr, dataType='string')
+        cmds.setAttr(f'{root}.{attr}', value, type='string')
+
+
+def delete_build(root: str) -> int:
+    """
+    Deletes the component's hierarchy and the nodes its last build created through nodes.py.
+    Created nodes that still feed a node outside of those, such as a node shared with a component that isn't rebuilt,
+    are kept along with the created nodes upstream of them, and are left to their other consumers.
+
+    Returns:
+        The number of deleted nodes
+    """
+    stored = [node for node in get_stored_nodes(root) if cmds.objExists(node)]
+    # unitConversion nodes Maya inserted on the build's connections belong to the build too
+    owned = set(stored) | set(cmds.listConnections(stored, type='unitConversion') or [] if stored else [])
+    inside = owned | set(cmds.ls(root, dag=True) or [] if cmds.objExists(root) else [])
+    kept = set()
+    pending = [node for node in owned if any(consumer not in inside for consumer in _get_consumers(node))]
+    while pending:
+        node = pending.pop()
+        if node in kept:
+            continue
+        kept.add(node)
+        pending.extend(source for source in cmds.listConnections(node, source=True, destination=False) or [] if source in owned)
+
+    doomed = [node for node in owned if node not in kept]
+    if cmds.objExists(root):
+        doomed.append(root)
+    if doomed:
+        cmds.delete(doomed)
+    return len(doomed)
+
+
+def _get_consumers(node: str) -> list[str]:
+    """
+    Returns the nodes the node's outputs are connected to, leaving out message connections such as the one Maya makes
+    from utility nodes to defaultRenderUtilityList1
+    """
+    connections = cmds.listConnections(node, source=False, destination=True, connections=True) or []
+    return [consumer for plug, consumer in zip(connections[::2], connections[1::2]) if not plug.endswith('.message')]
+
+
+def _round_floats(value, digits: int=6):
+    if isinstance(value, float):
+        return round(value, digits) + 0.0  # + 0.0 turns -0.0 into 0.0
+    if isinstance(value, dict):
+        return {key: _round_floats(item, digits) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_round_floats(item, digits) for item in value]
+    return value
@@ -0,0 +1,247 @@
+"""
+Measures where a build spends its time and memory: the wall time, the cmds and OpenMaya calls, the nodes created
+and the Python memory allocated by every step of every component.
+Reports are plain dicts of numbers and strings, so they can be dumped to JSON and aggregated across builds.
+"""
+import json
+import sys
+import time
+import tracemalloc
+import types
+from contextlib import contextmanager
+from pathlib import Path
+
+import maya.cmds as cmds
+
+try:
+    from maya.api import OpenMaya as om2
+except ImportError:
+    om2 = None
+
+
+_cmds_counts = None  # cmds function: calls, while counting
+_api_counts = None  # OpenMaya class.method: calls, while counting with count_api_calls
+_build_reports = []  # reports collecting the components measured inside each active build_report() context
+
+
+########## Call counting ##########
+
+@contextmanager
+def count_calls(count_api_calls: bool=True):
+    """
+    Counts every cmds call made while inside the context, and every OpenMaya method call if count_api_calls is set.
+    cmds functions are swapped for counting wrappers. OpenMaya methods are counted through a profile hook,
+    which slows all Python code down, so only compare wall times between builds counted the same way.
+    Nested contexts join the outer one.
+
+    Returns:
+        The cmds counts and the OpenMaya counts, which stay empty if OpenMaya calls aren't counted
+    """
+    global _cmds_counts, _api_counts
+    if _cmds_counts is not None:
+        yield _cmds_counts, _api_counts
+        return
+
+    _cmds_counts = {}
+    _api_counts = {}
+    originals = {}
+    for name in dir(cmds):
+        function = getattr(cmds, name)
+        if not name.startswith('_') and callable(function):
+            originals[name] = function
+            setattr(cmds, name, _counting(name, function))
+    previous_profile = sys.getprofile()
+    if count_api_calls and om2 is not None:
+        sys.setprofile(_count_api_call)
+    try:
+        yield _cmds_counts, _api_counts
+    finally:
+        if count_api_calls and om2 is not None:
+            sys.setprofile(previous_profile)
+        for name, function in originals.items():
+            setattr(cmds, name, function)
+        _cmds_counts = None
+        _api_counts = None
+
+
+def _counting(name: str, function):
+    def counted(*args, **kwargs):
+        if _cmds_counts is not None:
+            _cmds_counts[name] = _cmds_counts.get(name, 0) + 1
+        return function(*args, **kwargs)
+    counted.__name__ = name
+    counted.__doc__ = function.__doc__
+    return counted
+
+
+def _count_api_call(frame, event, arg):
+    if event != 'c_call' or _api_counts is None:
+        return
+    owner = getattr(arg, '__self__', None)
+    if isinstance(owner, types.ModuleType):
+        module, name = owner.__name__, arg.__name__
+    else:
+        module, name = type(owner).__module__, f'{type(owner).__name__}.{arg.__name__}'
+    if 'OpenMaya' in module:
+        _api_counts[name] = _api_counts.get(name, 0) + 1
+
+
+########## Measuring ##########
+
+@contextmanager
+def measure_component(name: str, component_type: str='', count_api_calls: bool=True):
+    """
+    Counts calls and traces Python memory for one component's build. Steps are measured inside it with measure_step.
+    The finished report is added to every active build_report().
+    The component's wall time only adds up its steps, since the scheduler runs the steps of every component in between.
+
+    Returns:
+        The component's report, with its 'name', 'type', 'wall_time' in seconds, 'steps' and the 'totals' of its steps
+    """
+    report = {'name': name, 'type': component_type, 'wall_time': 0.0, 'steps': [], 'totals': {}}
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        with count_calls(count_api_calls):
+            yield report
+    finally:
+        report['totals'] = _sum_steps(report['steps'])
+        report['wall_time'] = report['totals']['wall_time']
+        if started_tracing:
+            tracemalloc.stop()
+        for build in _build_reports:
+            build['components'].append(report)
+
+
+@contextmanager
+def measure_step(component_report: dict, step: str):
+    """
+    Measures one build step inside measure_component and adds it to the component's report.
+    Nodes are counted through a node added callback, so nodes created through cmds, such as control shapes, count too.
+
+    Returns:
+        The step's report, with its 'step' name, 'wall_time' in seconds, 'nodes_created', 'cmds_calls', 'api_calls', the calls by function,
+        and the 'memory_delta' and 'memory_peak' in bytes allocated by Python
+    """
+    cmds_before = dict(_cmds_counts or {})
+    api_before = dict(_api_counts or {})
+    memory_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    report = {'step': step, 'wall_time': 0.0, 'nodes_created': 0}
+
+    def node_added(*args):
+        report['nodes_created'] += 1
+
+    callback = om2.MDGMessage.addNodeAddedCallback(node_added, 'dependNode') if om2 is not None else None
+    start = time.perf_counter()
+    try:
+        yield report
+    finally:
+        report['wall_time'] = time.perf_counter() - start
+        if callback is not None:
+            om2.MMessage.removeCallback(callback)
+        cmds_calls = _subtract_counts(_cmds_counts or {}, cmds_before)
+        api_calls = _subtract_counts(_api_counts or {}, api_before)
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        report.update({
+            'cmds_calls': sum(cmds_calls.values()),
+            'api_calls': sum(api_calls.values()),
+            'cmds_calls_by_function': cmds_calls,
+            'api_calls_by_function': api_calls,
+            'memory_delta': current - memory_before,
+            'memory_peak': max(peak - memory_before, 0),
+        })
+        component_report['steps'].append(report)
+
+
+@contextmanager
+def build_report(name: str=''):
+    """
+    Collects the report of every component measured inside the context, e.g. around a whole character build.
+    Components are measured while a build report is active even if their instrument_build flag isn't set.
+
+    Returns:
+        The build's report, with its 'name', the 'started' time, its 'wall_time' in seconds and the 'components'
+    """
+    report = {'name': name, 'started': time.strftime('%Y-%m-%dT%H:%M:%S'), 'wall_time': 0.0, 'components': []}
+    _build_reports.append(report)
+    start = time.perf_counter()
+    try:
+        yield report
+    finally:
+        report['wall_time'] = time.perf_counter() - start
+        _build_reports.remove(report)
+
+
+def is_collecting() -> bool:
+    """
+    Whether a build_report() context is active
+    """
+    return bool(_build_reports)
+
+
+def _subtract_counts(after: dict, before: dict) -> dict:
+    counts = {name: count - before.get(name, 0) for name, count in after.items() if count != before.get(name, 0)}
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+def _sum_steps(steps: list[dict]) -> dict:
+    totals = {'wall_time': 0.0, 'cmds_calls': 0, 'api_calls': 0, 'nodes_created': 0, 'memory_delta': 0, 'memory_peak': 0}
+    for step in steps:
+        for key in totals:
+            totals[key] = max(totals[key], step.get(key, 0)) if key == 'memory_peak' else totals[key] + step.get(key, 0)
+    return totals
+
+
+########## Reports ##########
+
+def summarize_reports(reports: list[dict]) -> dict:
+    """
+    Adds up build reports, e.g. of every character on a show, by component type and by step name
+
+    Returns:
+        The number of 'builds' and 'components', the 'wall_time' of the builds, and the summed totals 'by_type' and 'by_step'
+    """
+    summary = {'builds': len(reports), 'components': 0, 'wall_time': 0.0, 'by_type': {}, 'by_step': {}}
+    for report in reports:
+        summary['wall_time'] += report['wall_time']
+        for component in report['components']:
+            summary['components'] += 1
+            by_type = summary['by_type'].setdefault(component['type'], {'count': 0})
+            by_type['count'] += 1
+            _add_totals(by_type, component['totals'])
+            for step in component['steps']:
+                by_step = summary['by_step'].setdefault(step['step'], {'count': 0})
+                by_step['count'] += 1
+                _add_totals(by_step, step)
+    return summary
+
+
+def _add_totals(totals: dict, measured: dict):
+    for key in ('wall_time', 'cmds_calls', 'api_calls', 'nodes_created', 'memory_delta'):
+        totals[key] = totals.get(key, 0) + measured.get(key, 0)
+
+
+def save_report(report: dict, path: Path):
+    Path(path).write_text(json.dumps(report, indent=4))
+
+
+def load_report(path: Path) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def format_report(report: dict) -> str:
+    totals = report['totals']
+    lines = [
+        f'{report["name"]}: {report["wall_time"]:.3f}s, {totals["cmds_calls"]} cmds calls, {totals["api_calls"]} OpenMaya calls, '
+        f'{totals["nodes_created"]} nodes, {totals["memory_delta"] / 1024:.1f} KiB'
+    ]
+    for step in report['steps']:
+        busiest = ', '.join(f'{name} {count}' for name, count in list(step['cmds_calls_by_function'].items())[:3])
+        lines.append(
+            f'    {step["step"]}: {step["wall_time"]:.3f}s, {step["cmds_calls"]} cmds calls, {step["api_calls"]} OpenMaya calls, '
+            f'{step["nodes_created"]} nodes, {step["memory_delta"] / 1024:.1f} KiB' + (f' ({busiest})' if busiest else '')
+        )
+    return '\n'.join(lines)
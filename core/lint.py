@@ -0,0 +1,143 @@
+"""
+Flags the parts of a component that keep Maya's parallel evaluation or cached playback from working well:
+node types that evaluate serially or outside the evaluation graph, one deformer per point setups and dependency cycles.
+Every check only reads the scene, so it can run in a batch build.
+"""
+import maya.cmds as cmds
+
+
+# node type: why it hurts evaluation
+SERIAL_NODE_TYPES = {
+    'ikHandle': 'ikHandles evaluate their solver serially and keep the chain out of cached playback, use nodes.create_two_bone_ik',
+    'ikEffector': 'ikEffectors belong to ikHandles, which evaluate serially',
+    'expression': 'expressions run MEL serially and are untrusted by the evaluation manager',
+    'script': 'script nodes run arbitrary code and are untrusted by the evaluation manager',
+    'pythonNode': 'Python nodes hold the interpreter lock, which serializes evaluation',
+    'dagPose': 'dagPose nodes are only needed by the bind pose and get pulled into evaluation',
+}
+MAX_DEFORMERS_PER_SHAPE = 1  # more deformers of the same type on one shape usually means one deformer per point
+PER_POINT_DEFORMER_TYPES = ('cluster', 'softMod', 'wire')
+
+
+def lint_nodes(nodes: list[str]) -> list[dict]:
+    """
+    Checks the given nodes for anything that forces serial or DG evaluation.
+
+    Args:
+        nodes: The nodes to check, e.g. from get_component_nodes
+
+    Returns:
+        One issue per problem, each with a 'rule' name, a 'message' and the 'nodes' responsible
+    """
+    existing = [node for node in dict.fromkeys(nodes) if cmds.objExists(node)]
+    return _find_serial_nodes(existing) + _find_per_point_deformers(existing) + _find_cycles(existing)
+
+
+def get_component_nodes(root: str, created_nodes: list[str]=None) -> list[str]:
+    """
+    Gathers everything a component is made of: the nodes it created through nodes.py, its DAG hierarchy
+    and the deformers and other history on the shapes in that hierarchy
+    """
+    found = list(created_nodes or [])
+    if root and cmds.objExists(root):
+        found.append(root)
+        found.extend(cmds.listRelatives(root, allDescendents=True) or [])
+        for shape in cmds.listRelatives(root, allDescendents=True, shapes=True) or []:
+            found.extend(cmds.listHistory(shape, pruneDagObjects=True) or [])
+    return list(dict.fromkeys(found))
+
+
+def format_issues(issues: list[dict], name: str='') -> str:
+    if not issues:
+        return f'{name}: no parallel evaluation issues'
+    lines = [f'{name}: {len(issues)} parallel evaluation issues']
+    for issue in issues:
+        lines.append(f'    [{issue["rule"]}] {issue["message"]}: {", ".join(issue["nodes"])}')
+    return '\n'.join(lines)
+
+
+def _find_serial_nodes(nodes: list[str]) -> list[dict]:
+    by_type = {}
+    for node in nodes:
+        node_type = cmds.nodeType(node)
+        if node_type in SERIAL_NODE_TYPES:
+            by_type.setdefault(node_type, []).append(node)
+    return [
+        {'rule': 'serial_node', 'message': SERIAL_NODE_TYPES[node_type], 'nodes': sorted(found)}
+        for node_type, found in sorted(by_type.items())
+    ]
+
+
+def _find_per_point_deformers(nodes: list[str]) -> list[dict]:
+    deformers = {}  # (deformer type, deformed shape): deformers
+    for node in nodes:
+        node_type = cmds.nodeType(node)
+        if node_type not in PER_POINT_DEFORMER_TYPES:
+            continue
+        for shape in cmds.deformer(node, query=True, geometry=True) or []:
+            deformers.setdefault((node_type, shape), []).append(node)
+    return [
+        {
+            'rule': 'per_point_deformers',
+            'message': f'{len(found)} {node_type} deformers on {shape} each add a deformer evaluation and a cached playback layer, '
+                       f'drive the points with one deformer or by connecting to the shape\'s controlPoints instead',
+            'nodes': sorted(found),
+        }
+        for (node_type, shape), found in sorted(deformers.items()) if len(found) > MAX_DEFORMERS_PER_SHAPE
+    ]
+
+
+def _find_cycles(nodes: list[str]) -> list[dict]:
+    """
+    Finds the strongly connected groups among the nodes, following connections and DAG parenting, with Tarjan's algorithm
+    """
+    node_set = set(nodes)
+    upstream = {}
+    for node in nodes:
+        sources = (cmds.listConnections(node, source=True, destination=False) or []) + (cmds.listRelatives(node, parent=True) or [])
+        upstream[node] = sorted({source for source in sources if source in node_set})
+
+    index = {}
+    low_link = {}
+    on_stack = set()
+    stack = []
+    groups = []
+    counter = 0
+    for start in nodes:
+        if start in index:
+            continue
+        work = [(start, 0)]
+        while work:
+            node, child_index = work.pop()
+            if child_index == 0:
+                index[node] = low_link[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack.add(node)
+            children = upstream[node]
+            if child_index < len(children):
+                work.append((node, child_index + 1))
+                child = children[child_index]
+                if child not in index:
+                    work.append((child, 0))
+                elif child in on_stack:
+                    low_link[node] = min(low_link[node], index[child])
+                continue
+            if low_link[node] == index[node]:
+                group = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    group.append(member)
+                    if member == node:
+                        break
+                if len(group) > 1 or node in upstream[node]:
+                    groups.append(sorted(group))
+            if work:
+                parent = work[-1][0]
+                low_link[parent] = min(low_link[parent], low_link[node])
+
+    return [
+        {'rule': 'cycle', 'message': 'these nodes depend on each other, which forces Maya to evaluate them serially in the DG', 'nodes': group}
+        for group in groups
+    ]
@@ -0,0 +1,310 @@
+"""
+Writes Maya ASCII files straight from recorded builds, without a Maya session.
+A BuildGraph, such as the nodes.py work recorded in Component.graph, or a component snapshot is turned into
+createNode, addAttr and setAttr blocks in dependency order followed by the connectAttr block, the way Maya lays out its own files.
+Only the standard library and riggler.core.graph are imported, so this runs in any Python process.
+"""
+import gzip
+import json
+from pathlib import Path
+
+from riggler.core import graph
+
+
+MAYA_VERSION = '2024'
+_ATTRIBUTE_FLAGS = {
+    'bool': '-at "bool"',
+    'byte': '-at "byte"',
+    'double': '-at "double"',
+    'float': '-at "float"',
+    'long': '-at "long"',
+    'short': '-at "short"',
+    'enum': '-at "enum"',
+    'doubleLinear': '-at "doubleLinear"',
+    'doubleAngle': '-at "doubleAngle"',
+    'double3': '-at "double3"',
+    'float3': '-at "float3"',
+    'string': '-dt "string"',
+    'matrix': '-dt "matrix"',
+    'message': '-at "message"',
+}
+_CHILD_TYPES = {'double3': 'double', 'float3': 'float'}
+# addAttr flag: attribute property from snapshot.get_attribute_properties
+_PROPERTY_FLAGS = {'-min': 'min', '-max': 'max', '-smn': 'softMin', '-smx': 'softMax'}
+
+
+########## Graphs ##########
+
+def emit_graph(build_graph: graph.BuildGraph, external_connections: bool=False) -> list[str]:
+    """
+    Returns the lines creating the graph's nodes, with sources before the nodes reading them, their values and connections.
+    Connections to nodes the graph didn't create are only written as comments unless external_connections is set,
+    since those nodes have to exist wherever the file is opened or referenced.
+    """
+    lines = []
+    values = {}
+    for plug, value in build_graph.values.items():
+        values.setdefault(plug.partition('.')[0], []).append((plug.partition('.')[2], value))
+    for node in _sort_graph_nodes(build_graph):
+        lines.append(f'createNode {build_graph.nodes[node]} -n {_quote(node)};')
+        for attr, (value, is_matrix) in values.get(node, []):
+            lines.append(_set_attr_line(attr, value, is_matrix))
+    connections = [(source, destination) for destination, (source, _) in build_graph.connections.items()]
+    return lines + _connect_attr_lines(connections, set(build_graph.nodes), external_connections)
+
+
+def save_graph(build_graph: graph.BuildGraph, path: Path, linear: str='centimeter', angle: str='degree', external_connections: bool=False):
+    """
+    Writes a BuildGraph as a Maya ASCII file
+
+    Args:
+        build_graph: The recorded work
+        path: The .ma file to write
+        linear: The linear unit the graph's values were recorded in
+        angle: The angle unit the graph's values were recorded in
+        external_connections: Whether to connect to nodes the graph didn't create, see emit_graph
+    """
+    write_maya_ascii(path, emit_graph(build_graph, external_connections), linear, angle)
+
+
+def _sort_graph_nodes(build_graph: graph.BuildGraph) -> list[str]:
+    """
+    Orders the graph's nodes so every node comes after the nodes it reads from, keeping creation order otherwise.
+    Nodes in cycles keep their creation order.
+    """
+    upstream = {node: [] for node in build_graph.nodes}
+    for destination, (source, _) in build_graph.connections.items():
+        source_node = source.partition('.')[0]
+        destination_node = destination.partition('.')[0]
+        if source_node in upstream and destination_node in upstream and source_node != destination_node:
+            upstream[destination_node].append(source_node)
+
+    ordered = []
+    state = {}  # node: 1 while its sources are being visited, 2 once it's ordered
+    for start in build_graph.nodes:
+        stack = [(start, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if state.get(node) == 2:
+                continue
+            if expanded:
+                state[node] = 2
+                ordered.append(node)
+                continue
+            state[node] = 1
+            stack.append((node, True))
+            stack.extend((source, False) for source in reversed(upstream[node]) if source not in state)
+    return ordered
+
+
+########## Snapshots ##########
+
+def emit_snapshot(snapshot: dict, external_connections: bool=False) -> list[str]:
+    """
+    Returns the lines rebuilding a snapshot from riggler.core.snapshot, parents before their children.
+    The shading groups its shapes are members of are created with their materials, so the file opens on its own.
+    Connections to other nodes outside of the snapshot, such as a parent component's outputs, are only written as comments
+    unless external_connections is set, since those nodes have to exist wherever the file is opened or referenced.
+    """
+    strings = snapshot['strings']
+    paths = []
+    for name, _, parent in snapshot['nodes']:
+        paths.append(f'{paths[parent]}|{strings[name]}' if parent >= 0 else strings[name])
+
+    attributes = _group_by_node(snapshot['attributes'])
+    values = _group_by_node(snapshot['values'])
+    channels = _group_by_node(snapshot['channels'])
+    curves = _group_by_node(snapshot['curves'])
+    lines = []
+    for i, (name, node_type, parent) in enumerate(snapshot['nodes']):
+        parent_flag = f' -p {_quote(paths[parent])}' if parent >= 0 else ''
+        lines.append(f'createNode {strings[node_type]} -n {_quote(strings[name])}{parent_flag};')
+        for attr, attr_type, enum_names, short_name, properties in attributes.get(i, []):
+            lines += _add_attr_lines(strings[attr], strings[attr_type], strings[enum_names], strings[short_name], properties)
+        for attr, value, is_matrix in values.get(i, []):
+            lines.append(_set_attr_line(strings[attr], value, is_matrix))
+        for degree, form, knots, cvs in curves.get(i, []):
+            lines.append(_curve_line(degree, form, knots, cvs))
+        for attr, locked, keyable, channel_box in channels.get(i, []):
+            plug = _quote(f'.{strings[attr]}')
+            if not keyable:
+                lines.append(f'\tsetAttr -k off {plug};')
+            if channel_box:
+                lines.append(f'\tsetAttr -cb on {plug};')
+            if locked:
+                lines.append(f'\tsetAttr -l on {plug};')
+
+    file_nodes = set(paths)
+    for shading_group, material, material_type, color in snapshot.get('shading_groups', []):
+        lines += _shading_group_lines(strings[shading_group], strings[material], strings[material_type], color)
+        file_nodes.update((strings[shading_group], strings[material]))
+
+    node_name = lambda reference: paths[reference] if reference >= 0 else strings[-1 - reference]
+    connections = [
+        (f'{node_name(source_node)}.{strings[source_attr]}', f'{node_name(destination_node)}.{strings[destination_attr]}')
+        for source_node, source_attr, destination_node, destination_attr in snapshot['connections']
+    ]
+    return lines + _connect_attr_lines(connections, file_nodes, external_connections, set(paths))
+
+
+def save_snapshot(snapshot: dict, path: Path, external_connections: bool=False):
+    """
+    Writes a snapshot as a Maya ASCII file, in the units it was captured in.
+    See emit_snapshot for external_connections.
+    """
+    units = snapshot.get('units', {})
+    write_maya_ascii(path, emit_snapshot(snapshot, external_connections), units.get('linear', 'centimeter'), units.get('angle', 'degree'))
+
+
+def convert_snapshot_file(snapshot_path: Path, path: Path):
+    """
+    Reads a snapshot file saved by riggler.core.snapshot.save_snapshot and writes it as a Maya ASCII file
+    """
+    snapshot_path = Path(snapshot_path)
+    data = snapshot_path.read_bytes()
+    if snapshot_path.suffix != '.json':
+        data = gzip.decompress(data)
+    save_snapshot(json.loads(data), path)
+
+
+def _group_by_node(rows: list[list]) -> dict:
+    grouped = {}
+    for index, *row in rows:
+        grouped.setdefault(index, []).append(row)
+    return grouped
+
+
+def _add_attr_lines(attr: str, attr_type: str, enum_names: str, short_name: str, properties: dict) -> list[str]:
+    """
+    Returns the addAttr lines of a dynamic attribute with its range, default and channel states, and the ones of its children
+    """
+    flags = [_ATTRIBUTE_FLAGS[attr_type]]
+    if attr_type == 'enum':
+        flags.append(f'-en {_quote(enum_names)}')
+    if attr_type in _CHILD_TYPES:
+        flags.append('-nc 3')
+    flags += [f'{flag} {_format_number(properties[key])}' for flag, key in _PROPERTY_FLAGS.items() if key in properties]
+    default = properties.get('default')
+    if default is not None and attr_type not in _CHILD_TYPES:
+        flags.append(f'-dv {_format_number(default)}')
+    state_flags = (' -k true' if properties.get('keyable') else '') + (' -h true' if properties.get('hidden') else '')
+    lines = [f'\taddAttr -ci true{state_flags} -sn {_quote(short_name or attr)} -ln {_quote(attr)} {" ".join(flags)};']
+
+    if attr_type in _CHILD_TYPES:
+        child_defaults = default if isinstance(default, list) else [default] * 3
+        for axis, child_default in zip('XYZ', child_defaults):
+            default_flag = f' -dv {_format_number(child_default)}' if child_default else ''
+            lines.append(
+                f'\taddAttr -ci true{state_flags} -sn {_quote((short_name or attr) + axis)} -ln {_quote(attr + axis)} '
+                f'-at "{_CHILD_TYPES[attr_type]}" -p {_quote(attr)}{default_flag};'
+            )
+    # addAttr has no channel box flag, Maya writes it as a setAttr too
+    if properties.get('channelBox'):
+        lines.append(f'\tsetAttr -cb on {_quote("." + attr)};')
+    return lines
+
+
+def _shading_group_lines(shading_group: str, material: str, material_type: str, color: list) -> list[str]:
+    """
+    Returns the lines creating a shading group and its material, registered with the scene's default render partition and shader list
+    """
+    lines = []
+    if material:
+        lines.append(f'createNode {material_type} -n {_quote(material)};')
+        if color is not None:
+            lines.append(f'\tsetAttr ".c" -type "float3" {" ".join(_format_number(channel) for channel in color)};')
+    lines += [
+        f'createNode shadingEngine -n {_quote(shading_group)};',
+        '\tsetAttr ".ihi" 0;',
+        '\tsetAttr ".ro" yes;',
+        f'connectAttr {_quote(shading_group + ".pa")} ":renderPartition.st" -na;',
+    ]
+    if material:
+        lines += [
+            f'connectAttr {_quote(material + ".oc")} {_quote(shading_group + ".ss")};',
+            f'connectAttr {_quote(material + ".msg")} ":defaultShaderList1.s" -na;',
+        ]
+    return lines
+
+
+def _connect_attr_lines(connections: list[tuple], file_nodes: set, external_connections: bool, indexed_nodes: set=None) -> list[str]:
+    """
+    Returns the connectAttr lines of (source, destination) plugs.
+    Connections into multi attributes of nodes outside of indexed_nodes, which default to file_nodes, are appended with -na,
+    since the elements they had in the scene may be in use wherever the file is opened.
+    Connections to nodes outside of file_nodes are written as comments unless external_connections is set.
+    """
+    indexed_nodes = file_nodes if indexed_nodes is None else indexed_nodes
+    lines = []
+    external_lines = []
+    for source, destination in connections:
+        destination_node = destination.partition('.')[0]
+        if destination_node not in indexed_nodes and destination.endswith(']'):
+            line = f'connectAttr {_quote(source)} {_quote(destination.rpartition("[")[0])} -na;'
+        else:
+            line = f'connectAttr {_quote(source)} {_quote(destination)};'
+        if external_connections or (source.partition('.')[0] in file_nodes and destination_node in file_nodes):
+            lines.append(line)
+        else:
+            external_lines.append(f'// {line}')
+    if external_lines:
+        lines.append('// Connections to nodes outside of this file, left out so it opens on its own')
+        lines += external_lines
+    return lines
+
+
+def _curve_line(degree: int, form: int, knots: list, cvs: list) -> str:
+    # MFnNurbsCurve forms start at 1 for open curves, Maya ASCII forms at 0
+    cv_count = len(cvs) // 3
+    header = f'{degree} {cv_count - degree} {form - 1} no 3'
+    knot_values = ' '.join(_format_number(knot) for knot in knots)
+    points = ' '.join(' '.join(_format_number(coordinate) for coordinate in cvs[i:i + 3]) for i in range(0, len(cvs), 3))
+    return f'\tsetAttr ".cc" -type "nurbsCurve" {header} {len(knots)} {knot_values} {cv_count} {points};'
+
+
+########## Files ##########
+
+def write_maya_ascii(path: Path, lines: list[str], linear: str='centimeter', angle: str='degree'):
+    """
+    Writes the lines from emit_graph or emit_snapshot with the header and footer of a Maya ASCII file
+    """
+    path = Path(path)
+    header = [
+        f'//Maya ASCII {MAYA_VERSION} scene',
+        f'//Name: {path.name}',
+        f'requires maya "{MAYA_VERSION}";',
+        f'currentUnit -l {linear} -a {angle} -t film;',
+        'fileInfo "application" "maya";',
+    ]
+    footer = [f'// End of {path.name}', '']
+    path.write_text('\n'.join(header + lines + footer))
+
+
+def _set_attr_line(attr: str, value, is_matrix: bool=False) -> str:
+    plug = _quote(f'.{attr}')
+    if is_matrix:
+        return f'\tsetAttr {plug} -type "matrix" {" ".join(_format_number(number) for number in _flatten(value))};'
+    if isinstance(value, str):
+        return f'\tsetAttr {plug} -type "string" {_quote(value)};'
+    if isinstance(value, (list, tuple)):
+        return f'\tsetAttr {plug} {" ".join(_format_number(number) for number in _flatten(value))};'
+    return f'\tsetAttr {plug} {_format_number(value)};'
+
+
+def _flatten(value) -> list:
+    if isinstance(value, (list, tuple)):
+        return [number for item in value for number in _flatten(item)]
+    return [value]
+
+
+def _format_number(number) -> str:
+    if isinstance(number, bool):
+        return 'yes' if number else 'no'
+    if isinstance(number, float) and number.is_integer():
+        return str(int(number))
+    return repr(number)
+
+
+def _quote(string: str) -> str:
+    escaped = string.replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{escaped}"'
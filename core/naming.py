@@ -0,0 +1,195 @@
+"""
+Collision free node names without querying the scene once per candidate name.
+Inside unique_names() every name in use is kept in one index, seeded from the scene once and kept up to date through
+node added, removed and renamed callbacks, so a free name is found in constant time however many nodes share its base name.
+Outside of the context names are checked against the scene with objExists.
+"""
+from contextlib import contextmanager
+
+import maya.cmds as cmds
+
+try:
+    from maya.api import OpenMaya as om2
+except ImportError:
+    om2 = None
+
+
+_registry = None  # NameRegistry, while inside unique_names()
+
+
+class NameRegistry:
+    """
+    The names in use during a build. A name handed out for a node that doesn't exist yet stays reserved,
+    names are only freed when a node that had them is deleted or renamed.
+    """
+    def __init__(self, names: list[str]=()):
+        self.names = set(names)
+        self.counters = {}  # base name: the lowest suffix that may still be free
+
+    def __contains__(self, name: str):
+        return name in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def reserve(self, name: str) -> str:
+        self.names.add(name)
+        return name
+
+    def discard(self, name: str):
+        """
+        Frees a name, so it and its numbered suffix can be handed out again
+        """
+        self.names.discard(name)
+        base = name.rstrip('0123456789')
+        suffix = name[len(base):]
+        if suffix and self.counters.get(base, 1) > int(suffix):
+            self.counters[base] = max(int(suffix), 1)
+
+    def get_unique_name(self, base: str, exact: bool=True, taken=None) -> str:
+        """
+        Hands out the base name, or the base name with the lowest free numbered suffix, and reserves it
+
+        Args:
+            base: The wanted name
+            exact: Whether the base name itself may be used, otherwise numbering starts at 1 like Maya's default names
+            taken: Tells whether a name is in use somewhere the registry doesn't know about
+        """
+        is_taken = lambda name: name in self.names or (taken is not None and taken(name))
+        if exact and not is_taken(base):
+            return self.reserve(base)
+        i = self.counters.get(base, 1)
+        while is_taken(base + str(i)):
+            i += 1
+        self.counters[base] = i + 1
+        return self.reserve(base + str(i))
+
+
+@contextmanager
+def unique_names():
+    """
+    Names every node created through this module, or through riggler.core.nodes, against one index of the scene's names.
+    Nodes created any other way while inside the context are added to the index as they're created or renamed.
+    Nested contexts join the outer one, so wrapping a whole rig build seeds the index once.
+    """
+    global _registry
+    if _registry is not None:
+        yield _registry
+        return
+
+    _registry = NameRegistry()
+    for path in cmds.ls():
+        _registry.reserve(path)
+        _registry.reserve(path.rpartition('|')[2])
+    callbacks = _add_callbacks(_registry) if om2 is not None else []
+    try:
+        yield _registry
+    finally:
+        if callbacks:
+            om2.MMessage.removeCallbacks(callbacks)
+        _registry = None
+
+
+def get_unique_name(name: str=None, node_type: str=None, taken=None) -> str:
+    """
+    Returns a name no node has, reserving it while inside unique_names()
+
+    Args:
+        name: The wanted name. When it's taken, the lowest free numbered suffix is added.
+        node_type: Names the node like Maya does when no name is given, e.g. multMatrix1
+        taken: Tells whether a name belongs to a node that isn't in the scene yet
+
+    Returns:
+        The name to create the node with
+    """
+    if not name and not node_type:
+        raise RuntimeError('A name or a node type is needed to make a unique name')
+    base = name or node_type
+    if _registry is not None:
+        return _registry.get_unique_name(base, exact=bool(name), taken=taken)
+
+    is_taken = lambda candidate: cmds.objExists(candidate) or (taken is not None and taken(candidate))
+    if name and not is_taken(name):
+        return name
+    i = 1
+    while is_taken(base + str(i)):
+        i += 1
+    return base + str(i)
+
+
+def get_unique_names(names: list[str], node_type: str, taken=None) -> list[str]:
+    """
+    Returns a name no node has for each wanted name, all from one pass over the unique_names() index, which is opened if needed
+
+    Args:
+        names: The wanted names. None names the node like Maya does, e.g. multMatrix1
+        node_type: The type of the nodes
+        taken: Tells whether a name belongs to a node that isn't in the scene yet
+    """
+    with unique_names() as registry:
+        return [registry.get_unique_name(name or node_type, exact=bool(name), taken=taken) for name in names]
+
+
+def create_node(node_type: str, name: str=None, parent: str=None, taken=None) -> str:
+    """
+    Creates a node directly under a unique name, instead of under Maya's default name followed by a rename
+
+    Args:
+        node_type: The type of node to create
+        name: The wanted name, see get_unique_name
+        parent: The parent of a new DAG node
+        taken: Tells whether a name belongs to a node that isn't in the scene yet
+
+    Returns:
+        The created node
+    """
+    unique_name = get_unique_name(name, node_type, taken)
+    kwargs = {'parent': parent} if parent else {}
+    node = cmds.createNode(node_type, name=unique_name, skipSelect=True, **kwargs)
+    if _registry is not None:
+        _registry.reserve(node)
+    return node
+
+
+def rename(node: str, name: str) -> str:
+    """
+    Renames a node to a unique name
+    """
+    if node.rpartition('|')[2] == name:
+        return node
+    return cmds.rename(node, get_unique_name(name))
+
+
+def _add_callbacks(registry: NameRegistry) -> list:
+    def node_added(obj, *args):
+        registry.reserve(om2.MFnDependencyNode(obj).name())
+
+    def node_removed(obj, *args):
+        # The node still exists, so a DAG node's short name is only free when no other node has it
+        if obj.hasFn(om2.MFn.kDagNode):
+            path = om2.MFnDagNode(obj).partialPathName()
+            registry.discard(path)
+            if _count_nodes(path.rpartition('|')[2]) <= 1:
+                registry.discard(path.rpartition('|')[2])
+        else:
+            registry.discard(om2.MFnDependencyNode(obj).name())
+
+    def name_changed(obj, previous_name, *args):
+        registry.reserve(om2.MFnDependencyNode(obj).name())
+        if previous_name and not _count_nodes(previous_name):
+            registry.discard(previous_name)
+
+    return [
+        om2.MDGMessage.addNodeAddedCallback(node_added, 'dependNode'),
+        om2.MDGMessage.addNodeRemovedCallback(node_removed, 'dependNode'),
+        om2.MNodeMessage.addNameChangedCallback(om2.MObject.kNullObj, name_changed),
+    ]
+
+
+def _count_nodes(name: str) -> int:
+    selection = om2.MSelectionList()
+    try:
+        selection.add(name)
+    except RuntimeError:
+        return 0
+    return selection.length()
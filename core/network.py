@@ -0,0 +1,283 @@
+"""
+A compact, index based table of a node network for analysing large rigs without going back to Maya one node at a time.
+Nodes, plugs, connections and constant values live in parallel typed arrays that reference each other by index,
+and every string is stored once. Upstream and downstream lookups go through adjacency arrays built on first use.
+A table can be read from a BuildGraph or from the scene and turned back into a BuildGraph to apply it.
+"""
+from array import array
+
+import maya.cmds as cmds
+
+from riggler.core import graph, optimize, snapshot
+
+
+# Value kinds
+SCALAR = 0
+COMPOUND = 1
+MATRIX = 2
+
+
+class NetworkTable:
+    def __init__(self):
+        self.strings = []
+        self._string_ids = {}  # string: index in strings
+
+        # Nodes, by node id
+        self.node_names = array('i')  # string ids
+        self.node_types = array('i')  # string ids, the empty string for external nodes of unknown type
+        self.node_external = array('b')  # 1 for nodes outside of the network that its connections lead to or from
+        self._node_ids = {}  # name: node id
+
+        # Plugs, by plug id
+        self.plug_nodes = array('i')  # node ids
+        self.plug_attrs = array('i')  # string ids of the attribute part of the plug, e.g. matrixIn[0]
+        self._plug_ids = {}  # (node id, attr string id): plug id
+
+        # Connections, by edge id
+        self.edge_sources = array('i')  # plug ids
+        self.edge_destinations = array('i')  # plug ids
+
+        # Constant values, by value id. Value i is value_data[value_offsets[i]:value_offsets[i + 1]].
+        self.value_plugs = array('i')  # plug ids
+        self.value_kinds = array('b')  # SCALAR, COMPOUND or MATRIX
+        self.value_offsets = array('i', [0])
+        self.value_data = array('d')
+
+        self._adjacency = None  # (outgoing, incoming), each (offsets, edge ids) by node id
+
+    def __len__(self):
+        return len(self.node_names)
+
+    def __contains__(self, node: str):
+        return node in self._node_ids
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_sources)
+
+    ########## Building ##########
+
+    def add_string(self, string: str) -> int:
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            string_id = self._string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def add_node(self, name: str, node_type: str='', external: bool=False) -> int:
+        """
+        Adds a node, or returns the id of the node with that name. An external node added again as an internal one becomes internal.
+        """
+        node_id = self._node_ids.get(name)
+        if node_id is not None:
+            if not external:
+                self.node_external[node_id] = 0
+                if node_type:
+                    self.node_types[node_id] = self.add_string(node_type)
+            return node_id
+        node_id = self._node_ids[name] = len(self.node_names)
+        self.node_names.append(self.add_string(name))
+        self.node_types.append(self.add_string(node_type))
+        self.node_external.append(int(external))
+        return node_id
+
+    def add_plug(self, plug: str) -> int:
+        """
+        Adds a plug such as node.matrixIn[0], adding its node as an external one if it isn't in the table yet
+        """
+        node, _, attr = plug.partition('.')
+        key = (self.add_node(node, external=True), self.add_string(attr))
+        plug_id = self._plug_ids.get(key)
+        if plug_id is None:
+            plug_id = self._plug_ids[key] = len(self.plug_nodes)
+            self.plug_nodes.append(key[0])
+            self.plug_attrs.append(key[1])
+        return plug_id
+
+    def add_connection(self, source: str, destination: str) -> int:
+        self.edge_sources.append(self.add_plug(source))
+        self.edge_destinations.append(self.add_plug(destination))
+        self._adjacency = None
+        return len(self.edge_sources) - 1
+
+    def add_value(self, plug: str, value, is_matrix: bool=False) -> int:
+        """
+        Adds a constant numeric value. Compound values are flattened and matrices stored as their 16 values.
+        """
+        data = _flatten(value)
+        if data is None:
+            raise RuntimeError(f'{plug} has a {type(value).__name__} value, only numbers, compounds and matrices can be stored')
+        self.value_plugs.append(self.add_plug(plug))
+        self.value_kinds.append(MATRIX if is_matrix else COMPOUND if isinstance(value, (list, tuple)) else SCALAR)
+        self.value_data.extend(data)
+        self.value_offsets.append(len(self.value_data))
+        return len(self.value_plugs) - 1
+
+    ########## Lookups ##########
+
+    def find_node(self, name: str) -> int:
+        """
+        Returns the id of the named node, or -1
+        """
+        return self._node_ids.get(name, -1)
+
+    def find_plug(self, plug: str) -> int:
+        """
+        Returns the id of the plug, or -1
+        """
+        node, _, attr = plug.partition('.')
+        node_id = self._node_ids.get(node)
+        attr_id = self._string_ids.get(attr)
+        if node_id is None or attr_id is None:
+            return -1
+        return self._plug_ids.get((node_id, attr_id), -1)
+
+    def get_node_name(self, node_id: int) -> str:
+        return self.strings[self.node_names[node_id]]
+
+    def get_node_type(self, node_id: int) -> str:
+        return self.strings[self.node_types[node_id]]
+
+    def get_plug_name(self, plug_id: int) -> str:
+        return f'{self.get_node_name(self.plug_nodes[plug_id])}.{self.strings[self.plug_attrs[plug_id]]}'
+
+    def get_value(self, value_id: int):
+        """
+        Returns a stored value the way it was added: a float, a tuple for compounds or a 16 value tuple for matrices
+        """
+        data = self.value_data[self.value_offsets[value_id]:self.value_offsets[value_id + 1]]
+        return data[0] if self.value_kinds[value_id] == SCALAR else tuple(data)
+
+    def get_outgoing_edges(self, node_id: int) -> array:
+        offsets, edges = self._get_adjacency()[0]
+        return edges[offsets[node_id]:offsets[node_id + 1]]
+
+    def get_incoming_edges(self, node_id: int) -> array:
+        offsets, edges = self._get_adjacency()[1]
+        return edges[offsets[node_id]:offsets[node_id + 1]]
+
+    def get_downstream(self, node_id: int) -> list[int]:
+        """
+        Returns the ids of the nodes reading from the node, each once
+        """
+        return list(dict.fromkeys(self.plug_nodes[self.edge_destinations[edge]] for edge in self.get_outgoing_edges(node_id)))
+
+    def get_upstream(self, node_id: int) -> list[int]:
+        """
+        Returns the ids of the nodes the node reads from, each once
+        """
+        return list(dict.fromkeys(self.plug_nodes[self.edge_sources[edge]] for edge in self.get_incoming_edges(node_id)))
+
+    def get_internal_nodes(self) -> list[int]:
+        return [node_id for node_id, external in enumerate(self.node_external) if not external]
+
+    def _get_adjacency(self):
+        if self._adjacency is None:
+            node_count = len(self.node_names)
+            self._adjacency = (
+                _group_edges(node_count, [self.plug_nodes[plug] for plug in self.edge_sources]),
+                _group_edges(node_count, [self.plug_nodes[plug] for plug in self.edge_destinations]),
+            )
+        return self._adjacency
+
+    ########## Conversion ##########
+
+    @classmethod
+    def from_build_graph(cls, build_graph: graph.BuildGraph) -> 'NetworkTable':
+        """
+        Reads the nodes, connections and values recorded in a BuildGraph, e.g. Component.graph.
+        Nodes the connections lead to that the graph didn't create become external nodes.
+        """
+        table = cls()
+        for name, node_type in build_graph.nodes.items():
+            table.add_node(name, node_type)
+        for destination, (source, _) in build_graph.connections.items():
+            table.add_connection(source, destination)
+        for plug, (value, is_matrix) in build_graph.values.items():
+            table.add_value(plug, value, is_matrix)
+        return table
+
+    @classmethod
+    def from_scene(cls, members: list[str]) -> 'NetworkTable':
+        """
+        Reads the given nodes from the scene with their connections and non default values.
+        unitConversion nodes between them are read too, the nodes they connect to outside of the members become external nodes.
+        """
+        existing = [node for node in dict.fromkeys(members) if cmds.objExists(node)]
+        existing += [node for node in optimize.find_unit_conversions(existing) if node not in existing]
+        table = cls()
+        for node in existing:
+            table.add_node(node, cmds.nodeType(node))
+        for node in existing:
+            for attr, value, is_matrix in snapshot.get_non_default_values(node):
+                table.add_value(f'{node}.{attr}', value, is_matrix)
+            incoming = cmds.listConnections(node, source=True, destination=False, connections=True, plugs=True, skipConversionNodes=False) or []
+            for destination, source in zip(incoming[::2], incoming[1::2]):
+                table.add_connection(source, destination)
+            # Connections into external nodes are only seen from this side
+            outgoing = cmds.listConnections(node, source=False, destination=True, connections=True, plugs=True, skipConversionNodes=False) or []
+            for source, destination in zip(outgoing[::2], outgoing[1::2]):
+                if destination.partition('.')[0] not in table or table.node_external[table.find_node(destination.partition('.')[0])]:
+                    table.add_connection(source, destination)
+        for node_id in range(len(table)):
+            if table.node_external[node_id]:
+                table.node_types[node_id] = table.add_string(cmds.nodeType(table.get_node_name(node_id)))
+        return table
+
+    def to_build_graph(self) -> graph.BuildGraph:
+        """
+        Returns a BuildGraph recreating the internal nodes with their connections and values, which its apply method builds in one pass.
+        External nodes have to exist in the scene. Connections into their multi attributes are appended after the elements in use,
+        and connections into their other plugs are skipped when the plug is already connected.
+        """
+        build_graph = graph.BuildGraph()
+        for node_id in self.get_internal_nodes():
+            build_graph.add_node(self.get_node_type(node_id), self.get_node_name(node_id))
+        next_indices = {}  # multi attribute of an external node: its next free index
+        for source, destination in zip(self.edge_sources, self.edge_destinations):
+            source, destination_id, destination = self.get_plug_name(source), destination, self.get_plug_name(destination)
+            if self.node_external[self.plug_nodes[destination_id]]:
+                if destination.endswith(']'):
+                    array_plug = destination.rpartition('[')[0]
+                    if array_plug not in next_indices:
+                        next_indices[array_plug] = max(cmds.getAttr(array_plug, multiIndices=True) or [-1]) + 1
+                    destination = f'{array_plug}[{next_indices[array_plug]}]'
+                    next_indices[array_plug] += 1
+                elif cmds.listConnections(destination, source=True, destination=False):
+                    cmds.warning(f'Skipping the connection from {source} to {destination}, the destination is already connected')
+                    continue
+            build_graph.add_connection(source, destination)
+        for value_id, plug in enumerate(self.value_plugs):
+            build_graph.add_value(self.get_plug_name(plug), self.get_value(value_id), self.value_kinds[value_id] == MATRIX)
+        return build_graph
+
+
+def _flatten(value) -> list:
+    if isinstance(value, (bool, int, float)):
+        return [float(value)]
+    if isinstance(value, (list, tuple)):
+        flat = []
+        for item in value:
+            item_data = _flatten(item)
+            if item_data is None:
+                return None
+            flat.extend(item_data)
+        return flat
+    return None
+
+
+def _group_edges(node_count: int, edge_nodes: list[int]) -> tuple:
+    """
+    Sorts edge ids by node with a counting sort, so the edges of node n are edges[offsets[n]:offsets[n + 1]]
+    """
+    offsets = array('i', [0] * (node_count + 1))
+    for node_id in edge_nodes:
+        offsets[node_id + 1] += 1
+    for i in range(node_count):
+        offsets[i + 1] += offsets[i]
+    positions = array('i', offsets)
+    edges = array('i', [0] * len(edge_nodes))
+    for edge, node_id in enumerate(edge_nodes):
+        edges[positions[node_id]] = edge
+        positions[node_id] += 1
+    return offsets, edges
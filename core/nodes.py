@@ -1,9 +1,783 @@
 """
 A collection of utility functions for generating most of Maya's math nodes, especially the ones created in 2024 and 2025 due to their standardized plug names.
 """
+import math
+from contextlib import contextmanager
+from functools import wraps
 from typing import Union
 import maya.cmds as cmds
 
+try:
+    from maya.api import OpenMaya as om2
+except ImportError:
+    om2 = None
+
+from riggler.core import expression, graph, handles, naming, schema
+
+
+_deferred = None  # graph.BuildGraph collecting work while inside deferred_build()
+_fold_constants = False  # whether nodes created right now are folded, see constant_folding(fold)
+_folding = False  # whether a constant_folding() context is open
+_folded_constants = {}  # placeholder: (value, is_matrix), while inside constant_folding()
+_forwarded_plugs = {}  # placeholder: the plug the folded node would have passed through, while inside constant_folding()
+
+_shared_nodes = None  # node signature: node, while inside node_sharing()
+_share = False  # whether nodes created right now are shared, see node_sharing(share)
+_shared_signatures = {}  # node: its signature in _shared_nodes
+_shared_counts = {}  # node: how many identical requests it was returned for
+_node_types = {}  # node: node type, for every node created through this module since the build started, see clear_caches
+_node_inputs = {}  # node: {attr: source plug or constant value}, for nodes created while sharing
+_node_outputs = {}  # node: [(attr, destination plug)] made before the node's inputs were complete
+_probe = None  # [(operation, args)] recorded instead of run while the signature of a shared node is worked out, see _create_shared_node
+_PROBE_NODE = '<probe>'  # stands in for the node a create function would create while probing
+_constant_pool = {}
+
+_elision_nodes = None  # node: keys of the plugs written so far, for nodes created inside default_elision()
+_skipped_writes = 0  # writes skipped by default_elision() since the session started
+
+_preserve_units = False
+
+_recorders = []  # lists collecting the nodes created inside each active record_nodes() context
+_graph_recorders = []  # graph.BuildGraph objects collecting the work done inside each active record_graph() context
+
+IDENTITY_MATRIX = (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+
+
+########## Deferred building ##########
+
+@contextmanager
+def deferred_build():
+    """
+    Records every node, connection and value from the create_*_node functions instead of running them one command at a time.
+    The recorded work is applied in one undoable step when the outermost context exits, see graph.BuildGraph.apply.
+    Nested contexts join the outer one.
+    """
+    global _deferred
+    if _deferred is not None:
+        yield _deferred
+        return
+
+    _deferred = graph.BuildGraph()
+    try:
+        yield _deferred
+        flush()
+    finally:
+        _deferred = None
+
+
+def flush():
+    """
+    Applies any deferred work to the scene right away. Call this before querying deferred nodes with cmds.
+    """
+    if _deferred is not None and (_deferred.nodes or _deferred.connections or _deferred.values):
+        _deferred.apply()
+
+
+def connect_attr(source: str, destination: str, force: bool=False):
+    """
+    Connects two plugs, deferring the connection while inside deferred_build().
+    A constant source, e.g. the plug of a handles.Folded node, is set on the destination instead.
+    """
+    source, destination = handles.to_string(source), handles.to_string(destination)
+    if _is_constant(source):
+        _set_attr(destination, source, _is_matrix_value(source))
+    else:
+        _connect_attr(source, destination, force)
+
+
+def set_attr(destination: str, value, is_matrix: bool=False):
+    """
+    Sets a plug, deferring the value while inside deferred_build()
+    """
+    _set_attr(handles.to_string(destination), value, is_matrix)
+
+
+def get_source_plug(destination: str) -> str:
+    """
+    Returns the plug connected to the given destination plug, or None. Also sees deferred connections.
+    """
+    destination = handles.to_string(destination)
+    if _deferred is not None:
+        source = _deferred.get_source(destination)
+        if source or destination.partition('.')[0] in _deferred:
+            return source
+    sources = cmds.listConnections(destination, source=True, destination=False, plugs=True)
+    return sources[0] if sources else None
+
+
+def clear_caches():
+    """
+    Forgets the types of the nodes created so far. Builds call this when they start, since a new scene or a deleted node
+    can hand a cached name to a node of another type. Call it after opening a scene when using this module outside of a build.
+    """
+    _node_types.clear()
+
+
+########## Recording ##########
+
+@contextmanager
+def record_nodes():
+    """
+    Collects the name of every node the functions in this module create while inside the context, in creation order.
+    Nested contexts each collect their own list.
+    """
+    created = []
+    _recorders.append(created)
+    try:
+        yield created
+    finally:
+        _recorders.remove(created)
+
+
+@contextmanager
+def record_graph(build_graph: graph.BuildGraph=None):
+    """
+    Copies every node, connection and value the functions in this module create while inside the context into a BuildGraph,
+    whether or not the work is deferred. Folded and shared nodes are recorded the way they end up in the scene.
+    The copy is never applied, it's meant for inspecting the work offline, e.g. with riggler.core.evaluate.
+
+    Args:
+        build_graph: A graph to add to, so several contexts can record into one. A new graph is created by default.
+    """
+    recorded = build_graph if build_graph is not None else graph.BuildGraph()
+    _graph_recorders.append(recorded)
+    try:
+        yield recorded
+    finally:
+        _graph_recorders.remove(recorded)
+
+
+########## Constant folding ##########
+
+@contextmanager
+def constant_folding(fold: bool=True):
+    """
+    Computes math nodes whose inputs are all constants in Python and writes the result straight to their targets.
+    Constant inputs of associative nodes are merged into a single operand, and identity operands are dropped.
+    A folded node is never created. Its create function returns a placeholder such as '<folded1_multiply>', which the functions
+    in this module resolve to the folded value, or to the plug the node would have passed through, when it's used as an input.
+    Placeholders aren't valid node names, so cmds raises when it's handed one. Use get_folded_input to pass them on to cmds.
+    Placeholders are forgotten when the outermost context exits, so open it around a whole build for placeholders kept between steps.
+    Nested contexts join the outer one.
+
+    Args:
+        fold: Whether nodes created inside this context are folded. Placeholders from the outer context still resolve either way.
+    """
+    global _fold_constants, _folding
+    previous = _fold_constants
+    _fold_constants = fold
+    if _folding:
+        try:
+            yield
+        finally:
+            _fold_constants = previous
+        return
+
+    _folding = True
+    try:
+        yield
+    finally:
+        _folding = False
+        _fold_constants = previous
+        _folded_constants.clear()
+        _forwarded_plugs.clear()
+
+
+def get_folded_input(plug: str):
+    """
+    Returns the constant value or the plug that a plug on a folded node's placeholder stands for. Any other plug is returned unchanged.
+    """
+    return _resolve_folded_input(handles.to_string(plug))
+
+
+def _multiply_matrices(matrices: list) -> tuple:
+    result = IDENTITY_MATRIX
+    for matrix in matrices:
+        matrix = _flatten_matrix(matrix)
+        result = tuple(
+            math.fsum(result[row * 4 + i] * matrix[i * 4 + column] for i in range(4))
+            for row in range(4) for column in range(4)
+        )
+    return result
+
+
+def _add_matrices(matrices: list) -> tuple:
+    return tuple(math.fsum(values) for values in zip(*[_flatten_matrix(matrix) for matrix in matrices]))
+
+
+def _invert_matrix(matrix: list) -> tuple:
+    """
+    Gauss-Jordan elimination with partial pivoting. Returns None for singular matrices.
+    """
+    matrix = _flatten_matrix(matrix)
+    rows = [list(matrix[i * 4:i * 4 + 4]) + [1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+    for column in range(4):
+        pivot = max(range(column, 4), key=lambda row: abs(rows[row][column]))
+        if abs(rows[pivot][column]) < 1e-12:
+            return None
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        pivot_value = rows[column][column]
+        rows[column] = [value / pivot_value for value in rows[column]]
+        for row in range(4):
+            if row != column and rows[row][column]:
+                factor = rows[row][column]
+                rows[row] = [value - factor * pivot_row_value for value, pivot_row_value in zip(rows[row], rows[column])]
+    return tuple(value for row in rows for value in row[4:])
+
+
+def _flatten_matrix(matrix: list) -> tuple:
+    if isinstance(matrix[0], (list, tuple)):
+        return tuple(float(value) for row in matrix for value in row)
+    return tuple(float(value) for value in matrix)
+
+
+# node type: (operation over the input values, number of inputs or None for any)
+_SCALAR_FOLDS = {
+    'sum': (math.fsum, None),
+    'multiply': (math.prod, None),
+    'max': (max, None),
+    'min': (min, None),
+    'average': (lambda values: math.fsum(values) / len(values), None),
+    'subtract': (lambda values: values[0] - values[1], 2),
+    'divide': (lambda values: values[0] / values[1], 2),
+    'power': (lambda values: values[0] ** values[1], 2),
+    'negate': (lambda values: -values[0], 1),
+    'absolute': (lambda values: abs(values[0]), 1),
+    'ceil': (lambda values: math.ceil(values[0]), 1),
+    'floor': (lambda values: math.floor(values[0]), 1),
+    'truncate': (lambda values: math.trunc(values[0]), 1),
+}
+_MATRIX_FOLDS = {
+    'multMatrix': (_multiply_matrices, None),
+    'addMatrix': (_add_matrices, None),
+    'inverseMatrix': (lambda matrices: _invert_matrix(matrices[0]), 1),
+}
+# Associative node types whose constant inputs can be merged, and the operand that can be dropped for each
+_MERGEABLE_IDENTITIES = {
+    'sum': 0,
+    'multiply': 1,
+    'max': None,
+    'min': None,
+    'addMatrix': (0.0,) * 16,
+    'multMatrix': IDENTITY_MATRIX,
+}
+
+
+def _is_constant(value) -> bool:
+    return not isinstance(value, str)
+
+
+def _is_matrix_value(value) -> bool:
+    return isinstance(value, (list, tuple)) and len(_flatten_matrix(value)) == 16
+
+
+def _resolve_folded_input(input):
+    """
+    Swaps plugs on placeholder nodes for the value or plug that the folded node stands in for
+    """
+    if not isinstance(input, str):
+        return input
+    node = input.partition('.')[0]
+    if node in _forwarded_plugs:
+        return _forwarded_plugs[node]
+    if node in _folded_constants:
+        return _folded_constants[node][0]
+    return input
+
+
+def _merge_constant_inputs(node_type: str, inputs: list) -> list:
+    operation = (_MATRIX_FOLDS.get(node_type) or _SCALAR_FOLDS[node_type])[0]
+    if node_type == 'multMatrix':
+        # Matrix multiplication isn't commutative, so only neighbouring constants can be merged
+        merged = []
+        for input in inputs:
+            if _is_constant(input) and merged and _is_constant(merged[-1]):
+                merged[-1] = operation([merged[-1], input])
+            else:
+                merged.append(input)
+    else:
+        constants = [input for input in inputs if _is_constant(input)]
+        merged = [input for input in inputs if not _is_constant(input)]
+        if constants:
+            constant = operation(constants)
+            if node_type == 'multiply' and constant == 0:
+                return [0]
+            merged.append(constant)
+
+    identity = _MERGEABLE_IDENTITIES[node_type]
+    if identity is not None and not all(_is_constant(input) for input in merged):
+        merged = [input for input in merged if not _is_constant(input) or not _is_identity(input, identity)]
+    return merged
+
+
+def _is_identity(value, identity) -> bool:
+    if isinstance(identity, tuple):
+        return all(math.isclose(a, b, abs_tol=1e-12) for a, b in zip(_flatten_matrix(value), identity))
+    return value == identity
+
+
+def _fold_node(node_type: str, inputs: list):
+    """
+    Folds constant inputs of a math node.
+
+    Returns:
+        A placeholder if the node doesn't need to be created, otherwise None, and the inputs to create the node with
+    """
+    operation, arity = _MATRIX_FOLDS.get(node_type) or _SCALAR_FOLDS.get(node_type) or (None, None)
+    if not _fold_constants or operation is None or not inputs or any(input is None for input in inputs):
+        return None, inputs
+    if arity is not None and len(inputs) != arity:
+        return None, inputs
+
+    inputs = [_resolve_folded_input(input) for input in inputs]
+    if node_type in _MERGEABLE_IDENTITIES:
+        inputs = _merge_constant_inputs(node_type, inputs)
+        if len(inputs) == 1 and not _is_constant(inputs[0]):
+            node = _get_placeholder(node_type)
+            _forwarded_plugs[node] = inputs[0]
+            return node, inputs
+    if not all(_is_constant(input) for input in inputs):
+        return None, inputs
+
+    try:
+        value = operation(inputs)
+    except (ArithmeticError, ValueError):
+        return None, inputs
+    if value is None or isinstance(value, complex):
+        return None, inputs
+    node = _get_placeholder(node_type)
+    _folded_constants[node] = (value, node_type in _MATRIX_FOLDS)
+    return node, inputs
+
+
+def _get_placeholder(node_type: str) -> str:
+    # The angle brackets keep placeholders from ever matching a real node
+    return f'<folded{len(_folded_constants) + len(_forwarded_plugs) + 1}_{node_type}>'
+
+
+########## Node sharing ##########
+
+@contextmanager
+def node_sharing(share: bool=True):
+    """
+    Returns the existing node whenever a create_*_node function is asked for a node identical to one already made in this context.
+    Nodes are identical when they have the same type, input connections and constant values, so nodes that only hold constants,
+    such as identity matrices and world up vectors, are pooled into one node too. Inputs of commutative nodes are compared in any order.
+
+    A node's inputs count as complete once its create function returns. Its work is worked out before anything is created,
+    so a request for an existing node only makes the connections to its targets. To wire more inputs afterwards, pass inputs_complete=False
+    to the create function and call complete_inputs once the node is wired up. A node handed out more than once can't have its inputs changed.
+
+    Nodes are remembered until the outermost context exits, so wrapping a whole rig build shares nodes across every component.
+    Nested contexts join the outer one.
+
+    Args:
+        share: Whether nodes created inside this context are shared. An outer context opened with share=False only keeps
+            the nodes shared inside the contexts nested in it.
+    """
+    global _shared_nodes, _share
+    previous = _share
+    _share = share
+    if _shared_nodes is not None:
+        try:
+            yield
+        finally:
+            _share = previous
+        return
+
+    _shared_nodes = {}
+    # Nodes deleted by the post-build passes of one component mustn't be handed out to the next one
+    callbacks = [om2.MDGMessage.addNodeRemovedCallback(_forget_removed_node, 'dependNode')] if om2 is not None else []
+    try:
+        yield
+    finally:
+        if callbacks:
+            om2.MMessage.removeCallbacks(callbacks)
+        _shared_nodes = None
+        _share = previous
+        for record in (_shared_signatures, _shared_counts, _node_inputs, _node_outputs):
+            record.clear()
+
+
+def get_shared_nodes() -> list[str]:
+    """
+    Returns the nodes the open node_sharing() context can still hand out, which later requests may connect to
+    """
+    return list(_shared_signatures)
+
+
+def complete_inputs(node: str) -> str:
+    """
+    Shares a node created with inputs_complete=False now that its inputs are wired up
+
+    Returns:
+        The node, or the identical node it was replaced with. Connections made from the node so far are moved over to the identical node.
+    """
+    returns_handle = handles.contains_handles(node)
+    node = handles.to_string(node)
+    if node in _node_inputs and node not in _shared_signatures:
+        node = _share_node(node)
+    return _get_handle(node) if returns_handle else node
+
+
+def pooled_constant(value):
+    """
+    Returns a shared instance of a constant value, so node signatures holding repeated constants such as identity matrices
+    and world up vectors store and compare them once
+    """
+    if isinstance(value, (list, tuple)):
+        value = tuple(pooled_constant(item) for item in value)
+    return _constant_pool.setdefault((type(value), value), value)
+
+
+IDENTITY_MATRIX = pooled_constant(IDENTITY_MATRIX)
+_COMMUTATIVE_NODE_TYPES = {'sum', 'multiply', 'max', 'min', 'average', 'addMatrix', 'and', 'or'}
+_ARRAY_INPUT_PREFIXES = ('input[', 'matrixIn[')
+
+
+def _accepts_handles(create_function):
+    @wraps(create_function)
+    def create_node_from_handles(*args, **kwargs):
+        # Plug handles are passed on as handles.PlugName, which the connect and set paths find through its MPlug,
+        # node handles are read as names, and callers that pass handles get one back
+        if not handles.contains_handles(args) and not handles.contains_handles(tuple(kwargs.values())):
+            return create_function(*args, **kwargs)
+        args = handles.to_string(args)
+        kwargs = {key: handles.to_string(value) for key, value in kwargs.items()}
+        result = create_function(*args, **kwargs)
+        return [_get_handle(node) for node in result] if isinstance(result, list) else _get_handle(result)
+    return create_node_from_handles
+
+
+def _shareable(create_function):
+    @wraps(create_function)
+    def create_shared_node(*args, inputs_complete: bool=True, **kwargs):
+        if inputs_complete and _share and _shared_nodes is not None and _probe is None:
+            return _create_shared_node(create_function, args, kwargs)
+        return create_function(*args, **kwargs)
+    return create_shared_node
+
+
+def _create_shared_node(create_function, args: tuple, kwargs: dict) -> str:
+    """
+    Runs a create function without touching the scene to work out the signature of the node it would create.
+    An identical node that already exists is returned and connected to the targets instead, otherwise the recorded work is run.
+    """
+    global _probe
+    _probe = operations = []
+    try:
+        result = create_function(*args, **kwargs)
+    finally:
+        _probe = None
+        _node_types.pop(_PROBE_NODE, None)
+
+    existing = None
+    created = [operation_args for operation, operation_args in operations if operation == 'create']
+    if result == _PROBE_NODE and len(created) == 1:
+        inputs = {}
+        for operation, operation_args in operations:
+            destination, source = operation_args[1::-1] if operation == 'connect' else operation_args[:2]
+            if operation != 'create' and destination.startswith(_PROBE_NODE + '.'):
+                inputs[destination.partition('.')[2]] = source if isinstance(source, str) else pooled_constant(source)
+        existing = _shared_nodes.get(_make_signature(created[0][0], inputs))
+
+    node = existing
+    for operation, operation_args in operations:
+        if operation == 'create':
+            if existing is None:
+                node = _create_node(*operation_args)
+            continue
+        swap = lambda plug: node + plug[len(_PROBE_NODE):] if isinstance(plug, str) and plug.startswith(_PROBE_NODE + '.') else plug
+        if operation == 'connect':
+            source, destination, force = operation_args
+            if existing is None or not destination.startswith(_PROBE_NODE + '.'):
+                _connect_attr(swap(source), swap(destination), force)
+        else:
+            destination, value, is_matrix = operation_args
+            if existing is None or not destination.startswith(_PROBE_NODE + '.'):
+                _set_attr(swap(destination), value, is_matrix)
+
+    if existing is not None:
+        _shared_counts[existing] = _shared_counts.get(existing, 1) + 1
+        return existing
+    if result != _PROBE_NODE:
+        return result
+    if node in _node_inputs and node not in _shared_signatures:
+        node = _share_node(node)
+    return node
+
+
+def _get_handle(node: str):
+    """
+    Returns a handle on a node created through this module. A node that exists is bound to its MObject right away,
+    a deferred node is bound to the MObject the modifier creates for it, and a folded node becomes a handles.Folded.
+    """
+    if node in _forwarded_plugs:
+        forwarded_node, _, attr = _forwarded_plugs[node].partition('.')
+        return handles.Folded(handles.Plug(_get_handle(forwarded_node), attr))
+    if node in _folded_constants:
+        return handles.Folded(_folded_constants[node][0])
+    if _deferred is not None and node in _deferred:
+        handle = handles.Node.pending(node)
+        _deferred.bind_handle(node, handle)
+        return handle
+    return handles.Node(node)
+
+
+def _get_signature(node: str) -> tuple:
+    return _make_signature(_get_node_type(node), _node_inputs[node])
+
+
+def _make_signature(node_type: str, inputs: dict) -> tuple:
+    if node_type in _COMMUTATIVE_NODE_TYPES:
+        array_inputs = tuple(sorted(repr(source) for attr, source in inputs.items() if attr.startswith(_ARRAY_INPUT_PREFIXES)))
+        other_inputs = frozenset(item for item in inputs.items() if not item[0].startswith(_ARRAY_INPUT_PREFIXES))
+        return (node_type, array_inputs, other_inputs)
+    return (node_type, frozenset(inputs.items()))
+
+
+def _share_node(node: str) -> str:
+    outputs = _node_outputs.pop(node, [])
+    signature = _get_signature(node)
+    existing = _shared_nodes.get(signature)
+    if existing is None:
+        _shared_nodes[signature] = node
+        _shared_signatures[node] = signature
+        return node
+
+    for attr, destination in outputs:
+        _connect_attr(f'{existing}.{attr}', destination, force=True)
+    _delete_node(node)
+    _shared_counts[existing] = _shared_counts.get(existing, 1) + 1
+    return existing
+
+
+def _record_input(destination: str, source):
+    node, _, attr = destination.partition('.')
+    inputs = _node_inputs.get(node)
+    if inputs is None:
+        return
+    signature = _shared_signatures.get(node)
+    if signature is not None:
+        if _shared_counts.get(node, 1) > 1:
+            raise RuntimeError(
+                f'{node} was handed out for {_shared_counts[node]} identical requests, so changing its inputs would change all of them. '
+                'Create it with inputs_complete=False and call complete_inputs once it is wired up.'
+            )
+        if _shared_nodes.get(signature) == node:
+            del _shared_nodes[signature]
+    inputs[attr] = source if isinstance(source, str) else pooled_constant(source)
+    if signature is not None:
+        # A complete node that was only handed out once can still be changed, it's then shared under its new inputs
+        signature = _shared_signatures[node] = _get_signature(node)
+        _shared_nodes.setdefault(signature, node)
+
+
+def _forget_shared_node(node: str):
+    signature = _shared_signatures.pop(node, None)
+    if signature is not None and _shared_nodes is not None and _shared_nodes.get(signature) == node:
+        del _shared_nodes[signature]
+    for record in (_shared_counts, _node_inputs, _node_outputs):
+        record.pop(node, None)
+
+
+def _forget_removed_node(obj, *args):
+    _forget_shared_node(om2.MFnDependencyNode(obj).name())
+
+
+def _delete_node(node: str):
+    _forget_shared_node(node)
+    _node_types.pop(node, None)
+    if _elision_nodes is not None:
+        _elision_nodes.pop(node, None)
+    for created in _recorders:
+        if node in created:
+            created.remove(node)
+    for recorded in _graph_recorders:
+        recorded.remove_node(node)
+    if _deferred is not None and node in _deferred:
+        _deferred.remove_node(node)
+    else:
+        cmds.delete(node)
+
+
+########## Default elision ##########
+
+@contextmanager
+def default_elision():
+    """
+    Skips writes that would set a plug of a node created in this context to the value it already has by default.
+    Only the first write to a plug is skipped, so values that are overwritten later still land. Writes that create array elements always go through,
+    because a missing element doesn't behave like one holding its defaults. Nested contexts join the outer one.
+    """
+    global _elision_nodes
+    if _elision_nodes is not None:
+        yield
+        return
+
+    _elision_nodes = {}
+    try:
+        yield
+    finally:
+        _elision_nodes = None
+
+
+def get_skipped_writes() -> int:
+    """
+    Returns how many writes default_elision() has skipped so far. Compare two readings to get the count for one build.
+    """
+    return _skipped_writes
+
+
+def _get_plug_key(attr: str) -> tuple:
+    """
+    Splits an attribute path into the array element it lives in, if any, and its own name.
+    'target[0].weight' becomes ('target[0]', 'weight') and 'primary.primaryTargetMatrix' becomes ('', 'primaryTargetMatrix').
+    """
+    return attr[:attr.rfind(']') + 1], attr.rpartition('.')[2]
+
+
+def _touch_plug(plug: str) -> bool:
+    """
+    Records a write or connection to a plug of a node created while eliding defaults.
+
+    Returns:
+        Whether neither the plug nor the array element it belongs to had been written before
+    """
+    node, _, attr = plug.partition('.')
+    written = _elision_nodes[node]
+    element, leaf = _get_plug_key(attr)
+    untouched = (element, leaf) not in written and (not element or (element, None) in written)
+    written.add((element, leaf))
+    if element:
+        written.add((element, None))
+    # Writing a compound touches its children and writing a child touches its parent
+    info = schema.get_attribute(_get_node_type(node), leaf)
+    if info is not None:
+        for related in info.get('children', []) + [info.get('parent')]:
+            written.add((element, related))
+    return untouched
+
+
+def _is_default_value(info: dict, value, is_matrix: bool) -> bool:
+    if info['type'] == 'matrix':
+        return is_matrix and _is_identity(value, IDENTITY_MATRIX)
+    default = info['default']
+    if default is None or is_matrix:
+        return False
+    if isinstance(value, (list, tuple)) or isinstance(default, (list, tuple)):
+        value, default = _ensure_is_list(value), _ensure_is_list(default)
+        if len(value) != len(default):
+            return False
+    else:
+        value, default = [value], [default]
+    if info.get('unit') and any(default):
+        # Unit defaults are stored in internal units while values are given in UI units
+        return False
+    return all(
+        isinstance(item, (bool, int, float)) and math.isclose(item, default_item, abs_tol=1e-12)
+        for item, default_item in zip(value, default)
+    )
+
+
+def _elide_write(destination: str, value, is_matrix: bool=False) -> bool:
+    """
+    Returns True when the write can be skipped because it would leave a fresh plug at its default value
+    """
+    global _skipped_writes
+    node, _, attr = destination.partition('.')
+    if _elision_nodes is None or node not in _elision_nodes:
+        return False
+    untouched = _touch_plug(destination)
+    if not untouched or attr.endswith(']'):
+        return False
+    info = schema.get_attribute(_get_node_type(node), attr)
+    if info is None or info['output'] or not _is_default_value(info, value, is_matrix):
+        return False
+    _skipped_writes += 1
+    return True
+
+
+########## Unit preservation ##########
+
+@contextmanager
+def unit_preservation():
+    """
+    Builds sums, differences, negations and scales of angles or distances as animBlendNodeAdditiveDA/DL nodes,
+    whose inputs and output carry the unit, whenever every input and target of the node has that unit.
+    A scale is a constant, or a unitless plug such as a stretch ratio, which drives the weight of the unit carrying input.
+    Maya then doesn't insert unitConversion nodes around the connections.
+    Those nodes take inputA, inputB, weightA and weightB instead of the usual inputs, but share the output plug.
+    """
+    global _preserve_units
+    previous = _preserve_units
+    _preserve_units = True
+    try:
+        yield
+    finally:
+        _preserve_units = previous
+
+
+# unit: node type computing inputA * weightA + inputB * weightB in that unit
+_UNIT_VARIANTS = {
+    'angle': 'animBlendNodeAdditiveDA',
+    'distance': 'animBlendNodeAdditiveDL',
+}
+
+
+def get_plug_unit(plug: str) -> str:
+    """
+    Returns the unit type of a plug from the schema, 'angle', 'distance' or 'time', or None for unitless and unknown plugs
+    """
+    node, _, attr = handles.to_string(plug).partition('.')
+    if node in _folded_constants or node in _forwarded_plugs:
+        return None
+    info = schema.get_attribute(_get_node_type(node), attr)
+    return info.get('unit') if info else None
+
+
+def _get_weighted_inputs(node_type: str, inputs: list) -> list:
+    """
+    Returns the inputs of a node as at most two (plug, weight) pairs if the node is a weighted sum of plugs, otherwise None
+    """
+    plugs = [input for input in inputs if isinstance(input, str)]
+    constants = [input for input in inputs if not isinstance(input, str)]
+    if not plugs or len(plugs) > 2:
+        return None
+    if node_type == 'sum' and not any(constants):
+        return [(plug, 1) for plug in plugs]
+    if node_type == 'subtract' and not constants:
+        return [(inputs[0], 1), (inputs[1], -1)]
+    if node_type == 'negate' and not constants:
+        return [(plugs[0], -1)]
+    if node_type == 'multiply' and len(plugs) == 1 and constants:
+        return [(plugs[0], math.prod(constants))]
+    if node_type == 'multiply' and len(plugs) == 2 and math.prod(constants) == 1:
+        # One unit carrying plug scaled by a unitless one, which becomes its weight
+        units = [get_plug_unit(plug) for plug in plugs]
+        if units.count(None) == 1:
+            plug, weight = plugs if units[0] else plugs[::-1]
+            return [(plug, weight)]
+    return None
+
+
+def _create_unit_variant(node_type: str, inputs: list, targets: list[str], name: str=None):
+    if not _preserve_units or not targets:
+        return None
+    weighted = _get_weighted_inputs(node_type, [_resolve_folded_input(input) for input in inputs])
+    if weighted is None:
+        return None
+    units = {get_plug_unit(plug) for plug, _ in weighted} | {get_plug_unit(target) for target in targets}
+    unit = units.pop() if len(units) == 1 else None
+    if unit not in _UNIT_VARIANTS:
+        return None
+
+    node = _create_node(_UNIT_VARIANTS[unit], name)
+    for (plug, weight), suffix in zip(weighted, 'AB'):
+        _connect_attr(plug, f'{node}.input{suffix}')
+        _connect_or_set_input_attr(weight, f'{node}.weight{suffix}')
+    return node
+
 
 ########## Universal helper functions ##########
 
@@ -11,15 +785,19 @@ def _create_multi_input_math_node(node_type: str, inputs: list[Union[str, int, f
     inputs = _ensure_is_list(inputs)
     targets = _ensure_is_list(targets)
 
-    node = _create_node(node_type, name)
-    for i, input in enumerate(inputs):
-        if matrix:
-            _connect_or_set_input_attr(input, f'{node}.matrixIn[{i}]', is_matrix=True)
-        else:
-            _connect_or_set_input_attr(input, f'{node}.{input_prefix}[{i}]')
+    node, inputs = _fold_node(node_type, inputs)
+    if node is None:
+        node = _create_unit_variant(node_type, inputs, targets, name)
+    if node is None:
+        node = _create_node(node_type, name)
+        for i, input in enumerate(inputs):
+            if matrix:
+                _connect_or_set_input_attr(input, f'{node}.matrixIn[{i}]', is_matrix=True)
+            else:
+                _connect_or_set_input_attr(input, f'{node}.{input_prefix}[{i}]')
     
     for target in targets:
-        cmds.connectAttr(f'{node}.output', target, force=True)
+        _connect_attr(f'{node}.output', target, force=True)
         
     return node
 
@@ -34,14 +812,13 @@ def _create_rgb_xyz_input_math_node(node_type: str, input=(0, 0, 0), targets: li
         _connect_or_set_input_attr(input, f'{node}.{input_prefix + suffix}')
             
     if targets:
-        obj, attr = targets[0].split('.')
-        target_type = cmds.attributeQuery(attr, node=obj, attributeType=True)
+        target_type = _get_attribute_type(targets[0])
         if target_type == 'double3':
             for target, suffix in zip(targets, suffix_letters):
-                cmds.connectAttr(f'{node}.output{suffix}', target, force=True)
+                _connect_attr(f'{node}.output{suffix}', target, force=True)
         else:
             for target in targets:
-                cmds.connectAttr(f'{node}.output', target, force=True)
+                _connect_attr(f'{node}.output', target, force=True)
             
     return node
 
@@ -49,12 +826,16 @@ def _create_rgb_xyz_input_math_node(node_type: str, input=(0, 0, 0), targets: li
 def _create_dual_input_math_node(node_type: str, input1: Union[str, float, int], input2: Union[str, float, int], targets: list[str]=None, name: str=None):
     targets = _ensure_is_list(targets)
 
-    node = _create_node(node_type, name)
-    for input, attr in zip((input1, input2), ('input1', 'input2')):
-        _connect_or_set_input_attr(input, f'{node}.{attr}')
+    node, (input1, input2) = _fold_node(node_type, [input1, input2])
+    if node is None:
+        node = _create_unit_variant(node_type, [input1, input2], targets, name)
+    if node is None:
+        node = _create_node(node_type, name)
+        for input, attr in zip((input1, input2), ('input1', 'input2')):
+            _connect_or_set_input_attr(input, f'{node}.{attr}')
     
     for target in targets:
-        cmds.connectAttr(f'{node}.output', target, force=True)
+        _connect_attr(f'{node}.output', target, force=True)
 
     return node
 
@@ -62,19 +843,25 @@ def _create_dual_input_math_node(node_type: str, input1: Union[str, float, int],
 def _create_single_input_math_node(node_type: str, input: Union[str, float, int, list[int]], targets: list[str]=None, in_matrix: bool=False, name: str=None):
     targets = _ensure_is_list(targets)
 
-    node = _create_node(node_type, name)
+    node, (input,) = _fold_node(node_type, [input])
+    if node is None:
+        node = _create_unit_variant(node_type, [input], targets, name)
+    if node is not None:
+        input = None
+    else:
+        node = _create_node(node_type, name)
     if input:
         if isinstance(input, str):
-            cmds.connectAttr(input, f'{node}.input')
+            _connect_attr(input, f'{node}.input')
         elif in_matrix:
-            in_attr = 'input' if cmds.objExists(f'{node}.input') else 'inMatrix'
-            cmds.setAttr(f'{node}.{in_attr}', input, type='matrix')
+            in_attr = 'input' if _node_type_has_attribute(node_type, 'input') else 'inMatrix'
+            _set_attr(f'{node}.{in_attr}', input, is_matrix=True)
         else:
-            cmds.setAttr(f'{node}.input', input)
+            _set_attr(f'{node}.input', input)
     
     for target in targets:
-        output = 'output' if cmds.objExists(f'{node}.output') else 'outMatrix'
-        cmds.connectAttr(f'{node}.{output}', target, force=True)
+        output = 'output' if _node_type_has_attribute(node_type, 'output') else 'outMatrix'
+        _connect_attr(f'{node}.{output}', target, force=True)
     
     return node
 
@@ -84,138 +871,288 @@ def _set_xyz_outputs(node: str, targets: list[str], add_w_output: bool=False):
     if not targets:
         return
 
-    obj, attr = targets[0].split('.')
-    attr_type = cmds.attributeQuery(attr, node=obj, attributeType=True)
+    attr_type = _get_attribute_type(targets[0])
     if attr_type == 'double4' or attr_type == 'double3':
         for target in targets:
-            cmds.connectAttr(f'{node}.output', target, force=True)
+            _connect_attr(f'{node}.output', target, force=True)
     else:
         xyz = 'XYZW' if add_w_output else 'XYZ'
         for target, axis in zip(targets, xyz):
-            cmds.connectAttr(f'{node}.output{axis}', target, force=True)
+            _connect_attr(f'{node}.output{axis}', target, force=True)
 
 # create_aimMatrix_node
 def _connect_or_set_input_attr(source_attr: Union[str, int, float, list[int]], dest_attr: str, is_matrix: bool=False):
     if source_attr is None or dest_attr is None:
         return
     if isinstance(source_attr, str):
-        cmds.connectAttr(source_attr, dest_attr)
+        _connect_attr(source_attr, dest_attr)
     elif is_matrix:
-        cmds.setAttr(dest_attr, source_attr, type='matrix')
+        _set_attr(dest_attr, source_attr, is_matrix=True)
     else:
-        cmds.setAttr(dest_attr, source_attr)
+        _set_attr(dest_attr, source_attr)
 
 def _ensure_is_list(var: any):
     return [] if var is None else list(var) if isinstance(var, (tuple, list, set, dict)) else [var]
 
 def _create_node(node_type: str, name: str=None):
-    node = cmds.createNode(node_type)
-    if name:
-        node = cmds.rename(node, name)
+    if _probe is not None:
+        _probe.append(('create', (node_type, name)))
+        _node_types[_PROBE_NODE] = node_type
+        return _PROBE_NODE
+    if _deferred is not None:
+        node = _deferred.add_node(node_type, _get_unique_name(node_type, name))
+    else:
+        node = naming.create_node(node_type, name, taken=_is_pending_name)
+    _node_types[node] = node_type
+    if _share and _shared_nodes is not None:
+        _node_inputs[node] = {}
+    if _elision_nodes is not None:
+        _elision_nodes[node] = set()
+    for created in _recorders:
+        created.append(node)
+    for recorded in _graph_recorders:
+        recorded.add_node(node_type, node)
     return node
 
+def _connect_attr(source: str, destination: str, force: bool=False):
+    node = source.partition('.')[0]
+    if node in _forwarded_plugs:
+        source = _forwarded_plugs[node]
+    elif node in _folded_constants:
+        value, is_matrix = _folded_constants[node]
+        _set_attr(destination, value, is_matrix)
+        return
+    if _probe is not None:
+        _probe.append(('connect', (source, destination, force)))
+        return
+    if _shared_nodes is not None:
+        _record_input(destination, source)
+        if node in _node_inputs and node not in _shared_signatures:
+            _node_outputs.setdefault(node, []).append((source.partition('.')[2], destination))
+    if _elision_nodes is not None and destination.partition('.')[0] in _elision_nodes:
+        _touch_plug(destination)
+    for recorded in _graph_recorders:
+        recorded.add_connection(source, destination, force=True)
+    if _deferred is not None:
+        _deferred.add_connection(source, destination, force)
+    elif isinstance(source, handles.PlugName) or isinstance(destination, handles.PlugName):
+        _apply_through_handles(lambda build_graph: build_graph.add_connection(source, destination, force))
+    else:
+        cmds.connectAttr(source, destination, force=force)
+
+def _set_attr(destination: str, value, is_matrix: bool=False):
+    if _probe is not None:
+        _probe.append(('set', (destination, value, is_matrix)))
+        return
+    if _shared_nodes is not None:
+        _record_input(destination, value)
+    for recorded in _graph_recorders:
+        recorded.add_value(destination, value, is_matrix)
+    if _elide_write(destination, value, is_matrix):
+        return
+    if _deferred is not None:
+        _deferred.add_value(destination, value, is_matrix)
+    elif isinstance(destination, handles.PlugName):
+        _apply_through_handles(lambda build_graph: build_graph.add_value(destination, value, is_matrix))
+    elif is_matrix:
+        cmds.setAttr(destination, list(_flatten_matrix(value)), type='matrix')
+    elif isinstance(value, (list, tuple)):
+        cmds.setAttr(destination, *value)
+    else:
+        cmds.setAttr(destination, value)
+
+def _apply_through_handles(add_work):
+    """
+    Applies a connection or a value right away through OpenMaya, which finds plugs passed as handles through their MPlug
+    instead of by name
+    """
+    build_graph = graph.BuildGraph()
+    add_work(build_graph)
+    build_graph.apply()
+
+def _get_unique_name(node_type: str, name: str=None):
+    """
+    Names a node the way Maya would, taking nodes that are still waiting to be created into account
+    """
+    return naming.get_unique_name(name, node_type, taken=_is_pending_name)
+
+def _is_pending_name(name: str) -> bool:
+    """
+    Whether the name belongs to a deferred node, which isn't in the scene yet
+    """
+    return _deferred is not None and name in _deferred
+
+def _node_type_has_attribute(node_type: str, attr: str):
+    return schema.has_attribute(node_type, attr)
+
+def _get_node_type(node: str):
+    if _deferred is not None and node in _deferred:
+        return _deferred.nodes[node]
+    if node in _node_types:
+        return _node_types[node]
+    return cmds.nodeType(node)
+
+def _get_attribute_type(plug: str):
+    """
+    Looks the plug's type up in the static schema, only asking the scene about dynamic attributes
+    """
+    obj, _, attr = plug.partition('.')
+    attr_type = schema.get_attribute_type(_get_node_type(obj), attr)
+    if attr_type is None:
+        attr_type = cmds.attributeQuery(attr.rpartition('.')[2].split('[')[0], node=obj, attributeType=True)
+    return attr_type
+
 ########## Comparison ##########
 
+@_accepts_handles
+@_shareable
 def create_and_node(input1: Union[str, bool], input2: Union[str, bool], targets: list[str]=None, name: str=None):
     return _create_dual_input_math_node('and', input1, input2, targets, name)
 
 
+@_accepts_handles
+@_shareable
 def create_equal_node(input1: Union[str, int, float], input2: Union[str, int, float], epsilon: Union[str, int, float]=0, targets: list[str]=None, name: str=None):
     node = _create_dual_input_math_node('equal', input1, input2, targets, name)
     _connect_or_set_input_attr(epsilon, f'{node}.epsilon')
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_greaterThan_node(input1: Union[str, int, float], input2: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_dual_input_math_node('greaterThan', input1, input2, targets, name)
 
 
+@_accepts_handles
+@_shareable
 def create_lessThan_node(input1: Union[str, int, float], input2: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_dual_input_math_node('lessThan', input1, input2, targets, name)
 
 
+@_accepts_handles
+@_shareable
 def create_max_node(input: list[Union[str, int, float]], targets: list[str]=None, name: str=None):
     return _create_multi_input_math_node('max', input, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_min_node(input: list[Union[str, int, float]], targets: list[str]=None, name: str=None):
     return _create_multi_input_math_node('min', input, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_not_node(input: Union[str, bool], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('not', input, targets)
 
 
+@_accepts_handles
+@_shareable
 def create_or_node(input1: Union[str, bool], input2: Union[str, bool], targets: list[str]=None, name: str=None):
     return _create_dual_input_math_node('or', input1, input2, targets, name)
 
 
 ########## Operation ##########
 
+@_accepts_handles
+@_shareable
 def create_absolute_node(input: Union[str, float, int], targets: list[str]=None, name: str=None):
-    return _create_single_input_math_node('max', input, targets)
+    return _create_single_input_math_node('absolute', input, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_average_node(inputs: list[Union[str, int, float]], targets: list[str]=None, name: str=None):
     return _create_multi_input_math_node('average', inputs, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_divide_node(input1: Union[str, int, float], input2: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_dual_input_math_node('divide', input1, input2, targets, name)
 
 
+@_accepts_handles
+@_shareable
 def create_inverseLerp_node(input1: Union[str, int, float], input2: Union[str, int, float], targets: list[str]=None, interpolation: Union[str, int, float]=0, name: str=None):
     node = _create_dual_input_math_node('inverseLerp', input1, input2, targets, name)
     _connect_or_set_input_attr(interpolation, f'{node}.interpolation')
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_lerp_node(input1: Union[str, int, float], input2: Union[str, int, float], targets: list[str]=None, weight: Union[str, int, float]=0, name: str=None):
     node = _create_dual_input_math_node('lerp', input1, input2, targets, name)
     _connect_or_set_input_attr(weight, f'{node}.weight')
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_log_node(input: Union[str, float, int], targets: list[str]=None, base: Union[str, int, float]=2, name: str=None):
     node = _create_single_input_math_node('log', input, targets, name=name)
     _connect_or_set_input_attr(base, f'{node}.base')
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_modulo_node(input: Union[str, float, int], targets: list[str]=None, modulus: Union[str, int, float]=1, name: str=None):
     node = _create_single_input_math_node('modulo', input, targets, name=name)
     _connect_or_set_input_attr(modulus, f'{node}.modulus')
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_multiply_node(inputs: list[Union[str, int, float]], targets: list[str]=None, name: str=None):
     return _create_multi_input_math_node('multiply', inputs, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_negate_node(input: Union[str, float, int], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('negate', input, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_power_node(input: Union[str, float, int], targets: list[str]=None, exponent: Union[str, int, float]=2, name: str=None):
+    node, _ = _fold_node('power', [input, exponent])
+    if node is not None:
+        for target in _ensure_is_list(targets):
+            _connect_attr(f'{node}.output', target, force=True)
+        return node
     node = _create_single_input_math_node('power', input, targets, name=name)
     _connect_or_set_input_attr(exponent, f'{node}.exponent')
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_subtract_node(input1: Union[str, int, float], input2: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_dual_input_math_node('subtract', input1, input2, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_sum_node(inputs: list[Union[str, int, float]], targets: list[str]=None, name: str=None):
     return _create_multi_input_math_node('sum', inputs, targets, name=name)
 
 
 ########## Rounding ##########
 
+@_accepts_handles
+@_shareable
 def create_ceil_node(input: Union[str, float, int], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('ceil', input, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_clampRange_node(input: Union[str, float, int], targets: list[str]=None, minimum: Union[str, float, int]=0, maximum: Union[str, float, int]=1, name: str=None):
     node = _create_single_input_math_node('clampRange', input, targets, name=name)
     _connect_or_set_input_attr(minimum, f'{node}.minimum')
@@ -223,14 +1160,20 @@ def create_clampRange_node(input: Union[str, float, int], targets: list[str]=Non
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_floor_node(input: Union[str, float, int], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('floor', input, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_round_node(input: Union[str, float, int], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('round', input, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_smoothStep_node(input: Union[str, float, int], targets: list[str]=None, leftEdge: Union[str, float, int]=0, rightEdge: Union[str, float, int]=1, name: str=None):
     node = _create_single_input_math_node('smoothStep', input, targets, name=name)
     _connect_or_set_input_attr(leftEdge, f'{node}.leftEdge')
@@ -238,21 +1181,27 @@ def create_smoothStep_node(input: Union[str, float, int], targets: list[str]=Non
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_truncate_node(input: Union[str, float, int], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('truncate', input, targets, name=name)
 
 
 ########## Matrix ##########
 
+@_accepts_handles
+@_shareable
 def create_addMatrix_node(input: list[Union[str, int, float]], targets: list[str]=None, name: str=None):
     node = _create_multi_input_math_node('addMatrix', input, matrix=True, name=name)
 
     for target in _ensure_is_list(targets):
-        cmds.connectAttr(f'{node}.matrixSum', target)
+        _connect_attr(f'{node}.matrixSum', target)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_aimMatrix_node(
     input_matrix: Union[str, list[int]], 
     primary_target_matrix: Union[str, list[int]], 
@@ -277,25 +1226,29 @@ def create_aimMatrix_node(
         _connect_or_set_input_attr(primary_target_vector[i], f'{node}.primaryTargetVector{axis}')
         _connect_or_set_input_attr(secondary_input_axis[i], f'{node}.secondaryInputAxis{axis}')
         _connect_or_set_input_attr(secondary_target_vector[i], f'{node}.secondaryTargetVector{axis}')
-    cmds.setAttr(f'{node}.primaryMode', primary_mode)
-    cmds.setAttr(f'{node}.secondaryMode', secondary_mode)
+    _set_attr(f'{node}.primaryMode', primary_mode)
+    _set_attr(f'{node}.secondaryMode', secondary_mode)
     _connect_or_set_input_attr(pre_space_matrix, f'{node}.preSpaceMatrix', is_matrix=True)
     _connect_or_set_input_attr(post_space_matrix, f'{node}.postSpaceMatrix', is_matrix=True)
 
     for target in _ensure_is_list(targets):
-        cmds.connectAttr(f'{node}.outputMatrix', target, force=True)
+        _connect_attr(f'{node}.outputMatrix', target, force=True)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_axisFromMatrix_node(input: Union[str, list[int]], targets: list[str]=None, axis: int=0, name: str=None):
     node = _create_single_input_math_node('axisFromMatrix', input, in_matrix=True, name=name)
-    cmds.setAttr(f'{node}.axis', axis)
+    _set_attr(f'{node}.axis', axis)
     _set_xyz_outputs(node, targets)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_blendMatrix_node(
         input: Union[str, list[int]], 
         target_matrix: Union[str, list[str], list[list[int]]], 
@@ -330,19 +1283,23 @@ def create_blendMatrix_node(
         _connect_or_set_input_attr(post_space_matrix, f'{node}.postSpaceMatrix', is_matrix=True)
 
     for target in _ensure_is_list(targets):
-        cmds.connectAttr(f'{node}.outputMatrix', target, force=True)
+        _connect_attr(f'{node}.outputMatrix', target, force=True)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_columnFromMatrix_node(in_matrix: Union[str, list[int]], targets: list[str]=None, input: int=0, name: str=None):
     node = _create_single_input_math_node('columnFromMatrix', in_matrix, in_matrix=True, name=name)
-    cmds.setAttr(f'{node}.input', input)
+    _set_attr(f'{node}.input', input)
     _set_xyz_outputs(node, targets, add_w_output=True)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_crossProduct_node(input1: list[Union[str, int, float]], input2: list[Union[str, int, float]], targets: str, name: str=None):
     node = _create_node('crossProduct', name)
     for in_1, in_2, xyz in zip(input1, input2, 'XYZ'):
@@ -354,26 +1311,32 @@ def create_crossProduct_node(input1: list[Union[str, int, float]], input2: list[
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_decomposeMatrix_node(in_matrix: str, targets: list[str]=None, translate: bool=True, rotate: bool=True, scale: bool=True, shear: bool=True, name: str=None):
     node = _create_node("decomposeMatrix", name)
-    cmds.connectAttr(in_matrix, f"{node}.inputMatrix")
+    _connect_attr(in_matrix, f"{node}.inputMatrix")
     for target in _ensure_is_list(targets):
         if translate:
-            cmds.connectAttr(f"{node}.outputTranslate", f'{target}.translate')
+            _connect_attr(f"{node}.outputTranslate", f'{target}.translate')
         if rotate:
-            cmds.connectAttr(f"{node}.outputRotate", f'{target}.rotate')
+            _connect_attr(f"{node}.outputRotate", f'{target}.rotate')
         if scale:
-            cmds.connectAttr(f"{node}.outputScale", f'{target}.scale')
+            _connect_attr(f"{node}.outputScale", f'{target}.scale')
         if shear:
-            cmds.connectAttr(f"{node}.outputShear",f'{target}.shear')
+            _connect_attr(f"{node}.outputShear",f'{target}.shear')
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_determinant_node(input: Union[str, list[int]], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('determinant', input, targets, in_matrix=True, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_dotProduct_node(input1: list[Union[str, int, float]], input2: list[Union[str, int, float]], targets: list[str], name: str=None):
     node = _create_node('dotProduct', name)
     for in_1, in_2, xyz in zip(input1, input2, 'XYZ'):
@@ -385,6 +1348,8 @@ def create_dotProduct_node(input1: list[Union[str, int, float]], input2: list[Un
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_fourByFourMatrix_node(inputs: list[Union[str, int]], targets: list[str]=None, name: str=None):
     node = _create_node('fourByFourMatrix', name)
     input_index = 0
@@ -394,28 +1359,36 @@ def create_fourByFourMatrix_node(inputs: list[Union[str, int]], targets: list[st
         for j in range(4):
             if input_index == len(inputs):
                 break
-            _connect_or_set_input_attr(inputs[input_index], f'{node}.{i}{j}')
+            _connect_or_set_input_attr(inputs[input_index], f'{node}.in{i}{j}')
             input_index += 1
     for target in _ensure_is_list(targets):
-        cmds.connectAttr(f'{node}.output', target, force=True)
+        _connect_attr(f'{node}.output', target, force=True)
     
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_holdMatrix_node(input: Union[str, list[int]], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('holdMatrix', input, targets, in_matrix=True, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_inverseMatrix_node(input: Union[str, list[int]], targets: list[str]=None, name: str=None):
-    node = _create_node('inverseMatrix', name)
-    _connect_or_set_input_attr(input, f'{node}.inputMatrix')
+    node, (input,) = _fold_node('inverseMatrix', [input])
+    if node is None:
+        node = _create_node('inverseMatrix', name)
+        _connect_or_set_input_attr(input, f'{node}.inputMatrix', is_matrix=True)
     for target in _ensure_is_list(targets):
-        cmds.connectAttr(f'{node}.outputMatrix', target, force=True)
+        _connect_attr(f'{node}.outputMatrix', target, force=True)
 
     return node
 
 
 
+@_accepts_handles
+@_shareable
 def create_multiplyPointByMatrix_node(inputs: list[Union[str, int, float]], matrix: Union[str, list[int]], targets: list[str]=None, name: str=None):
     node = _create_single_input_math_node('multiplyPointByMatrix', matrix, in_matrix=True, name=name)
     for input, xyz in zip(inputs, 'XYZ'):
@@ -426,6 +1399,8 @@ def create_multiplyPointByMatrix_node(inputs: list[Union[str, int, float]], matr
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_multiplyVectorByMatrix_node(inputs: list[Union[str, int, float]], matrix: Union[str, list[int]], targets: list[str]=None, name: str=None):
     node = _create_rgb_xyz_input_math_node('multiplyVectorByMatrix', inputs, targets, name)
     _connect_or_set_input_attr(matrix, f'{node}.matrix')
@@ -433,19 +1408,25 @@ def create_multiplyVectorByMatrix_node(inputs: list[Union[str, int, float]], mat
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_multMatrix_node(in_matrix: list[Union[str, int, float]], targets: list[str]=None, name: str=None):
     node = _create_multi_input_math_node('multMatrix', in_matrix, matrix=True, name=name)
     
     for target in _ensure_is_list(targets):
-        cmds.connectAttr(f'{node}.matrixSum', target, force=True)
+        _connect_attr(f'{node}.matrixSum', target, force=True)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_normalize_node(input: list[Union[str, int, float]], targets: list[str]=None, name: str=None):
     return _create_rgb_xyz_input_math_node('normalize', input, targets, name)
 
 
+@_accepts_handles
+@_shareable
 def create_parentMatrix_node(
     in_matrix: Union[str, list[int]], 
     in_target_matrices: list[Union[str, list[int]]]=None, 
@@ -470,41 +1451,49 @@ def create_parentMatrix_node(
                 _connect_or_set_input_attr(in_matrix, f'{node}.target[{i}].{dest_attr}', in_matrix=True)
     
     for target in _ensure_is_list(targets):
-        cmds.connectAttr(f'{node}.outputMatrix', target, force=True)
+        _connect_attr(f'{node}.outputMatrix', target, force=True)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_passMatrix_node(input: Union[str, list[int]], targets: list[str]=None, in_scale: Union[str, int, float]=2, name: str=None):
     node = _create_single_input_math_node('passMatrix', input, targets, in_matrix=True, name=name)
-    cmds.setAttr(f'{node}.inScale', in_scale)
+    _set_attr(f'{node}.inScale', in_scale)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_pickMatrix_node(in_matrix: Union[str, list[int]]=None, targets: list[str]=None, scale: bool=True, rotate: bool=True, translate: bool=True, shear: bool=True, name: str=None):
     node = _create_node('pickMatrix', name)
-    cmds.setAttr(f'{node}.useScale', scale)
-    cmds.setAttr(f'{node}.useRotate', rotate)
-    cmds.setAttr(f'{node}.useTranslate', translate)
-    cmds.setAttr(f'{node}.useShear', shear)
+    _set_attr(f'{node}.useScale', scale)
+    _set_attr(f'{node}.useRotate', rotate)
+    _set_attr(f'{node}.useTranslate', translate)
+    _set_attr(f'{node}.useShear', shear)
     if in_matrix:
         _connect_or_set_input_attr(in_matrix, f'{node}.inputMatrix', is_matrix=True)
     for target in _ensure_is_list(targets):
-        cmds.connectAttr(f'{node}.outputMatrix', target, force=True)
+        _connect_attr(f'{node}.outputMatrix', target, force=True)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_pointMatrixMult_node(input: Union[str, list[int]], in_point: list[Union[str, int, float]], targets: list[str]=None, vector_multiply: bool=False, name: str=None):
     node = _create_single_input_math_node('pointMatrixMult', input, targets, in_matrix=True, name=name)
     for point, xyz in zip(in_point, 'XYZ'):
         _connect_or_set_input_attr(point, f'{node}.inPoint{xyz}')
-    cmds.setAttr(f'{node}.vectorMultiply', vector_multiply)
+    _set_attr(f'{node}.vectorMultiply', vector_multiply)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_rotationFromMatrix_node(in_matrix: Union[str, list[int]], targets: list[str]=None, name: str=None):
     node = _create_single_input_math_node('rotationFromMatrix', in_matrix, in_matrix=True, name=name)
     _set_xyz_outputs(node, targets)
@@ -512,6 +1501,8 @@ def create_rotationFromMatrix_node(in_matrix: Union[str, list[int]], targets: li
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_rowFromMatrix_node(in_matrix: Union[str, list[int]], targets: list[str]=None, input: Union[str, int, float]=0, name: str=None):
     node = _create_node('rowFromMatrix', name)
     _connect_or_set_input_attr(in_matrix, f'{node}.matrix', is_matrix=True)
@@ -521,6 +1512,8 @@ def create_rowFromMatrix_node(in_matrix: Union[str, list[int]], targets: list[st
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_scaleFromMatrix_node(in_matrix: Union[str, list[int]], targets: list[str]=None, name: str=None):
     node = _create_single_input_math_node('scaleFromMatrix', in_matrix, in_matrix=True, name=name)
     _set_xyz_outputs(node, targets)
@@ -528,6 +1521,8 @@ def create_scaleFromMatrix_node(in_matrix: Union[str, list[int]], targets: list[
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_translationFromMatrix_node(in_matrix, targets: list[str]=None, name: str=None):
     node = _create_single_input_math_node('translationFromMatrix', in_matrix, in_matrix=True, name=name)
     _set_xyz_outputs(node, targets)
@@ -536,39 +1531,57 @@ def create_translationFromMatrix_node(in_matrix, targets: list[str]=None, name:
 
 ########## Trigonometry ##########
 
+@_accepts_handles
+@_shareable
 def create_acos_node(input: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('acos', input, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_asin_node(input: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('asin', input, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_atan_node(input: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('atan', input, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_atan2_node(input1: Union[str, int, float], input2: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_dual_input_math_node('atan2', input1, input2, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_cos_node(input: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('cos', input, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_sin_node(input: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('sin', input, targets, name=name)
 
 
+@_accepts_handles
+@_shareable
 def create_tan_node(input: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_single_input_math_node('tan', input, targets, name=name)
 
 ########## Utility ##########
 
+@_accepts_handles
+@_shareable
 def create_addDoubleLinear_node(input1: Union[str, int, float], input2: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_dual_input_math_node('addDoubleLinear', input1, input2, targets, name)
 
 
+@_accepts_handles
+@_shareable
 def create_angleBetween_node(
         vector1: list[Union[str, int, float]]=[0, 1, 0], 
         vector2: list[Union[str, int, float]]=[0, 0, 1], 
@@ -582,15 +1595,17 @@ def create_angleBetween_node(
         _connect_or_set_input_attr(input, f'{node}.{attr}')
 
     for target, xyz in zip(_ensure_is_list(axis_targets), 'XYZ'):
-        cmds.connectAttr(f'{node}.axis{xyz}', target)
+        _connect_attr(f'{node}.axis{xyz}', target)
     for target, xyz in zip(_ensure_is_list(euler_targets), 'XYZ'):
-        cmds.connectAttr(f'{node}.euler{xyz}', target)
+        _connect_attr(f'{node}.euler{xyz}', target)
     for target in _ensure_is_list(angle_targets):
-        cmds.connectAttr(f'{node}.angle', target)
+        _connect_attr(f'{node}.angle', target)
     
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_blendColors_node(
         color1: list[Union[str, int, float]]=[0, 1, 0], 
         color2: list[Union[str, int, float]]=[0, 0, 1], 
@@ -606,6 +1621,8 @@ def create_blendColors_node(
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_choice_node(inputs: list[Union[str, int, float]], selector: Union[str, int]=0, targets: list[str]=None, name: str=None):
     node = _create_multi_input_math_node('choice', inputs, targets, name=name)
     _connect_or_set_input_attr(selector, f'{node}.selector')
@@ -613,6 +1630,8 @@ def create_choice_node(inputs: list[Union[str, int, float]], selector: Union[str
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_clamp_node(
         input: list[Union[str, int, float]]=[0, 0, 0], 
         max: list[Union[str, int, float]]=[0, 0, 0], 
@@ -629,6 +1648,8 @@ def create_clamp_node(
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_condition_node(
         true_input: list[Union[str, int, float]]=[0, 0, 0], 
         false_input: list[Union[str, int, float]]=[0, 0, 0], 
@@ -643,11 +1664,13 @@ def create_condition_node(
         _connect_or_set_input_attr(source_attr, f'{node}.colorIfFalse{rgb}')
     _connect_or_set_input_attr(first_term, f'{node}.firstTerm')
     _connect_or_set_input_attr(second_term, f'{node}.secondTerm')
-    cmds.setAttr(f'{node}.operation', operation)
+    _set_attr(f'{node}.operation', operation)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_curveInfo_node(
         curve: str, 
         arc_length_targets: list[str]=None, 
@@ -657,51 +1680,54 @@ def create_curveInfo_node(
         name: str=None
 ):
     node = _create_node('curveInfo', name)
-    cmds.connectAttr(curve, f'{node}.curve')
+    _connect_attr(curve, f'{node}.curve')
     for target in _ensure_is_list(arc_length_targets):
-        cmds.connectAttr(f'{node}.arcLength', target)
+        _connect_attr(f'{node}.arcLength', target)
     for control_point in _ensure_is_list(control_points_targets):
         _set_xyz_outputs(node, control_point)
     for i, target in enumerate(_ensure_is_list(knots_targets)):
-        cmds.connectAttr(f'{node}.knots[{i}]', target)
+        _connect_attr(f'{node}.knots[{i}]', target)
     for i, target in enumerate(_ensure_is_list(weights_targets)):
-        cmds.connectAttr(f'{node}.weights[{i}]', target)
+        _connect_attr(f'{node}.weights[{i}]', target)
     
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_distanceBetween_node(start, end, targets: list[str]=None, name: str=None):
     node = _create_node('distanceBetween', name)
     if isinstance(start, str):
-        try:
-            cmds.connectAttr(start, f'{node}.point1')
-        except RuntimeError:
-            cmds.connectAttr(start, f'{node}.inMatrix1')
+        # Point plugs are compound doubles, anything else is treated as a matrix
+        start_attr = 'point1' if _get_attribute_type(start) in ('double3', 'float3') else 'inMatrix1'
+        _connect_attr(start, f'{node}.{start_attr}')
     elif isinstance(start, tuple):
-        cmds.setAttr(f'{node}.point1', start[0], start[1], start[2])
+        _set_attr(f'{node}.point1', start)
     else:
-        cmds.setAttr(f'{node}.inMatrix1', start, type='matrix')
+        _set_attr(f'{node}.inMatrix1', start, is_matrix=True)
 
     if isinstance(end, str):
-        try:
-            cmds.connectAttr(end, f'{node}.point2')
-        except RuntimeError:
-            cmds.connectAttr(end, f'{node}.inMatrix2')
+        end_attr = 'point2' if _get_attribute_type(end) in ('double3', 'float3') else 'inMatrix2'
+        _connect_attr(end, f'{node}.{end_attr}')
     elif isinstance(end, tuple):
-        cmds.setAttr(f'{node}.point2', end[0], end[1], end[2])
+        _set_attr(f'{node}.point2', end)
     else:
-        cmds.setAttr(f'{node}.inMatrix2', end, type='matrix')
+        _set_attr(f'{node}.inMatrix2', end, is_matrix=True)
 
     for target in _ensure_is_list(targets):
-        cmds.connectAttr(f'{node}.distance', target, force=True)
+        _connect_attr(f'{node}.distance', target, force=True)
     
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_multDoubleLinear_node(input1: Union[str, int, float], input2: Union[str, int, float], targets: list[str]=None, name: str=None):
     return _create_dual_input_math_node('multDoubleLinear', input1, input2, targets, name)
 
 
+@_accepts_handles
+@_shareable
 def create_multiplyDivide_node(
         input1: Union[list[Union[str, int, float]], str, int, float], 
         input2: Union[list[str, int, float], str, int, float], 
@@ -713,11 +1739,13 @@ def create_multiplyDivide_node(
     for input, xyz in zip(input2, 'XYZ'):
         _connect_or_set_input_attr(input, f'{node}.input2{xyz}')
     _set_xyz_outputs(node, targets)
-    cmds.setAttr(f'{node}.operation', operation)
+    _set_attr(f'{node}.operation', operation)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_plusMinusAverage_node(inputs: Union[list[Union[str, int, float]], str, int, float], targets: list[str]=None, input_output_type: int=1, operation: int=1, name: str=None):
     inputs = _ensure_is_list(inputs)
     targets = _ensure_is_list(targets)
@@ -729,28 +1757,32 @@ def create_plusMinusAverage_node(inputs: Union[list[Union[str, int, float]], str
             for input, xy in zip(inputs[i], 'xy'):
                 _connect_or_set_input_attr(input, f'{node}.input2D[{i}].input2D{xy}')
         for target, xy in zip(targets, 'xy'):
-            cmds.connectAttr(f'{node}.output2D{xy}', target)
+            _connect_attr(f'{node}.output2D{xy}', target)
     else:
         node = _create_rgb_xyz_input_math_node('plusMinusAverage', inputs[0], targets, name, input_prefix='input3D')
         for i in range(1, len(inputs)):
             for input, xyz in zip(inputs[i], 'xyz'):
                 _connect_or_set_input_attr(input, f'{node}.input3D[{i}].input3D{xyz}')
     
-    cmds.setAttr(f'{node}.operation', operation)
+    _set_attr(f'{node}.operation', operation)
 
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_remapValue_node(input: Union[str, int, float], input_min: Union[str, int, float], input_max: Union[str, int, float], output_min: Union[str, int, float], output_max: Union[str, int, float], targets: list[str]=None, name: str=None):
     node = _create_node('remapValue', name)
     for dest_attr, source_attr in {'inputValue': input, 'inputMin': input_min, 'inputMax': input_max, 'outputMin': output_min, 'outputMax': output_max}.items():
         _connect_or_set_input_attr(source_attr, f'{node}.{dest_attr}')
     for target in _ensure_is_list(targets):
-        cmds.connectAttr(f'{node}.outValue', target, force=True)
+        _connect_attr(f'{node}.outValue', target, force=True)
     
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_reverse_node(input: list[Union[str, int, float]], targets: list[str]=None, name: str=None):
     node = _create_rgb_xyz_input_math_node('reverse', input, name=name)
     _set_xyz_outputs(node, targets)
@@ -758,6 +1790,8 @@ def create_reverse_node(input: list[Union[str, int, float]], targets: list[str]=
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_setRange_node(input: Union[str, int, float], min: Union[str, int, float], max: Union[str, int, float], old_min: Union[str, int, float], old_max: Union[str, int, float], targets: list[str]=None, name: str=None):
     node = _create_node('remapValue', name)
     for dest_attr, source_attr in {'value': input, 'min': min, 'max': max, 'oldMin': old_min, 'oldMax': old_max}.items():
@@ -765,21 +1799,380 @@ def create_setRange_node(input: Union[str, int, float], min: Union[str, int, flo
             _connect_or_set_input_attr(attr, f'{node}.{dest_attr}{xyz}')
     
     for target, xyz in zip(_ensure_is_list(targets), 'XYZ'):
-        cmds.connectAttr(f'{node}.outValue{xyz}', target, force=True)
+        _connect_attr(f'{node}.outValue{xyz}', target, force=True)
     
     return node
 
 
+@_accepts_handles
+@_shareable
 def create_vectorProduct_node(input1: list[Union[str, int, float]], input2: list[Union[str, int, float]], targets: list[str]=None, operation: int=1, normalize_output: bool=False, name: str=None):
     node = _create_rgb_xyz_input_math_node('vectorProduct', input1, targets, name, 'input1')
     for input, xyz in zip(_ensure_is_list(input2), 'XYZ'):
         _connect_or_set_input_attr(input, f'{node}.input2{xyz}')
-    cmds.setAttr(f'{node}.operation', operation)
-    cmds.setAttr(f'{node}.normalizeOutput', normalize_output)
+    _set_attr(f'{node}.operation', operation)
+    _set_attr(f'{node}.normalizeOutput', normalize_output)
 
     return node
 
 ########## Other ##########
 
+@_accepts_handles
+@_shareable
 def create_length_node(input: list[Union[str, int, float]], targets: list[str]=None, name: str=None):
-    return _create_rgb_xyz_input_math_node('length', input, targets, name)
\ No newline at end of file
+    return _create_rgb_xyz_input_math_node('length', input, targets, name)
+
+########## Solvers ##########
+
+def create_two_bone_ik(
+    root_matrix: str,
+    mid_guide_matrix: str,
+    end_guide_matrix: str,
+    effector_matrix: str,
+    pole_matrix: str,
+    root_guide_matrix: str=None,
+    pole_vector: tuple[Union[int, float]]=None,
+    bend_axis: tuple[Union[int, float]]=(0, 1, 0),
+    twist_matrix: str=None,
+    stretch: Union[str, int, float]=0,
+    soft: Union[str, int, float]=0,
+    local_outputs: bool=False,
+    root_targets: list[str]=None,
+    mid_targets: list[str]=None,
+    end_targets: list[str]=None,
+    name: str=None
+) -> dict:
+    """
+    Builds an analytic two bone IK solver out of math and matrix nodes, which evaluates in parallel unlike an ikHandle.
+    The chain lies in the plane spanned by the root, the effector and the pole, and the mid position comes from the law of cosines.
+    The output matrices aim their X axis down the chain and their bend_axis towards the bend.
+
+    Args:
+        root_matrix: World matrix placing the root of the chain
+        mid_guide_matrix: Rest world matrix of the mid joint, measured for the bone lengths
+        end_guide_matrix: Rest world matrix of the end joint, measured for the bone lengths
+        effector_matrix: World matrix the chain reaches for. The end output takes its rotation.
+        pole_matrix: World matrix the chain bends towards
+        root_guide_matrix: Rest world matrix of the root joint, defaults to root_matrix
+        pole_vector: Bend along this axis of pole_matrix instead of towards its position
+        bend_axis: The Y or Z axis of the outputs pointing towards the bend
+        twist_matrix: Local matrix rotating the bend plane around the chain, such as the .matrix of a control that only rotates in X
+        stretch: How much the bones stretch when the effector is out of reach, from 0 to 1
+        soft: Distance before full extension over which the chain eases out, to avoid the snap of a straightening limb. 0 turns it off.
+        local_outputs: Express the mid output in the root output's space and the end output in the mid output's space, for driving a joint hierarchy
+        root_targets: Plugs to drive with the root output
+        mid_targets: Plugs to drive with the mid output
+        end_targets: Plugs to drive with the end output
+        name: Prefix for the created nodes
+
+    Returns:
+        The 'root', 'mid' and 'end' output matrix plugs
+    """
+    root_matrix, mid_guide_matrix, end_guide_matrix, effector_matrix, pole_matrix, root_guide_matrix, twist_matrix, stretch, soft = handles.to_string(
+        (root_matrix, mid_guide_matrix, end_guide_matrix, effector_matrix, pole_matrix, root_guide_matrix, twist_matrix, stretch, soft)
+    )
+    name = name or 'twoBoneIk'
+    root_guide_matrix = root_guide_matrix or root_matrix
+
+    # Bone lengths
+    upper_length = f"{create_distanceBetween_node(root_guide_matrix, mid_guide_matrix, name=f'{name}_upper_restLength')}.distance"
+    lower_length = f"{create_distanceBetween_node(mid_guide_matrix, end_guide_matrix, name=f'{name}_lower_restLength')}.distance"
+    chain_length = f"{create_sum_node([upper_length, lower_length], name=f'{name}_restLength')}.output"
+    root_position = f"{create_pickMatrix_node(root_matrix, scale=False, rotate=False, shear=False, name=f'{name}_root_position')}.outputMatrix"
+    reach = f"{create_distanceBetween_node(root_position, effector_matrix, name=f'{name}_reach')}.distance"
+
+    if stretch:
+        ratio = f"{create_divide_node(reach, chain_length, name=f'{name}_reachRatio')}.output"
+        scale = f"{create_max_node([ratio, 1], name=f'{name}_stretch')}.output"
+        if stretch != 1:
+            scale = f"{create_lerp_node(1, scale, weight=stretch, name=f'{name}_stretchBlend')}.output"
+        upper_length = f"{create_multiply_node([upper_length, scale], name=f'{name}_upper_length')}.output"
+        lower_length = f"{create_multiply_node([lower_length, scale], name=f'{name}_lower_length')}.output"
+        chain_length = f"{create_multiply_node([chain_length, scale], name=f'{name}_length')}.output"
+
+    # Reach that the chain can actually cover, eased out over the soft distance as d - soft * e^(-overshoot / soft)
+    if soft:
+        soft_start = f"{create_subtract_node(chain_length, soft, name=f'{name}_softStart')}.output"
+        overshoot = f"{create_subtract_node(reach, soft_start, name=f'{name}_overshoot')}.output"
+        overshoot = f"{create_max_node([overshoot, 0], name=f'{name}_overshootClamp')}.output"
+        # A soft plug may be turned down to 0, which would divide by zero
+        soft_divisor = soft if _is_constant(soft) else f"{create_max_node([soft, 1e-6], name=f'{name}_softDivisor')}.output"
+        falloff = f"{create_divide_node(overshoot, soft_divisor, name=f'{name}_softRatio')}.output"
+        falloff = f"{create_power_node(1 / math.e, exponent=falloff, name=f'{name}_softFalloff')}.output"
+        eased_reach = f"{create_multiply_node([soft, falloff], name=f'{name}_softOffset')}.output"
+        eased_reach = f"{create_subtract_node(chain_length, eased_reach, name=f'{name}_softReach')}.output"
+        solved_reach = f"{create_min_node([reach, eased_reach], name=f'{name}_solvedReach')}.output"
+    else:
+        solved_reach = f"{create_min_node([reach, chain_length], name=f'{name}_solvedReach')}.output"
+
+    # Mid position in the bend plane, along is towards the effector and across is towards the bend
+    # upper**2 is built once and used by both expressions
+    upper_squared = expression.compile_expression('upper**2', name=f'{name}_upperSquared', upper=upper_length)
+    # The effector can sit on the root, so the reach is clamped before dividing by it
+    along = expression.compile_expression(
+        '(upper_squared + reach**2 - lower**2) / (2 * max(reach, 1e-6))', name=f'{name}_along',
+        upper_squared=upper_squared, reach=solved_reach, lower=lower_length
+    )
+    across = expression.compile_expression('sqrt(max(upper_squared - along**2, 0))', name=f'{name}_across', along=along, upper_squared=upper_squared)
+
+    # The bend plane sits at the root, aims at the effector and turns towards the pole
+    plane = create_aimMatrix_node(
+        root_position,
+        effector_matrix,
+        pole_matrix,
+        secondary_input_axis=bend_axis,
+        secondary_mode=1 if pole_vector is None else 2,
+        secondary_target_vector=pole_vector or (0, 0, 0),
+        name=f'{name}_plane'
+    )
+    plane = f'{plane}.outputMatrix'
+    if twist_matrix:
+        plane = f"{create_multMatrix_node([twist_matrix, plane], name=f'{name}_twistedPlane')}.matrixSum"
+
+    # The bend axis is Y or Z, so across only lands in the last two translation inputs
+    bend_offset = [0 if not axis else across if axis == 1 else f"{create_multiply_node([across, axis], name=f'{name}_across_axis')}.output" for axis in bend_axis[1:]]
+    mid_offset = create_fourByFourMatrix_node([1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, along] + bend_offset, name=f'{name}_mid_offset')
+    mid_position = f"{create_multMatrix_node([f'{mid_offset}.output', plane], name=f'{name}_mid_position')}.matrixSum"
+    end_offset = create_fourByFourMatrix_node([1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, solved_reach], name=f'{name}_end_offset')
+    end_position = f"{create_multMatrix_node([f'{end_offset}.output', plane], name=f'{name}_end_position')}.matrixSum"
+
+    # Each bone aims at the next joint and keeps its bend axis in the plane
+    bone_aim = dict(secondary_input_axis=bend_axis, secondary_mode=2, secondary_target_vector=bend_axis)
+    root_output = f"{create_aimMatrix_node(root_position, mid_position, plane, name=f'{name}_root', **bone_aim)}.outputMatrix"
+    mid_output = f"{create_aimMatrix_node(mid_position, end_position, plane, name=f'{name}_mid', **bone_aim)}.outputMatrix"
+    end_output = f"{create_blendMatrix_node(end_position, effector_matrix, translate_weight=0, name=f'{name}_end')}.outputMatrix"
+
+    if local_outputs:
+        root_inverse = f"{create_inverseMatrix_node(root_output, name=f'{name}_root_inverse')}.outputMatrix"
+        mid_inverse = f"{create_inverseMatrix_node(mid_output, name=f'{name}_mid_inverse')}.outputMatrix"
+        mid_output, end_output = (
+            f"{create_multMatrix_node([mid_output, root_inverse], name=f'{name}_mid_local')}.matrixSum",
+            f"{create_multMatrix_node([end_output, mid_inverse], name=f'{name}_end_local')}.matrixSum",
+        )
+
+    outputs = {'root': root_output, 'mid': mid_output, 'end': end_output}
+    for output, targets in zip(outputs.values(), (root_targets, mid_targets, end_targets)):
+        for target in _ensure_is_list(handles.to_string(targets)):
+            _connect_attr(output, target, force=True)
+    return outputs
+
+
+########## Bulk creation ##########
+
+def _can_batch() -> bool:
+    """
+    Whether the bulk constructors can write their nodes straight into the deferred graph.
+    Folding, sharing, default elision, unit preservation and signature probes decide node by node, so the bulk constructors
+    fall back to calling the create_*_node function once per node while any of them is on.
+    """
+    return not _fold_constants and not (_share and _shared_nodes is not None) and _elision_nodes is None and not _preserve_units and _probe is None
+
+
+def _create_node_batch(node_type: str, names: list, inputs: dict, outputs: dict) -> list[str]:
+    """
+    Creates one node of a type per name in bulk: the names come from one pass over the unique_names() index,
+    the plugs of each attribute are formatted in one pass, and the nodes, connections and values are added to the deferred graph at once.
+
+    Args:
+        node_type: The type of every node
+        names: The wanted name of each node, or None for Maya's default name
+        inputs: {attr: [source plug or constant value of each node, None leaves that node's plug alone]}
+        outputs: {attr: [target plugs of each node]}
+
+    Returns:
+        The created nodes, in the order of the names
+    """
+    with deferred_build() as build_graph:
+        nodes = naming.get_unique_names(names, node_type, taken=_is_pending_name)
+        connections, values = [], []
+        for attr, sources in inputs.items():
+            for node, source in zip(nodes, map(_resolve_folded_input, sources)):
+                if isinstance(source, str):
+                    connections.append((source, f'{node}.{attr}', False))
+                elif source is not None:
+                    values.append((f'{node}.{attr}', source, _is_matrix_value(source)))
+        for attr, node_targets in outputs.items():
+            for node, targets in zip(nodes, node_targets):
+                connections += [(f'{node}.{attr}', target, True) for target in _ensure_is_list(targets)]
+
+        build_graph.add_nodes(node_type, nodes)
+        build_graph.add_connections(connections)
+        build_graph.add_values(values)
+        for recorded in _graph_recorders:
+            recorded.add_nodes(node_type, nodes)
+            recorded.add_connections([(source, destination, True) for source, destination, _ in connections])
+            recorded.add_values(values)
+    _node_types.update(dict.fromkeys(nodes, node_type))
+    for created in _recorders:
+        created.extend(nodes)
+    return nodes
+
+
+def _create_nodes(create_function, inputs: list[tuple], targets: list=None, names: list[str]=None, **kwargs) -> list[str]:
+    """
+    Calls a create_*_node function once per set of inputs inside one deferred_build(), for when _can_batch() doesn't allow a batch
+
+    Args:
+        create_function: The create_*_node function to call
+        inputs: The positional inputs of each node
+        targets: The targets of each node, parallel to inputs
+        names: The name of each node, parallel to inputs
+        kwargs: Keyword arguments shared by every node
+
+    Returns:
+        The created nodes, in the order of the inputs
+    """
+    targets, names = _get_batch_lists(len(inputs), targets, names)
+    with deferred_build():
+        return [
+            create_function(*node_inputs, targets=node_targets, name=name, **kwargs)
+            for node_inputs, node_targets, name in zip(inputs, targets, names)
+        ]
+
+
+def _get_batch_lists(count: int, targets: list=None, names: list[str]=None) -> tuple[list, list]:
+    targets = [None] * count if targets is None else list(targets)
+    names = [None] * count if names is None else list(names)
+    if len(targets) != count or len(names) != count:
+        raise RuntimeError(f'Got {count} inputs, {len(targets)} targets and {len(names)} names, the lists must be parallel')
+    return targets, names
+
+
+@_accepts_handles
+def create_distanceBetween_nodes(starts: list, ends: list, targets: list=None, names: list[str]=None) -> list[str]:
+    if len(starts) != len(ends):
+        raise RuntimeError(f'Got {len(starts)} starts and {len(ends)} ends, the lists must be parallel')
+    if not _can_batch():
+        return _create_nodes(create_distanceBetween_node, list(zip(starts, ends)), targets, names)
+
+    targets, names = _get_batch_lists(len(starts), targets, names)
+    inputs = {attr: [None] * len(starts) for attr in ('point1', 'inMatrix1', 'point2', 'inMatrix2')}
+    for i, points in enumerate(zip(starts, ends)):
+        for index, point in enumerate(points, 1):
+            # Point plugs are compound doubles, anything else is treated as a matrix
+            is_point = isinstance(point, tuple) or isinstance(point, str) and _get_attribute_type(point) in ('double3', 'float3')
+            inputs[f'point{index}' if is_point else f'inMatrix{index}'][i] = point
+    return _create_node_batch('distanceBetween', names, inputs, {'distance': targets})
+
+
+@_accepts_handles
+def create_multMatrix_nodes(in_matrices: list[list], targets: list=None, names: list[str]=None) -> list[str]:
+    if not _can_batch():
+        return _create_nodes(create_multMatrix_node, [(in_matrix,) for in_matrix in in_matrices], targets, names)
+
+    targets, names = _get_batch_lists(len(in_matrices), targets, names)
+    in_matrices = [_ensure_is_list(in_matrix) for in_matrix in in_matrices]
+    inputs = {
+        f'matrixIn[{i}]': [in_matrix[i] if i < len(in_matrix) else None for in_matrix in in_matrices]
+        for i in range(max(map(len, in_matrices), default=0))
+    }
+    return _create_node_batch('multMatrix', names, inputs, {'matrixSum': targets})
+
+
+@_accepts_handles
+def create_inverseMatrix_nodes(inputs: list, targets: list=None, names: list[str]=None) -> list[str]:
+    if not _can_batch():
+        return _create_nodes(create_inverseMatrix_node, [(input,) for input in inputs], targets, names)
+
+    targets, names = _get_batch_lists(len(inputs), targets, names)
+    return _create_node_batch('inverseMatrix', names, {'inputMatrix': inputs}, {'outputMatrix': targets})
+
+
+@_accepts_handles
+def create_decomposeMatrix_nodes(in_matrices: list[str], targets: list=None, translate: bool=True, rotate: bool=True, scale: bool=True, shear: bool=True, names: list[str]=None) -> list[str]:
+    if not _can_batch():
+        return _create_nodes(
+            create_decomposeMatrix_node, [(in_matrix,) for in_matrix in in_matrices], targets, names,
+            translate=translate, rotate=rotate, scale=scale, shear=shear
+        )
+
+    targets, names = _get_batch_lists(len(in_matrices), targets, names)
+    outputs = {
+        f'output{channel.capitalize()}': [[f'{target}.{channel}' for target in _ensure_is_list(node_targets)] for node_targets in targets]
+        for channel, enabled in (('translate', translate), ('rotate', rotate), ('scale', scale), ('shear', shear)) if enabled
+    }
+    return _create_node_batch('decomposeMatrix', names, {'inputMatrix': in_matrices}, outputs)
+
+
+@_accepts_handles
+def create_pickMatrix_nodes(in_matrices: list, targets: list=None, scale: bool=True, rotate: bool=True, translate: bool=True, shear: bool=True, names: list[str]=None) -> list[str]:
+    if not _can_batch():
+        return _create_nodes(
+            create_pickMatrix_node, [(in_matrix,) for in_matrix in in_matrices], targets, names,
+            scale=scale, rotate=rotate, translate=translate, shear=shear
+        )
+
+    targets, names = _get_batch_lists(len(in_matrices), targets, names)
+    count = len(in_matrices)
+    inputs = {
+        'useScale': [scale] * count,
+        'useRotate': [rotate] * count,
+        'useTranslate': [translate] * count,
+        'useShear': [shear] * count,
+        'inputMatrix': [in_matrix or None for in_matrix in in_matrices],
+    }
+    return _create_node_batch('pickMatrix', names, inputs, {'outputMatrix': targets})
+
+
+@_accepts_handles
+def create_translationFromMatrix_nodes(in_matrices: list, targets: list=None, names: list[str]=None) -> list[str]:
+    if not _can_batch():
+        return _create_nodes(create_translationFromMatrix_node, [(in_matrix,) for in_matrix in in_matrices], targets, names)
+
+    targets, names = _get_batch_lists(len(in_matrices), targets, names)
+    outputs = {attr: [[] for _ in targets] for attr in ('output', 'outputX', 'outputY', 'outputZ')}
+    for i, node_targets in enumerate(map(_ensure_is_list, targets)):
+        # Like _set_xyz_outputs, compound targets take the whole output and anything else one axis each
+        if node_targets and _get_attribute_type(node_targets[0]) in ('double3', 'double4'):
+            outputs['output'][i] = node_targets
+        else:
+            for target, axis in zip(node_targets, 'XYZ'):
+                outputs[f'output{axis}'][i] = [target]
+    return _create_node_batch('translationFromMatrix', names, {'input': in_matrices}, outputs)
+
+
+@_accepts_handles
+def create_blendMatrix_nodes(
+        inputs: list,
+        target_matrices: list,
+        targets: list=None,
+        names: list[str]=None,
+        weight: Union[str, int, float, list[Union[str, int, float]]] = 1,
+        scale_weight: Union[str, int, float, list[Union[str, int, float]]] = 1,
+        translate_weight: Union[str, int, float, list[Union[str, int, float]]] = 1,
+        rotate_weight: Union[str, int, float, list[Union[str, int, float]]] = 1,
+        shear_weight: Union[str, int, float, list[Union[str, int, float]]] = 1,
+        pre_space_matrix: list[int]=None,
+        post_space_matrix: list[int]=None
+    ) -> list[str]:
+    """
+    Creates one blendMatrix node per input. The weights and space matrices are shared by every node.
+    """
+    if len(inputs) != len(target_matrices):
+        raise RuntimeError(f'Got {len(inputs)} inputs and {len(target_matrices)} target matrices, the lists must be parallel')
+    weights = {
+        'weight': weight,
+        'scaleWeight': scale_weight,
+        'translateWeight': translate_weight,
+        'rotateWeight': rotate_weight,
+        'shearWeight': shear_weight,
+    }
+    if not _can_batch():
+        return _create_nodes(
+            create_blendMatrix_node, list(zip(inputs, target_matrices)), targets, names,
+            weight=weight, scale_weight=scale_weight, translate_weight=translate_weight, rotate_weight=rotate_weight,
+            shear_weight=shear_weight, pre_space_matrix=pre_space_matrix, post_space_matrix=post_space_matrix
+        )
+
+    targets, names = _get_batch_lists(len(inputs), targets, names)
+    count = len(inputs)
+    target_matrices = [_ensure_is_list(matrix) for matrix in target_matrices]
+    batch_inputs = {'inputMatrix': inputs}
+    for i in range(max(map(len, target_matrices), default=0)):
+        batch_inputs[f'target[{i}].targetMatrix'] = [matrices[i] if i < len(matrices) else None for matrices in target_matrices]
+    for weight_type, weight_values in weights.items():
+        for i, value in enumerate(_ensure_is_list(weight_values)):
+            batch_inputs[f'target[{i}].{weight_type}'] = [value] * count
+    batch_inputs['preSpaceMatrix'] = [pre_space_matrix or None] * count
+    batch_inputs['postSpaceMatrix'] = [post_space_matrix or None] * count
+    return _create_node_batch('blendMatrix', names, batch_inputs, {'outputMatrix': targets})
@@ -0,0 +1,254 @@
+"""
+Optimization passes that run over the nodes a component has already built.
+"""
+import math
+
+import maya.cmds as cmds
+
+from riggler.core import nodes
+
+
+########## Dead nodes ##########
+
+def eliminate_dead_nodes(candidates: list[str], dry_run: bool=False) -> list[str]:
+    """
+    Deletes the given nodes that nothing outside of them consumes, directly or through other candidates.
+    The walk starts at every node outside the candidates, such as outputs, joints and controls, and follows connections upstream.
+    unitConversion nodes between candidates count as candidates, so they don't keep a dead chain alive.
+
+    Args:
+        candidates: The nodes that may be deleted, usually the utility nodes a component created
+        dry_run: Only report the dead nodes without deleting them
+
+    Returns:
+        The dead nodes
+    """
+    existing = [node for node in candidates if cmds.objExists(node)]
+    created = set(existing) | set(find_unit_conversions(existing))
+    live = set()
+    pending = [
+        node for node in created
+        if any(consumer not in created for consumer in cmds.listConnections(node, source=False, destination=True) or [])
+    ]
+    while pending:
+        node = pending.pop()
+        if node in live:
+            continue
+        live.add(node)
+        pending.extend(source for source in cmds.listConnections(node, source=True, destination=False) or [] if source in created)
+
+    dead = [node for node in created if node not in live]
+    if dead and not dry_run:
+        cmds.delete(dead)
+    return sorted(dead)
+
+
+########## Unit conversions ##########
+
+def find_unit_conversions(candidates: list[str]) -> list[str]:
+    """
+    Returns the unitConversion nodes Maya inserted on connections to or from the given nodes
+    """
+    existing = [node for node in candidates if cmds.objExists(node)]
+    if not existing:
+        return []
+    return sorted(set(cmds.listConnections(existing, type='unitConversion') or []))
+
+
+########## Matrix chains ##########
+
+def collapse_matrix_chains(candidates: list[str]) -> int:
+    """
+    Shortens multMatrix chains among the given nodes:
+    a multMatrix whose only consumer is another multMatrix is merged into it, neighbouring constant matrices are multiplied together,
+    identity matrices are dropped, and multMatrix nodes left with a single input are bypassed.
+
+    Args:
+        candidates: The nodes to optimize, usually everything a component created. Other nodes are left alone.
+
+    Returns:
+        The number of multMatrix nodes removed
+    """
+    mult_matrices = [node for node in candidates if cmds.objExists(node) and cmds.nodeType(node) == 'multMatrix']
+    removed = 0
+    changed = True
+    while changed:
+        changed = False
+        for node in mult_matrices:
+            if not cmds.objExists(node):
+                continue
+            if _fuse_array_node(node, 'matrixIn', 'matrixSum', mult_matrices, _merge_constant_matrices, is_matrix=True):
+                removed += 1
+                changed = True
+    return removed
+
+
+def _merge_constant_matrices(inputs: list) -> list:
+    merged = []
+    for input in inputs:
+        if not isinstance(input, str) and merged and not isinstance(merged[-1], str):
+            merged[-1] = nodes._multiply_matrices([merged[-1], input])
+        else:
+            merged.append(input)
+    identity_free = [input for input in merged if isinstance(input, str) or not nodes._is_identity(input, nodes.IDENTITY_MATRIX)]
+    return identity_free or [nodes.IDENTITY_MATRIX]
+
+
+########## Scalar chains ##########
+
+# node type: operation merging the constant inputs of the node type
+_SCALAR_MERGES = {
+    'sum': math.fsum,
+    'multiply': math.prod,
+    'min': min,
+    'max': max,
+}
+
+
+def fuse_scalar_chains(candidates: list[str]) -> int:
+    """
+    Flattens chains of the associative sum, multiply, min and max nodes among the given nodes:
+    a node whose only consumer is an input of another node of the same type is merged into that node's input array,
+    constant inputs are combined into one, and nodes left with a single input are bypassed.
+    Divisions by a constant that feed a multiply node are merged into it as a multiplication by the inverse.
+
+    Args:
+        candidates: The nodes to optimize, usually everything a component created. Other nodes are left alone.
+
+    Returns:
+        The number of nodes removed
+    """
+    removed = _fuse_constant_divisions(candidates)
+    for node_type, merge in _SCALAR_MERGES.items():
+        chain_nodes = [node for node in candidates if cmds.objExists(node) and cmds.nodeType(node) == node_type]
+        merge_constants = lambda inputs, merge=merge, node_type=node_type: _merge_constant_scalars(node_type, inputs, merge)
+        changed = True
+        while changed:
+            changed = False
+            for node in chain_nodes:
+                if cmds.objExists(node) and _fuse_array_node(node, 'input', 'output', chain_nodes, merge_constants):
+                    removed += 1
+                    changed = True
+    return removed
+
+
+def _fuse_constant_divisions(candidates: list[str]) -> int:
+    multiplies = [node for node in candidates if cmds.objExists(node) and cmds.nodeType(node) == 'multiply']
+    removed = 0
+    for node in candidates:
+        if not cmds.objExists(node) or cmds.nodeType(node) != 'divide':
+            continue
+        if cmds.listConnections(f'{node}.input2', source=True, destination=False) or not cmds.getAttr(f'{node}.input2'):
+            continue
+        consumers = _get_sole_output_consumers(node, 'output')
+        if len(consumers) != 1:
+            continue
+        consumer, _, attr = consumers[0].partition('.')
+        if consumer not in multiplies or not attr.startswith('input['):
+            continue
+        sources = cmds.listConnections(f'{node}.input1', source=True, destination=False, plugs=True)
+        dividend = sources[0] if sources else cmds.getAttr(f'{node}.input1')
+        inverse = 1 / cmds.getAttr(f'{node}.input2')
+        consumer_inputs = _get_array_inputs(consumer, 'input', with_indices=True)
+        position = [index for index, _ in consumer_inputs].index(int(attr[attr.index('[') + 1:-1]))
+        values = [value for _, value in consumer_inputs]
+        cmds.delete(node)
+        _set_array_inputs(consumer, 'input', values[:position] + [dividend, inverse] + values[position + 1:])
+        removed += 1
+    return removed
+
+
+def _merge_constant_scalars(node_type: str, inputs: list, merge) -> list:
+    constants = [input for input in inputs if not isinstance(input, str)]
+    if len(constants) < 2 and not (constants and constants[0] == nodes._MERGEABLE_IDENTITIES[node_type]):
+        return inputs
+    merged = [input for input in inputs if isinstance(input, str)]
+    constant = merge(constants)
+    if constant != nodes._MERGEABLE_IDENTITIES[node_type] or not merged:
+        merged.append(constant)
+    return merged
+
+
+########## Shared helpers ##########
+
+def _fuse_array_node(node: str, input_attr: str, output_attr: str, chain_nodes: list[str], merge_constants, is_matrix: bool=False) -> bool:
+    """
+    Merges the constant inputs of an array input node, then either merges the node into the single chain node consuming it
+    or bypasses it when it's left with a single input.
+
+    Returns:
+        Whether the node was removed
+    """
+    inputs = _get_array_inputs(node, input_attr)
+    merged = merge_constants(inputs)
+    if merged != inputs:
+        _set_array_inputs(node, input_attr, merged, is_matrix)
+        inputs = merged
+
+    consumers = _get_sole_output_consumers(node, output_attr)
+    if not consumers or not inputs:
+        return False
+    consumer, _, attr = consumers[0].partition('.')
+    if len(consumers) == 1 and consumer in chain_nodes and attr.startswith(f'{input_attr}['):
+        consumer_inputs = _get_array_inputs(consumer, input_attr, with_indices=True)
+        position = [index for index, _ in consumer_inputs].index(int(attr[attr.index('[') + 1:-1]))
+        values = [value for _, value in consumer_inputs]
+        cmds.delete(node)
+        _set_array_inputs(consumer, input_attr, values[:position] + inputs + values[position + 1:], is_matrix)
+    elif len(inputs) == 1:
+        # A single input passes straight through, so its consumers can read it directly
+        cmds.delete(node)
+        for consumer in consumers:
+            _connect_or_set(inputs[0], consumer, is_matrix)
+    else:
+        return False
+    return True
+
+
+def _get_sole_output_consumers(node: str, output_attr: str) -> list[str]:
+    """
+    Returns the plugs reading the node's output, or an empty list if any other attribute of the node is read too
+    """
+    connections = cmds.listConnections(node, source=False, destination=True, connections=True, plugs=True) or []
+    consumers = []
+    for source, destination in zip(connections[::2], connections[1::2]):
+        if source.partition('.')[2] != output_attr:
+            return []
+        consumers.append(destination)
+    return consumers
+
+
+def _get_array_inputs(node: str, attr: str, with_indices: bool=False) -> list:
+    """
+    Returns the source plug or the constant value of every element of an array input, in index order
+    """
+    inputs = []
+    for index in cmds.getAttr(f'{node}.{attr}', multiIndices=True) or []:
+        plug = f'{node}.{attr}[{index}]'
+        sources = cmds.listConnections(plug, source=True, destination=False, plugs=True)
+        if sources:
+            value = sources[0]
+        else:
+            value = cmds.getAttr(plug)
+            value = tuple(value) if isinstance(value, list) else value
+        inputs.append((index, value) if with_indices else value)
+    return inputs
+
+
+def _set_array_inputs(node: str, attr: str, inputs: list, is_matrix: bool=False):
+    for index in cmds.getAttr(f'{node}.{attr}', multiIndices=True) or []:
+        cmds.removeMultiInstance(f'{node}.{attr}[{index}]', b=True)
+    for i, input in enumerate(inputs):
+        _connect_or_set(input, f'{node}.{attr}[{i}]', is_matrix)
+
+
+def _connect_or_set(input, destination: str, is_matrix: bool=False):
+    if isinstance(input, str):
+        cmds.connectAttr(input, destination, force=True)
+        return
+    for source in cmds.listConnections(destination, source=True, destination=False, plugs=True) or []:
+        cmds.disconnectAttr(source, destination)
+    if is_matrix:
+        cmds.setAttr(destination, list(input), type='matrix')
+    else:
+        cmds.setAttr(destination, input)
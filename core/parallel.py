@@ -0,0 +1,155 @@
+"""
+Builds independent component subtrees at the same time in separate mayapy processes and merges the results into the current scene.
+Each worker builds its subtree into a new scene with the scheduler and saves it as a Maya ASCII fragment.
+The fragments are imported one after another, and the connect_to_parent links between fragments are made in a final pass.
+
+Components are described by specs: {'type': 'riggler.modules.body.arm.guide.Guide', 'name': 'arm_L', 'parent': 'spine'}.
+"""
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+
+import maya.cmds as cmds
+
+from riggler.core import component, scheduler, session
+
+
+def build_parallel(specs: list[dict], workers: int=None, mayapy: str=None, work_dir: Path=None) -> list[str]:
+    """
+    Builds components in parallel worker processes and merges them into the current scene.
+    Parents that aren't among the specs have to exist in the scene already, they're connected once the fragments are merged.
+
+    Args:
+        specs: The components to build, parents before or after their children
+        workers: The number of worker processes, the number of CPU cores by default
+        mayapy: The mayapy executable running the workers, the one next to the running Maya by default
+        work_dir: Where the job files and fragments are kept, otherwise they're written to a temporary directory and deleted
+
+    Returns:
+        The fragment files, in merge order
+    """
+    workers = workers or os.cpu_count() or 1
+    mayapy = mayapy or str(Path(sys.executable).with_name('mayapy.exe' if os.name == 'nt' else 'mayapy'))
+    jobs = split_jobs(specs, workers)
+    with ExitStack() as stack:
+        work_dir = Path(work_dir or stack.enter_context(tempfile.TemporaryDirectory()))
+        job_files = []
+        for i, job in enumerate(jobs):
+            job_file = work_dir / f'riggler_job_{i}.json'
+            job_file.write_text(json.dumps({'components': job, 'output': str(work_dir / f'riggler_fragment_{i}.ma')}))
+            job_files.append(job_file)
+        # Threads only wait on the worker processes, which do the building
+        with ThreadPoolExecutor(max_workers=min(workers, len(jobs)) or 1) as pool:
+            fragments = list(pool.map(lambda job_file: _run_worker(mayapy, job_file), job_files))
+
+        job_by_name = {spec['name']: i for i, job in enumerate(jobs) for spec in job}
+        with session.BuildSession(name='riggler_merge'):
+            for i, fragment in enumerate(fragments):
+                merge_fragment(fragment, f'riggler_fragment_{i}')
+            for spec in specs:
+                parent = spec.get('parent')
+                if parent and job_by_name.get(parent) != job_by_name[spec['name']]:
+                    name = component.cleanup_name(spec['name'])
+                    component.connect_parent_outputs(parent, f'{name}_parent_guide_input', f'{name}_parent_input')
+        return fragments
+
+
+def split_jobs(specs: list[dict], job_count: int) -> list[list[dict]]:
+    """
+    Splits specs into jobs that don't depend on each other while building.
+    Every separate tree starts as one job, then the largest job is split into its root and the subtrees of the root's children
+    until there are enough jobs or nothing left to split.
+
+    Returns:
+        The specs of each job, parents before their children
+    """
+    names = {spec['name'] for spec in specs}
+    children = {}
+    for spec in specs:
+        parent = spec.get('parent')
+        children.setdefault(parent if parent in names else None, []).append(spec)
+
+    def subtree(root: dict) -> list[dict]:
+        found = []
+        pending = [root]
+        while pending:
+            spec = pending.pop(0)
+            found.append(spec)
+            pending.extend(children.get(spec['name'], []))
+        return found
+
+    jobs = [subtree(root) for root in children.get(None, [])]
+    if sum(len(job) for job in jobs) != len(specs):
+        raise RuntimeError('The component specs have a parent cycle')
+    while len(jobs) < job_count:
+        largest = max(jobs, key=len)
+        root_children = children.get(largest[0]['name'], [])
+        if not root_children:
+            break
+        jobs.remove(largest)
+        jobs.extend([[largest[0]]] + [subtree(child) for child in root_children])
+    return jobs
+
+
+def merge_fragment(path: Path, namespace: str) -> list[str]:
+    """
+    Imports a fragment into the scene. Shading groups that already exist in the scene, like the guide materials
+    every worker creates, take over the fragment's members instead of being duplicated.
+
+    Returns:
+        The imported nodes
+    """
+    imported = cmds.file(str(path), i=True, namespace=namespace, returnNewNodes=True, force=True) or []
+    for shading_group in cmds.ls(f'{namespace}:*', type='shadingEngine') or []:
+        existing = shading_group.rpartition(':')[2]
+        if not cmds.objExists(existing) or cmds.nodeType(existing) != 'shadingEngine':
+            continue
+        members = cmds.sets(shading_group, query=True) or []
+        if members:
+            cmds.sets(members, edit=True, forceElement=existing)
+        materials = cmds.listConnections(f'{shading_group}.surfaceShader', source=True, destination=False) or []
+        cmds.delete([shading_group] + [material for material in materials if material.startswith(f'{namespace}:')])
+    # Clashing names get a numbered suffix, component names are unique across fragments so only unnamed utility nodes can clash
+    cmds.namespace(removeNamespace=namespace, mergeNamespaceWithRoot=True)
+    return [node.replace(f'{namespace}:', '', 1) for node in imported if cmds.objExists(node.replace(f'{namespace}:', '', 1))]
+
+
+def _run_worker(mayapy: str, job_file: Path) -> Path:
+    package_root = str(Path(__file__).resolve().parents[2])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get('PYTHONPATH')])))
+    result = subprocess.run([mayapy, '-m', 'riggler.core.parallel', str(job_file)], capture_output=True, text=True, env=env)
+    job = json.loads(job_file.read_text())
+    if result.returncode != 0:
+        names = ', '.join(spec['name'] for spec in job['components'])
+        raise RuntimeError(f'Building {names} failed:\n{result.stderr[-2000:]}')
+    return Path(job['output'])
+
+
+def _build_job(job_file: Path):
+    """
+    Runs in a worker process: builds a job's components into a new scene and saves it as the job's fragment
+    """
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    job = json.loads(Path(job_file).read_text())
+    names = {spec['name'] for spec in job['components']}
+    cmds.file(new=True, force=True)
+    with session.BuildSession(undo='off'), scheduler.scheduled_build():
+        for spec in job['components']:
+            module_name, _, class_name = spec['type'].rpartition('.')
+            component_type = getattr(importlib.import_module(module_name), class_name)
+            # Parents in other fragments are connected once the fragments are merged
+            parent = spec.get('parent')
+            component_type(spec['name'], parent=parent if parent in names else None)
+    cmds.file(rename=job['output'])
+    cmds.file(save=True, type='mayaAscii', force=True)
+
+
+if __name__ == '__main__':
+    _build_job(sys.argv[1])
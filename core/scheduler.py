@@ -0,0 +1,121 @@
+"""
+Builds many components together one step phase at a time: every component's Objects step runs, then every Properties step, and so on.
+Parents run each phase before their children, so connect_to_parent always finds the parent's outputs.
+Grouping the phases lets the components share one deferred modifier per phase and keeps the evaluation manager
+from rebuilding its graph after every component.
+"""
+from contextlib import ExitStack, contextmanager
+
+from riggler.core import naming, nodes, session
+
+
+_components = None  # components registered while inside scheduled_build()
+
+
+@contextmanager
+def scheduled_build(batch_evaluation: bool=True):
+    """
+    Components created inside the context only register themselves. Their steps run phase by phase once the context exits.
+    Nothing is built if the context exits with an error. Nested contexts join the outer one.
+
+    Args:
+        batch_evaluation: Turn the evaluation manager off during each phase, so its graph is rebuilt once per phase
+
+    Returns:
+        The registered components, which are built once the context exits
+    """
+    global _components
+    if _components is not None:
+        yield _components
+        return
+
+    components = _components = []
+    try:
+        yield components
+    finally:
+        _components = None
+    build_components(components, batch_evaluation)
+
+
+def register(component) -> bool:
+    """
+    Registers a component being created inside scheduled_build()
+
+    Returns:
+        Whether the component was registered, otherwise it has to build itself
+    """
+    if _components is None:
+        return False
+    _components.append(component)
+    return True
+
+
+def build_components(components: list, batch_evaluation: bool=True) -> list:
+    """
+    Builds components phase by phase, parents before their children.
+    With incremental builds, a component being rebuilt forces its children to rebuild too, since rebuilding deletes the outputs they connect to.
+
+    Args:
+        components: Components that were registered instead of building themselves
+        batch_evaluation: Turn the evaluation manager off during each phase
+
+    Returns:
+        The components that were built, in build order
+    """
+    building = []
+    rebuilt = set()
+    with naming.unique_names():
+        # Identical nodes are shared across the components that share nodes, not just within each one
+        with nodes.node_sharing(share=False):
+            for component in sort_components(components):
+                if component.begin_build(force=component.parent in rebuilt):
+                    building.append(component)
+                    rebuilt.add(component.name)
+
+            with ExitStack() as stack:
+                for component in building:
+                    stack.enter_context(component._build_stack)
+                for index in range(max((len(component.steps) for component in building), default=0)):
+                    phase = [component for component in building if index < len(component.steps)]
+                    with _batched_phase(phase, batch_evaluation):
+                        for component in phase:
+                            component.stepMethods.append(component.run_step(index))
+
+        # Only once every component is built and sharing is over, so the post-build passes see every consumer of a shared node
+        for component in building:
+            component.finish_build()
+    return building
+
+
+def sort_components(components: list) -> list:
+    """
+    Orders components so parents come before their children, keeping the given order otherwise.
+    Parents that aren't among the components are expected to be built already.
+    """
+    by_name = {component.name: component for component in components}
+    ordered = []
+    state = {}  # component name: 1 while its parents are being visited, 2 once it's ordered
+    for component in components:
+        chain = []
+        current = component
+        while current is not None and state.get(current.name) != 2:
+            if state.get(current.name) == 1:
+                raise RuntimeError(f'{current.name} is its own ancestor: {" -> ".join(item.name for item in reversed(chain))}')
+            state[current.name] = 1
+            chain.append(current)
+            current = by_name.get(current.parent)
+        for item in reversed(chain):
+            state[item.name] = 2
+            ordered.append(item)
+    return ordered
+
+
+@contextmanager
+def _batched_phase(components: list, batch_evaluation: bool):
+    with ExitStack() as stack:
+        if components and all(component.deferred_build for component in components):
+            # Every component's step joins one deferred build, which is applied in one modifier pass at the end of the phase
+            stack.enter_context(nodes.deferred_build())
+        if batch_evaluation:
+            stack.enter_context(session.suspend_evaluation())
+        yield
@@ -0,0 +1,209 @@
+"""
+A table of the plugs on every node type riggler.core.nodes works with: their types, array-ness and default values.
+Inside Maya every node type is read from MNodeClass the first time it's looked up, once per session, so plug types can be looked up
+without querying the scene. schema.json is only the fallback for when Maya isn't available, e.g. for offline tools.
+The shipped schema.json is hand-curated, which its 'curated' key records: it holds the plugs nodes.py works with and the channels
+and matrices of transforms and joints, and only some attributes have their short names. Offline tools have to expect attributes
+it doesn't know. Replace it with complete tables read from MNodeClass with `mayapy -m riggler.core.schema`,
+which also covers a new node type once it's added to the file.
+"""
+import json
+from pathlib import Path
+
+try:
+    from maya.api import OpenMaya as om2
+except ImportError:
+    om2 = None
+
+
+SCHEMA_PATH = Path(__file__).with_name('schema.json')
+
+_schema = None  # node type: {long attribute name: attribute info}
+_short_names = {}  # node type: {short attribute name: long attribute name}
+_completed_node_types = set()  # node types that have already been read from MNodeClass
+
+
+def get_attribute(node_type: str, attr: str) -> dict:
+    """
+    Returns the schema entry of an attribute, or None if the node type doesn't have it.
+
+    Args:
+        node_type: The node type to look in
+        attr: A long or short attribute name. Plug paths such as 'target[0].targetMatrix' or 'worldMatrix[0]' are reduced to their last attribute.
+
+    Returns:
+        A dictionary with the attribute's 'type', 'array', 'default', 'output' and optionally 'unit', 'short', 'parent' and 'children' values
+    """
+    attr = attr.rpartition('.')[2].split('[')[0]
+    if node_type not in _completed_node_types:
+        _add_node_class(node_type)
+    return _find_attribute(node_type, _get_node_schema(node_type), attr)
+
+
+def has_attribute(node_type: str, attr: str) -> bool:
+    return get_attribute(node_type, attr) is not None
+
+
+def get_attribute_type(node_type: str, attr: str) -> str:
+    """
+    Returns the type of an attribute using the names cmds.attributeQuery(attributeType=True) uses, e.g. 'double3', 'doubleAngle' or 'matrix'
+    """
+    info = get_attribute(node_type, attr)
+    return info['type'] if info else None
+
+
+def get_default(node_type: str, attr: str):
+    info = get_attribute(node_type, attr)
+    return info['default'] if info else None
+
+
+def export_schema(node_types: list[str]=None, path: Path=SCHEMA_PATH):
+    """
+    Reads node types from MNodeClass and writes them to a schema file, which is then complete rather than curated. Needs Maya.
+
+    Args:
+        node_types: The node types to write, every node type in the schema file by default
+        path: The schema file to write
+    """
+    if om2 is None:
+        raise RuntimeError('Exporting the schema needs Maya, run it with mayapy')
+    shipped = _load_schema()
+    node_schemas = {}
+    for node_type in sorted(set(node_types or shipped)):
+        node_schema = _read_node_class(node_type)
+        if node_schema is None:
+            raise RuntimeError(f'Maya doesn\'t know the node type {node_type}, load the plugin that defines it first')
+        node_schemas[node_type] = node_schema
+    with open(path, 'w') as schema_file:
+        json.dump({'node_types': node_schemas}, schema_file, indent=1, sort_keys=True)
+
+
+def _find_attribute(node_type: str, node_schema: dict, attr: str) -> dict:
+    info = node_schema.get(attr)
+    if info is None and attr in _short_names.get(node_type, {}):
+        info = node_schema.get(_short_names[node_type][attr])
+    return info
+
+
+def _load_schema() -> dict:
+    global _schema
+    if _schema is None:
+        _schema = {}
+        if SCHEMA_PATH.exists():
+            with open(SCHEMA_PATH) as schema_file:
+                _schema = json.load(schema_file)['node_types']
+        for node_type, node_schema in _schema.items():
+            _index_short_names(node_type, node_schema)
+    return _schema
+
+
+def _get_node_schema(node_type: str) -> dict:
+    return _load_schema().get(node_type, {})
+
+
+def _index_short_names(node_type: str, node_schema: dict):
+    short_names = _short_names.setdefault(node_type, {})
+    for attr, info in node_schema.items():
+        if info.get('short'):
+            short_names[info['short']] = attr
+
+
+def _add_node_class(node_type: str):
+    _completed_node_types.add(node_type)
+    if om2 is None:
+        return
+    node_schema = _read_node_class(node_type)
+    if node_schema is None:
+        return
+    # MNodeClass is authoritative, the shipped entries only stand in when Maya isn't available
+    _load_schema()[node_type] = node_schema
+    _short_names[node_type] = {}
+    _index_short_names(node_type, node_schema)
+
+
+def _read_node_class(node_type: str) -> dict:
+    """
+    Returns the schema of a node type read from MNodeClass, or None if Maya doesn't know the node type
+    """
+    try:
+        node_class = om2.MNodeClass(node_type)
+        attributes = [node_class.attribute(i) for i in range(node_class.attributeCount)]
+    except (RuntimeError, ValueError):
+        return None
+    return {om2.MFnAttribute(attribute).name: _read_attribute(attribute) for attribute in attributes}
+
+
+_NUMERIC_TYPES = {
+    'kBoolean': 'bool',
+    'kByte': 'byte',
+    'kChar': 'char',
+    'kShort': 'short',
+    'kInt': 'long',
+    'kFloat': 'float',
+    'kDouble': 'double',
+    'kAddr': 'addr',
+    'k2Short': 'short2',
+    'k2Int': 'long2',
+    'k2Float': 'float2',
+    'k2Double': 'double2',
+    'k3Short': 'short3',
+    'k3Int': 'long3',
+    'k3Float': 'float3',
+    'k3Double': 'double3',
+    'k4Double': 'double4',
+}
+_UNIT_TYPES = {
+    'kAngle': ('doubleAngle', 'angle'),
+    'kDistance': ('doubleLinear', 'distance'),
+    'kTime': ('time', 'time'),
+}
+
+
+def _read_attribute(attribute) -> dict:
+    attribute_fn = om2.MFnAttribute(attribute)
+    info = {
+        'short': attribute_fn.shortName,
+        'array': attribute_fn.array,
+        'output': not attribute_fn.writable,
+        'default': None,
+    }
+    if not attribute_fn.parent.isNull():
+        info['parent'] = om2.MFnAttribute(attribute_fn.parent).name
+
+    if attribute.hasFn(om2.MFn.kNumericAttribute):
+        numeric_fn = om2.MFnNumericAttribute(attribute)
+        numeric_types = {getattr(om2.MFnNumericData, name): attr_type for name, attr_type in _NUMERIC_TYPES.items()}
+        info['type'] = numeric_types.get(numeric_fn.numericType(), 'numeric')
+        info['default'] = numeric_fn.default
+    elif attribute.hasFn(om2.MFn.kUnitAttribute):
+        unit_fn = om2.MFnUnitAttribute(attribute)
+        unit_types = {getattr(om2.MFnUnitAttribute, name): value for name, value in _UNIT_TYPES.items()}
+        info['type'], info['unit'] = unit_types.get(unit_fn.unitType(), ('double', None))
+        default = unit_fn.default
+        info['default'] = default.value if hasattr(default, 'value') else default  # internal units
+    elif attribute.hasFn(om2.MFn.kEnumAttribute):
+        info['type'] = 'enum'
+        info['default'] = om2.MFnEnumAttribute(attribute).default
+    elif attribute.hasFn(om2.MFn.kMatrixAttribute):
+        info['type'] = 'matrix'
+    elif attribute.hasFn(om2.MFn.kTypedAttribute):
+        typed_fn = om2.MFnTypedAttribute(attribute)
+        info['type'] = 'matrix' if typed_fn.attrType() == om2.MFnData.kMatrix else 'typed'
+    elif attribute.hasFn(om2.MFn.kCompoundAttribute):
+        info['type'] = 'compound'
+    elif attribute.hasFn(om2.MFn.kMessageAttribute):
+        info['type'] = 'message'
+    else:
+        info['type'] = 'generic'
+
+    # Numeric compounds such as double3 are compound attributes too
+    if attribute.hasFn(om2.MFn.kCompoundAttribute):
+        compound_fn = om2.MFnCompoundAttribute(attribute)
+        info['children'] = [om2.MFnAttribute(compound_fn.child(i)).name for i in range(compound_fn.numChildren())]
+    return info
+
+
+if __name__ == '__main__':
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    export_schema()
@@ -0,0 +1,134 @@
+"""
+A context for whole rig builds that stops Maya from paying per command for the undo queue, viewport refreshes
+and evaluation graph rebuilds, and caches queries whose answers can't change during the build.
+"""
+from contextlib import ExitStack, contextmanager
+
+import maya.cmds as cmds
+
+from riggler.core import naming, nodes
+
+
+_session = None  # the active BuildSession
+
+
+class BuildSession:
+    """
+    Wrap a rig build in a BuildSession to run it as one undo chunk, or without undo, with refresh and evaluation graph rebuilds suspended.
+    Identical nodes are shared across every component built in the session that shares nodes,
+    and every component names its nodes against one index of the scene's names, seeded once.
+    Everything is restored when the session exits, even on an error. Nested sessions join the outer one.
+
+    Args:
+        undo: 'chunk' to make the whole build one undo step, 'off' to turn undo off, or None to leave undo alone
+        suspend_refresh: Suspend viewport refreshes
+        suspend_evaluation: Turn the evaluation manager off, so its graph is rebuilt once when the session exits
+        name: The name of the undo chunk
+    """
+    def __init__(self, undo: str='chunk', suspend_refresh: bool=True, suspend_evaluation: bool=True, name: str='riggler_build'):
+        if undo not in ('chunk', 'off', None):
+            raise RuntimeError(f'Unknown undo mode {undo}, use "chunk", "off" or None')
+        self.undo = undo
+        self.suspend_refresh = suspend_refresh
+        self.suspend_evaluation = suspend_evaluation
+        self.name = name
+        self.cache = {}  # key: the answer to a query that can't change during the session, see cached()
+        self._stack = None
+
+    def __enter__(self):
+        global _session
+        if _session is not None:
+            return _session
+        self._stack = ExitStack()
+        nodes.clear_caches()
+        try:
+            if self.undo == 'chunk':
+                self._stack.enter_context(_undo_chunk(self.name))
+            elif self.undo == 'off':
+                self._stack.enter_context(_undo_off())
+            if self.suspend_refresh:
+                self._stack.enter_context(_refresh_suspended())
+            if self.suspend_evaluation:
+                self._stack.enter_context(suspend_evaluation())
+            self._stack.enter_context(naming.unique_names())
+            self._stack.enter_context(nodes.node_sharing(share=False))
+        except BaseException:
+            self._stack.close()
+            raise
+        _session = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _session
+        if _session is not self:
+            return False
+        _session = None
+        self.cache.clear()
+        return self._stack.__exit__(*exc_info)
+
+
+def get_session() -> BuildSession:
+    """
+    Returns the active BuildSession, or None
+    """
+    return _session
+
+
+def cached(key, query):
+    """
+    Returns the cached answer to a query while inside a BuildSession, asking the scene only the first time.
+    Outside of a session the query always runs.
+
+    Args:
+        key: What the query asks, e.g. 'up_axis' or ('shading_group', material)
+        query: A function answering the query
+    """
+    if _session is None:
+        return query()
+    if key not in _session.cache:
+        _session.cache[key] = query()
+    return _session.cache[key]
+
+
+@contextmanager
+def suspend_evaluation():
+    """
+    Turns the evaluation manager off while inside the context, so it rebuilds its graph once afterwards instead of after every change
+    """
+    mode = (cmds.evaluationManager(query=True, mode=True) or ['off'])[0]
+    if mode != 'off':
+        cmds.evaluationManager(mode='off')
+    try:
+        yield
+    finally:
+        if mode != 'off':
+            cmds.evaluationManager(mode=mode)
+
+
+@contextmanager
+def _undo_chunk(name: str):
+    cmds.undoInfo(openChunk=True, chunkName=name)
+    try:
+        yield
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+
+@contextmanager
+def _undo_off():
+    enabled = cmds.undoInfo(query=True, state=True)
+    # stateWithoutFlush keeps the existing undo queue
+    cmds.undoInfo(stateWithoutFlush=False)
+    try:
+        yield
+    finally:
+        cmds.undoInfo(stateWithoutFlush=enabled)
+
+
+@contextmanager
+def _refresh_suspended():
+    cmds.refresh(suspend=True)
+    try:
+        yield
+    finally:
+        cmds.refresh(suspend=False)
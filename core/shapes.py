@@ -1,6 +1,6 @@
 import types
 import maya.cmds as cmds
-from riggler.core import nodes, transform
+from riggler.core import naming, nodes, transform
 
 
 def add_display_curve(name, objects, degree, parent=None):
@@ -14,7 +14,7 @@ def add_display_curve(name, objects, degree, parent=None):
 
 
 def create_joint(name='joint1', parent=None, translation=[0, 0, 0], matrix=None, offsetParentMatrix=None):
-    joint = cmds.createNode('joint', name=name)
+    joint = naming.create_node('joint', name)
     if offsetParentMatrix:
         nodes._connect_or_set_input_attr(joint, offsetParentMatrix, 'offsetParentMatrix')
     elif matrix:
@@ -106,7 +106,7 @@ def create_ctrl(shape=ctrlShapes.circleX, name='ctrl', parent=None, translation=
         ctrl = shape()
     else:
         ctrl = cmds.curve(point=shape, degree=1)
-    ctrl = cmds.rename(ctrl, name)
+    ctrl = naming.rename(ctrl, name)
     cmds.select(clear=True)
 
     if offsetParentMatrix:
@@ -0,0 +1,454 @@
+"""
+Compact snapshots of built components, which rebuild without running any of the components' Python build logic.
+A snapshot holds node types and names, DAG parenting, non default attribute values, dynamic attributes with their ranges,
+defaults and channel states, NURBS curve shapes and connections. Every string is stored once and referenced by index.
+Snapshots are saved as JSON, gzip compressed unless the file name ends in .json.
+"""
+import gzip
+import json
+import math
+from pathlib import Path
+
+import maya.cmds as cmds
+
+try:
+    from maya.api import OpenMaya as om2
+except ImportError:
+    om2 = None
+
+from riggler.core import graph, handles, nodes, optimize, schema
+
+
+SNAPSHOT_VERSION = 2
+_VALUE_TYPES = {'bool', 'byte', 'char', 'short', 'long', 'float', 'double', 'doubleLinear', 'doubleAngle', 'time', 'enum', 'matrix'}
+_CHANNELS = ['translateX', 'translateY', 'translateZ', 'rotateX', 'rotateY', 'rotateZ', 'scaleX', 'scaleY', 'scaleZ', 'visibility']
+_DYNAMIC_TYPES = (
+    'bool', 'byte', 'double', 'float', 'long', 'short', 'enum', 'doubleLinear', 'doubleAngle', 'double3', 'float3', 'string', 'matrix', 'message'
+)
+_RANGED_TYPES = ('byte', 'double', 'float', 'long', 'short', 'doubleLinear', 'doubleAngle')
+# property: (attributeQuery flag telling whether it's set, attributeQuery flag returning it)
+_RANGE_FLAGS = {'min': ('minExists', 'minimum'), 'max': ('maxExists', 'maximum'), 'softMin': ('softMinExists', 'softMin'), 'softMax': ('softMaxExists', 'softMax')}
+
+
+class _Strings:
+    """
+    Interns strings, so the snapshot stores each one once
+    """
+    def __init__(self):
+        self.strings = []
+        self.indices = {}
+
+    def add(self, string: str) -> int:
+        index = self.indices.get(string)
+        if index is None:
+            index = self.indices[string] = len(self.strings)
+            self.strings.append(string)
+        return index
+
+
+########## Capture ##########
+
+def capture_snapshot(members: list[str]) -> dict:
+    """
+    Records the given nodes, usually everything a component is made of (see lint.get_component_nodes).
+    unitConversion nodes between them are recorded too. Connections to nodes outside of the snapshot are kept by name.
+    """
+    existing = [node for node in dict.fromkeys(members) if cmds.objExists(node)]
+    existing += [node for node in optimize.find_unit_conversions(existing) if node not in existing]
+    # Parents have to be created before their children
+    paths = {node: (cmds.ls(node, long=True) or [node])[0] for node in existing}
+    existing.sort(key=lambda node: paths[node].count('|'))
+    node_indices = {paths[node]: i for i, node in enumerate(existing)}
+
+    strings = _Strings()
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        # Values are stored in the UI units they were captured in
+        'units': {'linear': cmds.currentUnit(query=True, linear=True), 'angle': cmds.currentUnit(query=True, angle=True)},
+        'nodes': [],
+        'attributes': [],
+        'values': [],
+        'channels': [],
+        'curves': [],
+        'connections': [],
+        'shading_groups': [],
+    }
+    for i, node in enumerate(existing):
+        parent = paths[node].rpartition('|')[0] if paths[node].count('|') > 1 else ''
+        snapshot['nodes'].append([strings.add(paths[node].rpartition('|')[2]), strings.add(cmds.nodeType(node)), node_indices.get(parent, -1)])
+        _capture_dynamic_attributes(node, i, strings, snapshot)
+        _capture_values(node, i, strings, snapshot)
+        _capture_channels(node, i, strings, snapshot)
+        if cmds.nodeType(node) == 'nurbsCurve':
+            _capture_curve(node, i, snapshot)
+
+    def reference(node: str) -> int:
+        # Nodes outside of the snapshot are stored as negative string references
+        path = (cmds.ls(node, long=True) or [node])[0]
+        return node_indices[path] if path in node_indices else -1 - strings.add(node)
+
+    for node in existing:
+        connections = cmds.listConnections(node, source=True, destination=False, connections=True, plugs=True, skipConversionNodes=False) or []
+        outgoing = cmds.listConnections(node, source=False, destination=True, connections=True, plugs=True, skipConversionNodes=False) or []
+        pairs = list(zip(connections[1::2], connections[::2]))
+        # Connections into nodes outside of the snapshot, such as shading group memberships, are only seen from this side
+        pairs += [(source, destination) for source, destination in zip(outgoing[::2], outgoing[1::2]) if reference(destination.partition('.')[0]) < 0]
+        for source, destination in pairs:
+            source_node, _, source_attr = source.partition('.')
+            destination_node, _, destination_attr = destination.partition('.')
+            snapshot['connections'].append([
+                reference(source_node), strings.add(source_attr), reference(destination_node), strings.add(destination_attr)
+            ])
+    _capture_shading_groups(strings, snapshot)
+
+    snapshot['strings'] = strings.strings
+    return snapshot
+
+
+def _capture_shading_groups(strings: _Strings, snapshot: dict):
+    """
+    Records the shading groups outside of the snapshot that its shapes are members of with their material and its color,
+    so files written from the snapshot can recreate them
+    """
+    external_nodes = {strings.strings[-1 - reference] for _, _, reference, _ in snapshot['connections'] if reference < 0}
+    for shading_group in sorted(external_nodes):
+        if not cmds.objExists(shading_group) or cmds.nodeType(shading_group) != 'shadingEngine':
+            continue
+        material = (cmds.listConnections(f'{shading_group}.surfaceShader', source=True, destination=False) or [''])[0]
+        material_type = cmds.nodeType(material) if material else ''
+        color = list(cmds.getAttr(f'{material}.color')[0]) if material and cmds.attributeQuery('color', node=material, exists=True) else None
+        snapshot['shading_groups'].append([strings.add(shading_group), strings.add(material), strings.add(material_type), color])
+
+
+def _capture_dynamic_attributes(node: str, index: int, strings: _Strings, snapshot: dict):
+    skipped = []
+    for attr in cmds.listAttr(node, userDefined=True) or []:
+        if cmds.attributeQuery(attr, node=node, listParent=True):
+            # The children of double3 and float3 attributes are created with them
+            continue
+        plug = f'{node}.{attr}'
+        # getAttr can't read message attributes
+        attr_type = 'message' if cmds.attributeQuery(attr, node=node, message=True) else cmds.getAttr(plug, type=True)
+        if attr_type not in _DYNAMIC_TYPES:
+            skipped.append(attr)
+            continue
+        enum_names = cmds.attributeQuery(attr, node=node, listEnum=True)[0] if attr_type == 'enum' else ''
+        short_name = cmds.attributeQuery(attr, node=node, shortName=True)
+        snapshot['attributes'].append([
+            index, strings.add(attr), strings.add(attr_type), strings.add(enum_names), strings.add(short_name),
+            get_attribute_properties(node, attr, attr_type),
+        ])
+        if attr_type != 'message' and not cmds.listConnections(plug, source=True, destination=False):
+            value = cmds.getAttr(plug)
+            if attr_type in ('double3', 'float3'):
+                value = list(value[0])
+            snapshot['values'].append([index, strings.add(attr), value, attr_type == 'matrix'])
+    if skipped:
+        cmds.warning(f'{node}: the snapshot cannot recreate these attributes: {", ".join(skipped)}')
+
+
+def get_attribute_properties(node: str, attr: str, attr_type: str) -> dict:
+    """
+    Returns the range, default and channel states of a dynamic attribute, leaving out the ones addAttr would give it anyway.
+    Ranges and defaults are in UI units, the way attributeQuery answers.
+    """
+    query = lambda **flag: cmds.attributeQuery(attr, node=node, **flag)
+    properties = {}
+    if query(keyable=True):
+        properties['keyable'] = True
+    elif query(channelBox=True):
+        properties['channelBox'] = True
+    if query(hidden=True):
+        properties['hidden'] = True
+    if attr_type in _RANGED_TYPES:
+        for key, (exists_flag, value_flag) in _RANGE_FLAGS.items():
+            if query(**{exists_flag: True}):
+                properties[key] = query(**{value_flag: True})[0]
+    if attr_type in _RANGED_TYPES or attr_type in ('bool', 'enum', 'double3', 'float3'):
+        default = query(listDefault=True) or []
+        if any(default):
+            properties['default'] = default[0] if len(default) == 1 else default
+    return properties
+
+
+def _capture_values(node: str, index: int, strings: _Strings, snapshot: dict):
+    for attr, value, is_matrix in get_non_default_values(node):
+        snapshot['values'].append([index, strings.add(attr), value, is_matrix])
+
+
+def get_non_default_values(node: str) -> list[tuple]:
+    """
+    Returns the (attr, value, is_matrix) of every unconnected static attribute of the node that isn't at its default value.
+    Values are in UI units, the way cmds.getAttr answers.
+    """
+    node_type = cmds.nodeType(node)
+    values = []
+    for attr in cmds.listAttr(node, settable=True, multi=True) or []:
+        info = schema.get_attribute(node_type, attr)
+        if info is None or info['type'] not in _VALUE_TYPES:
+            continue
+        plug = f'{node}.{attr}'
+        try:
+            if cmds.listConnections(plug, source=True, destination=False):
+                continue
+            value = cmds.getAttr(plug)
+        except (RuntimeError, ValueError):
+            continue
+        is_matrix = info['type'] == 'matrix'
+        default = info['default']
+        if is_matrix:
+            default = list(nodes.IDENTITY_MATRIX)
+            value = list(value) if value else default
+        elif info.get('unit') == 'angle' and default is not None:
+            # Defaults are in internal units, getAttr answers in UI units
+            default = math.degrees(default)
+        if not _equals(value, default):
+            values.append((attr, value, is_matrix))
+    return values
+
+
+def _capture_channels(node: str, index: int, strings: _Strings, snapshot: dict):
+    if not cmds.objectType(node, isAType='transform'):
+        return
+    for attr in _CHANNELS:
+        plug = f'{node}.{attr}'
+        state = [cmds.getAttr(plug, lock=True), cmds.getAttr(plug, keyable=True), cmds.getAttr(plug, channelBox=True)]
+        if state != [False, True, False]:
+            snapshot['channels'].append([index, strings.add(attr)] + state)
+
+
+def _capture_curve(node: str, index: int, snapshot: dict):
+    curve_fn = om2.MFnNurbsCurve(_get_object(node))
+    cvs = [coordinate for point in curve_fn.cvPositions() for coordinate in (point.x, point.y, point.z)]
+    snapshot['curves'].append([index, curve_fn.degree, curve_fn.form, list(curve_fn.knots()), cvs])
+
+
+def _equals(value, default) -> bool:
+    if default is None:
+        return False
+    if isinstance(value, (list, tuple)):
+        return isinstance(default, (list, tuple)) and len(value) == len(default) and all(_equals(a, b) for a, b in zip(value, default))
+    return math.isclose(value, default, abs_tol=1e-9)
+
+
+########## Files ##########
+
+def save_snapshot(snapshot: dict, path: Path):
+    path = Path(path)
+    data = json.dumps(snapshot, separators=(',', ':')).encode()
+    if path.suffix != '.json':
+        data = gzip.compress(data)
+    path.write_bytes(data)
+
+
+def load_snapshot(path: Path) -> dict:
+    path = Path(path)
+    data = path.read_bytes()
+    if path.suffix != '.json':
+        data = gzip.decompress(data)
+    snapshot = json.loads(data)
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise RuntimeError(f'{path} is a version {snapshot.get("version")} snapshot, expected version {SNAPSHOT_VERSION}')
+    return snapshot
+
+
+########## Rebuild ##########
+
+def rebuild_snapshot(snapshot: dict) -> list[str]:
+    """
+    Recreates a snapshot through a single MDagModifier: nodes and dynamic attributes first,
+    then curve shapes, values and connections. Values are set in the units the snapshot was captured in.
+    Every connection is checked before the scene is touched: connections to nodes missing from the scene are skipped with a warning,
+    and plugs that wouldn't exist raise. Connections into multi attributes of other nodes, such as shading group memberships,
+    take the next free index, and plugs of other nodes that are already connected are left alone.
+
+    Returns:
+        The names of the created nodes, in snapshot order
+    """
+    connections = _check_connections(snapshot)
+    units = snapshot.get('units') or {}
+    previous_units = {'linear': cmds.currentUnit(query=True, linear=True), 'angle': cmds.currentUnit(query=True, angle=True)}
+    cmds.currentUnit(linear=units.get('linear', previous_units['linear']), angle=units.get('angle', previous_units['angle']))
+    try:
+        return _rebuild(snapshot, connections)
+    finally:
+        cmds.currentUnit(**previous_units)
+
+
+def restore_snapshot(path: Path) -> list[str]:
+    """
+    Loads a snapshot file and rebuilds it
+    """
+    return rebuild_snapshot(load_snapshot(path))
+
+
+def _check_connections(snapshot: dict) -> list[list]:
+    """
+    Returns the connections whose nodes are all there, and raises for plugs that won't exist once the snapshot is rebuilt
+    """
+    strings = snapshot['strings']
+    node_types = [strings[node_type] for _, node_type, _ in snapshot['nodes']]
+    dynamic_attributes = {}  # node index: the names of its dynamic attributes and their children
+    for index, attr, attr_type, _, short_name, _ in snapshot['attributes']:
+        for name in (strings[attr], strings[short_name]):
+            dynamic_attributes.setdefault(index, set()).add(name)
+            if strings[attr_type] in ('double3', 'float3'):
+                dynamic_attributes[index].update(name + axis for axis in 'XYZ')
+
+    node_name = lambda reference: strings[snapshot['nodes'][reference][0]] if reference >= 0 else strings[-1 - reference]
+    connections = []
+    missing_plugs = []
+    for connection in snapshot['connections']:
+        source_node, source_attr, destination_node, destination_attr = connection
+        plugs = [(source_node, strings[source_attr]), (destination_node, strings[destination_attr])]
+        if any(reference < 0 and not cmds.objExists(node_name(reference)) for reference, _ in plugs):
+            cmds.warning(f'Skipping the connection from {node_name(source_node)}.{strings[source_attr]} to {node_name(destination_node)}.{strings[destination_attr]}, a node is missing')
+            continue
+        for reference, attr in plugs:
+            attr_name = attr.rpartition('.')[2].partition('[')[0]
+            if reference >= 0:
+                exists = schema.has_attribute(node_types[reference], attr_name) or attr_name in dynamic_attributes.get(reference, ())
+            else:
+                exists = cmds.attributeQuery(attr_name, node=node_name(reference), exists=True)
+            if not exists:
+                missing_plugs.append(f'{node_name(reference)}.{attr}')
+        connections.append(connection)
+    if missing_plugs:
+        raise RuntimeError(f'The snapshot connects plugs that would not exist: {", ".join(missing_plugs)}')
+    return connections
+
+
+def _rebuild(snapshot: dict, connections: list[list]) -> list[str]:
+    strings = snapshot['strings']
+    modifier = om2.MDagModifier()
+    objects = []
+    for name, node_type, parent in snapshot['nodes']:
+        if parent >= 0:
+            obj = modifier.createNode(strings[node_type], objects[parent])
+        elif graph.is_dag_type(strings[node_type]):
+            obj = modifier.createNode(strings[node_type])
+        else:
+            # MDagModifier.createNode only makes DAG nodes
+            obj = om2.MDGModifier.createNode(modifier, strings[node_type])
+        modifier.renameNode(obj, strings[name])
+        objects.append(obj)
+    for index, attr, attr_type, enum_names, short_name, properties in snapshot['attributes']:
+        attribute = _create_dynamic_attribute(strings[attr], strings[attr_type], strings[enum_names], strings[short_name], properties)
+        modifier.addAttribute(objects[index], attribute)
+    # Plugs can only be found once their nodes and attributes exist
+    modifier.doIt()
+    names = [_get_name(obj) for obj in objects]
+
+    for index, degree, form, knots, cvs in snapshot['curves']:
+        data = om2.MFnNurbsCurveData().create()
+        points = om2.MPointArray([om2.MPoint(cvs[i:i + 3]) for i in range(0, len(cvs), 3)])
+        om2.MFnNurbsCurve().create(points, knots, degree, form, False, True, data)
+        modifier.newPlugValue(handles.find_plug(objects[index], 'create'), data)
+
+    for index, attr, value, is_matrix in snapshot['values']:
+        plug = handles.find_plug(objects[index], strings[attr])
+        if isinstance(value, str):
+            modifier.newPlugValueString(plug, value)
+        else:
+            graph._set_plug_value(modifier, plug, value, is_matrix)
+
+    get_plug = lambda reference, attr: handles.find_plug(objects[reference], attr) if reference >= 0 else graph._get_plug(f'{strings[-1 - reference]}.{attr}')
+    next_indices = {}  # multi attribute of another node: its next free index
+    for source_node, source_attr, destination_node, destination_attr in connections:
+        source_plug = get_plug(source_node, strings[source_attr])
+        destination_attr = strings[destination_attr]
+        if destination_node < 0 and destination_attr.endswith(']'):
+            # The multi may have been filled since the capture, so the element is appended instead of taking over the captured index
+            array_plug = get_plug(destination_node, destination_attr.rpartition('[')[0])
+            array_name = array_plug.name()
+            if array_name not in next_indices:
+                next_indices[array_name] = max(array_plug.getExistingArrayAttributeIndices() or [-1]) + 1
+            destination_plug = array_plug.elementByLogicalIndex(next_indices[array_name])
+            next_indices[array_name] += 1
+        else:
+            destination_plug = get_plug(destination_node, destination_attr)
+            if destination_plug.isDestination:
+                cmds.warning(f'Skipping the connection from {source_plug.name()} to {destination_plug.name()}, the destination is already connected')
+                continue
+        modifier.connect(source_plug, destination_plug)
+    modifier.doIt()
+
+    # Channel states aren't undoable modifier operations, so they're set last
+    for index, attr, locked, keyable, channel_box in snapshot['channels']:
+        plug = handles.find_plug(objects[index], strings[attr])
+        plug.isKeyable = keyable
+        plug.isChannelBox = channel_box
+        plug.isLocked = locked
+    return names
+
+
+def _create_dynamic_attribute(name: str, attr_type: str, enum_names: str, short_name: str=None, properties: dict=None):
+    short_name = short_name or name
+    if attr_type == 'enum':
+        attr_fn = om2.MFnEnumAttribute()
+        attribute = attr_fn.create(name, short_name)
+        for i, field in enumerate(enum_names.split(':')):
+            field, _, value = field.partition('=')
+            attr_fn.addField(field, int(value) if value else i)
+    elif attr_type in ('string', 'matrix'):
+        attr_fn = om2.MFnTypedAttribute()
+        attribute = attr_fn.create(name, short_name, om2.MFnData.kString if attr_type == 'string' else om2.MFnData.kMatrix)
+    elif attr_type == 'message':
+        attr_fn = om2.MFnMessageAttribute()
+        attribute = attr_fn.create(name, short_name)
+    elif attr_type in ('doubleLinear', 'doubleAngle'):
+        attr_fn = om2.MFnUnitAttribute()
+        unit_type = om2.MFnUnitAttribute.kDistance if attr_type == 'doubleLinear' else om2.MFnUnitAttribute.kAngle
+        attribute = attr_fn.create(name, short_name, unit_type)
+    elif attr_type in ('double3', 'float3'):
+        attr_fn = om2.MFnNumericAttribute()
+        numeric_type = om2.MFnNumericData.kDouble if attr_type == 'double3' else om2.MFnNumericData.kFloat
+        children = [attr_fn.create(name + axis, short_name + axis, numeric_type) for axis in 'XYZ']
+        attribute = attr_fn.create(name, short_name, *children)
+    else:
+        numeric_types = {
+            'bool': om2.MFnNumericData.kBoolean,
+            'byte': om2.MFnNumericData.kByte,
+            'double': om2.MFnNumericData.kDouble,
+            'float': om2.MFnNumericData.kFloat,
+            'long': om2.MFnNumericData.kInt,
+            'short': om2.MFnNumericData.kShort,
+        }
+        attr_fn = om2.MFnNumericAttribute()
+        attribute = attr_fn.create(name, short_name, numeric_types[attr_type])
+    _set_attribute_properties(attr_fn, attr_type, properties or {})
+    return attribute
+
+
+def _set_attribute_properties(attr_fn, attr_type: str, properties: dict):
+    """
+    Gives a new dynamic attribute the range, default and channel states from get_attribute_properties
+    """
+    attr_fn.keyable = properties.get('keyable', False)
+    attr_fn.channelBox = properties.get('channelBox', False)
+    attr_fn.hidden = properties.get('hidden', False)
+    # The recorded values are in the UI units, which rebuild_snapshot sets to the captured ones
+    if attr_type == 'doubleAngle':
+        to_internal = lambda value: om2.MAngle(value, om2.MAngle.uiUnit())
+    elif attr_type == 'doubleLinear':
+        to_internal = lambda value: om2.MDistance(value, om2.MDistance.uiUnit())
+    else:
+        to_internal = lambda value: value
+    for key, setter in (('min', 'setMin'), ('max', 'setMax'), ('softMin', 'setSoftMin'), ('softMax', 'setSoftMax')):
+        if key in properties:
+            getattr(attr_fn, setter)(to_internal(properties[key]))
+    if 'default' in properties:
+        default = properties['default']
+        attr_fn.default = tuple(default) if isinstance(default, list) else to_internal(default)
+
+
+def _get_object(node: str):
+    selection = om2.MSelectionList()
+    selection.add(node)
+    return selection.getDependNode(0)
+
+
+def _get_name(obj) -> str:
+    if obj.hasFn(om2.MFn.kDagNode):
+        return om2.MFnDagNode(obj).partialPathName()
+    return om2.MFnDependencyNode(obj).name()
@@ -1,9 +1,11 @@
 import maya.cmds as cmds
+from riggler.core import nodes, session
 
 
 def get_world_up(negative=False):
-    world_up = [0, 1, 0] if cmds.upAxis(query=True, axis=True) == 'y' else [0, 0, 1]
+    up_axis = session.cached('up_axis', lambda: cmds.upAxis(query=True, axis=True))
+    world_up = [0, 1, 0] if up_axis == 'y' else [0, 0, 1]
     if negative:
         for i, axis in enumerate(world_up):
             world_up[i] = axis*-1
-    return tuple(world_up)
+    return nodes.pooled_constant(world_up)
@@ -0,0 +1,85 @@
+"""
+An undoable command that runs OpenMaya modifiers, so work applied through them is one step in Maya's undo queue like any cmds call,
+and undoing a build chunk removes the nodes the modifiers created too.
+This file is also the Maya plugin registering the command, it's loaded the first time work is applied.
+"""
+from pathlib import Path
+
+try:
+    import maya.cmds as cmds
+    from maya.api import OpenMaya as om2
+except ImportError:
+    cmds = om2 = None
+
+
+COMMAND_NAME = 'rigglerApplyModifiers'
+_pending = []  # work handed to the command, taken by the command as soon as it runs
+
+
+def maya_useNewAPI():
+    """
+    Tells Maya the plugin uses the Python API 2.0
+    """
+
+
+def apply(work):
+    """
+    Runs work inside the undoable command.
+
+    Args:
+        work: A function taking a list, which it appends every modifier to before calling the modifier's doIt.
+            The command undoes the modifiers in reverse order when Maya undoes it, and right away when work raises.
+    """
+    _load_plugin()
+    _pending.append(work)
+    try:
+        getattr(cmds, COMMAND_NAME)()
+    finally:
+        if work in _pending:
+            _pending.remove(work)
+
+
+def _load_plugin():
+    path = str(Path(__file__).with_suffix('.py'))
+    if not cmds.pluginInfo(path, query=True, loaded=True):
+        cmds.loadPlugin(path, quiet=True)
+
+
+if om2 is not None:
+    class ApplyModifiersCommand(om2.MPxCommand):
+        def __init__(self):
+            super().__init__()
+            self.modifiers = []
+
+        @classmethod
+        def create(cls):
+            return cls()
+
+        def isUndoable(self) -> bool:
+            return True
+
+        def doIt(self, args):
+            # Maya loads this file as a plugin module of its own, the work is handed over through the package module
+            from riggler.core import undoable
+            work = undoable._pending.pop()
+            try:
+                work(self.modifiers)
+            except Exception:
+                self.undoIt()
+                raise
+
+        def redoIt(self):
+            for modifier in self.modifiers:
+                modifier.doIt()
+
+        def undoIt(self):
+            for modifier in reversed(self.modifiers):
+                modifier.undoIt()
+
+
+def initializePlugin(plugin):
+    om2.MFnPlugin(plugin).registerCommand(COMMAND_NAME, ApplyModifiersCommand.create)
+
+
+def uninitializePlugin(plugin):
+    om2.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
@@ -18,7 +18,6 @@ DESCRIPTION = "Test control module"
 class Guide(component.Component):
     def __init__(self, name, parent=None):
         super().__init__(name=name, parent=parent)
-        self.name = ''
         self.guide_input = ''
         self.input = ''
         self.guide_output = ''
@@ -54,8 +53,8 @@ class Guide(component.Component):
         self.pole_vector_ctl = shapes.create_ctrl(shapes.ctrlShapes.diamond, self.name + '_pole_vector_ctl', self.org_grps["controls_grp"])
 
         self.shoulder_ik_jnt = shapes.create_joint(f'{self.name}_shoulder_IK_jnt', self.org_grps["internals_grp"], (0, 0, 0))
-        self.elbow_ik_jnt = shapes.create_joint(f'{self.name}_elbow_IK_jnt', self.shoulder_ik_jnt, (1, 0, 0))
-        self.wrist_ik_jnt = shapes.create_joint(f'{self.name}_wrist_IK_jnt', self.elbow_ik_jnt, (2, 0, 0))
+        self.elbow_ik_jnt = shapes.create_joint(f'{self.name}_elbow_IK_jnt', self.shoulder_ik_jnt, (0, 0, 0))
+        self.wrist_ik_jnt = shapes.create_joint(f'{self.name}_wrist_IK_jnt', self.elbow_ik_jnt, (0, 0, 0))
 
         for control in [self.shoulder_fk_ctl, self.elbow_fk_ctl, self.elbow_ik_ctl, self.wrist_fk_ctl, self.wrist_ik_ctl, self.pole_vector_ctl]:
             attribute.lockAndHideAttributes(control, ['sx', 'sy', 'sz', 'v'])
@@ -156,7 +155,7 @@ class Guide(component.Component):
             name=f'{self.wrist_fk_ctl}_orientPlane_pole_vector_enable'
             )
         for axis in 'XYZ':
-            cmds.connectAttr(f'{orientPlane_pole_vector_enable}.selector', f'{self.shoulder_guide}|pointer{axis}Shape.visibility')
+            nodes.connect_attr(f'{orientPlane_pole_vector_enable}.selector', f'{self.shoulder_guide}|pointer{axis}Shape.visibility')
         nodes.create_reverse_node(
             input=f'{orientPlane_pole_vector_enable}.selector',
             targets=f'{self.pole_vector_guide}.v'
@@ -198,144 +197,24 @@ class Guide(component.Component):
             name=f'{self.wrist_fk_ctl}_orientPlane_pole_vector_enable_02'
         )
         ################# Experimental Pole Vector Appproach (End) #################
-        elbow_ik_ctl_WM = nodes.create_blendMatrix_node(
-            input=f'{orientPlane_pole_vector_enable_02}.output',
-            target_matrix=f'{self.wrist_ik_ctl}.worldMatrix[0]',
-            weight=0.5,
-            scale_weight=0,
-            rotate_weight=0,
-            shear_weight=0,
-            name=f'{self.elbow_ik_ctl}_WM'
-        )
-        elbow_ik_ctl_WM_WM = self.connect_to_input(elbow_ik_ctl_WM, 'inputMatrix')
         wrist_ik_ctl_WM = self.connect_to_input(self.wrist_ik_ctl)
         
         # Joint setup
-        cmds.connectAttr(f'{shoulder_fk_ctl_WM}.matrixSum', f'{self.shoulder_ik_jnt}.offsetParentMatrix')
-        ik_handle, effector = cmds.ikHandle(startJoint=self.shoulder_ik_jnt, endEffector=self.wrist_ik_jnt, solver='ikRPsolver', name=f'{self.name}_ikHandle')
-        cmds.parent(ik_handle, self.org_grps["internals_grp"])
-        effector = cmds.rename(effector, f'{self.name}_effector')
-        cmds.setAttr(f'{ik_handle}.translate', 0, 0, 0)
-        elbow_ik_ctl_WM_axisY = nodes.create_multiplyVectorByMatrix_node(
-            inputs=[0, -1, 0],
-            matrix=f'{elbow_ik_ctl_WM}.outputMatrix',
-            name=f'{elbow_ik_ctl_WM}_axisY'
-        )
-        cmds.connectAttr(f'{elbow_ik_ctl_WM_axisY}.output', f'{ik_handle}.poleVector')
-        cmds.connectAttr(f'{self.elbow_ik_ctl}.rotateX', f'{ik_handle}.twist')
-
-        wrist_ik_ctl_outWTM = nodes.create_pickMatrix_node(
-            f'{self.wrist_ik_ctl}.worldMatrix[0]',
-            f'{ik_handle}.offsetParentMatrix',
-            scale=False,
-            rotate=False,
-            shear=False,
-            name=f'{self.wrist_ik_ctl}_outWTM'
-        )
-
-        upper_initialLength = nodes.create_distanceBetween_node(
-            f'{self.shoulder_guide}.worldMatrix[0]',
-            f'{self.elbow_guide}.worldMatrix[0]',
-            name=f'{self.name}_upper_initialLength'
-        )
-        lower_initialLength = nodes.create_distanceBetween_node(
+        nodes.create_two_bone_ik(
+            f'{shoulder_fk_ctl_WM}.matrixSum',
             f'{self.elbow_guide}.worldMatrix[0]',
             f'{self.wrist_guide}.worldMatrix[0]',
-            name=f'{self.name}_lower_initialLength'
-        )
-        initialLength = nodes.create_sum_node(
-            [f'{upper_initialLength}.distance', f'{lower_initialLength}.distance'],
-            name=f'{self.name}_initialLength'
-        )
-        length = nodes.create_distanceBetween_node(
-            f'{shoulder_fk_ctl_WM}.matrixSum',
             f'{self.wrist_ik_ctl}.worldMatrix[0]',
-            name=f'{self.name}_length'
-        )
-        lengthRatio = nodes.create_divide_node(
-            f'{length}.distance',
-            f'{initialLength}.output',
-            name=f'{self.name}_lengthRatio'
-        )
-        scalar = nodes.create_max_node(
-            [f'{lengthRatio}.output', 1],
-            name=f'{self.name}_scalar'
-        )
-        upper_length = nodes.create_multiply_node(
-            [f'{upper_initialLength}.distance', f'{scalar}.output'],
-            f'{self.elbow_ik_jnt}.translateX',
-            name=f'{self.name}_upper_length'
-        )
-        lower_length = nodes.create_multiply_node(
-            [f'{lower_initialLength}.distance', f'{scalar}.output'],
-            f'{self.wrist_ik_jnt}.translateX',
-            name=f'{self.name}_lower_length'
-        )
-
-        return
-        # pythagorean theorem, getting the length of side "B"
-        a2 = nodes.create_power_node(
-            f'{upper_length}.output',
-            name='a2'
-        )
-        b2 = nodes.create_power_node(
-            f'{lower_length}.output',
-            name='b2'
-        )
-        c2 = nodes.create_power_node(
-            f'{length}.distance',
-            name='c2'
-        )
-        a2_c2_sum = nodes.create_sum_node(
-            [f'{a2}.output', f'{c2}.output'],
-            name='a2_c2_sum'
-        )
-        a2_b2_sum = nodes.create_sum_node(
-            [f'{a2}.output', f'{b2}.output'],
-            name='a2_b2_sum'
-        )
-        subtract1 = nodes.create_subtract_node(
-            f'{a2_c2_sum}.output', 
-            f'{b2}.output',
-            name='subtract1'
-        )
-        _2ac = nodes.create_multiply_node(
-            [2, f'{length}.distance', f'{upper_length}.output'],
-            name='_2ac'
-        )
-        divide1 = nodes.create_divide_node(
-            f'{subtract1}.output',
-            f'{_2ac}.output',
-            name='divide1'
-        )
-        acos1 = nodes.create_acos_node(
-            f'{divide1}.output',
-            f'{self.shoulder_ik_jnt}.rotateY',
-            'acos1'
-        )
-        subtract2 = nodes.create_subtract_node(
-            f'{a2_b2_sum}.output',
-            f'{_2ac}.output',
-            name='subtract1'
-        )
-        _2ab = nodes.create_multiply_node(
-            [2, f'{upper_length}.output', f'{lower_length}.output'],
-            name='_2ab'
-        )
-        divide2 = nodes.create_divide_node(
-            f'{subtract2}.output', 
-            f'{_2ab}.output',
-            name='divide2'
-        )
-        acos2 = nodes.create_acos_node(
-            f'{divide1}.output',
-            name='acos2'
-        )
-        subtract3 = nodes.create_subtract_node(
-            f'{acos2}.output', 
-            180,
-            f'{self.elbow_ik_jnt}.rotateY',
-            name='subtract3'
+            f'{orientPlane_pole_vector_enable_02}.output',
+            root_guide_matrix=f'{self.shoulder_guide}.worldMatrix[0]',
+            pole_vector=(0, -1, 0),
+            twist_matrix=f'{self.elbow_ik_ctl}.matrix',
+            stretch=1,
+            local_outputs=True,
+            root_targets=f'{self.shoulder_ik_jnt}.offsetParentMatrix',
+            mid_targets=f'{self.elbow_ik_jnt}.offsetParentMatrix',
+            end_targets=f'{self.wrist_ik_jnt}.offsetParentMatrix',
+            name=f'{self.name}_ik'
         )
 
 
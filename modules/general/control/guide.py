@@ -18,7 +18,6 @@ DESCRIPTION = "Test control module"
 class Guide(component.Component):
     def __init__(self, name, parent=None):
         super().__init__(name=name, parent=parent)
-        self.name = ''
         self.guide_input = ''
         self.input = ''
         self.guide_output = ''
@@ -0,0 +1,11 @@
+"""
+Makes the repository importable as the riggler package, the way Maya sees it once it's on the scripts path
+"""
+import sys
+import types
+from pathlib import Path
+
+if 'riggler' not in sys.modules:
+    riggler = types.ModuleType('riggler')
+    riggler.__path__ = [str(Path(__file__).resolve().parents[1])]
+    sys.modules['riggler'] = riggler
@@ -0,0 +1,105 @@
+"""
+Offline evaluation of recorded graphs, runs without Maya
+"""
+import math
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from riggler.core import evaluate, graph
+
+
+def _translation(x: float, y: float, z: float) -> list[float]:
+    return [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, x, y, z, 1]
+
+
+def _rotation_z(degrees: float) -> list[float]:
+    cosine, sine = math.cos(math.radians(degrees)), math.sin(math.radians(degrees))
+    return [cosine, sine, 0, 0, -sine, cosine, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]
+
+
+def test_mult_matrix_decomposes_to_the_composed_transform():
+    build_graph = graph.BuildGraph()
+    build_graph.add_node('multMatrix', 'mult')
+    build_graph.add_node('decomposeMatrix', 'decompose')
+    build_graph.add_value('mult.matrixIn[0]', _rotation_z(90), is_matrix=True)
+    build_graph.add_connection('ctl.worldMatrix[0]', 'mult.matrixIn[1]')
+    build_graph.add_connection('mult.matrixSum', 'decompose.inputMatrix')
+    build_graph.add_connection('decompose.outputTranslate', 'jnt.translate')
+
+    evaluator = evaluate.GraphEvaluator(build_graph)
+    assert evaluator.get_inputs() == ['ctl.worldMatrix[0]']
+    results = evaluator.evaluate({'ctl.worldMatrix[0]': [_translation(1, 2, 3), _translation(0, 0, 5)]})
+
+    np.testing.assert_allclose(results['jnt.translate'], [[1, 2, 3], [0, 0, 5]], atol=1e-9)
+    np.testing.assert_allclose(np.degrees(results['decompose.outputRotate']), [[0, 0, 90], [0, 0, 90]], atol=1e-9)
+    np.testing.assert_allclose(results['decompose.outputScale'], [[1, 1, 1], [1, 1, 1]], atol=1e-9)
+
+
+def test_law_of_cosines_matches_the_elbow_angle():
+    # An upper bone of 3 and a lower bone of 4 reaching 5 away bend the elbow to a right angle
+    build_graph = graph.BuildGraph()
+    for name, node_type in (
+        ('upper_squared', 'power'), ('lower_squared', 'power'), ('reach_squared', 'power'),
+        ('sum', 'sum'), ('difference', 'subtract'), ('divisor', 'multiply'), ('ratio', 'divide'), ('angle', 'acos'),
+    ):
+        build_graph.add_node(node_type, name)
+    for name, plug in (('upper_squared', 'arm.upper'), ('lower_squared', 'arm.lower'), ('reach_squared', 'arm.reach')):
+        build_graph.add_connection(plug, f'{name}.input')
+        build_graph.add_value(f'{name}.exponent', 2)
+    build_graph.add_connection('upper_squared.output', 'sum.input[0]')
+    build_graph.add_connection('lower_squared.output', 'sum.input[1]')
+    build_graph.add_connection('sum.output', 'difference.input1')
+    build_graph.add_connection('reach_squared.output', 'difference.input2')
+    build_graph.add_connection('arm.upper', 'divisor.input[0]')
+    build_graph.add_connection('arm.lower', 'divisor.input[1]')
+    build_graph.add_value('divisor.input[2]', 2)
+    build_graph.add_connection('difference.output', 'ratio.input1')
+    build_graph.add_connection('divisor.output', 'ratio.input2')
+    build_graph.add_connection('ratio.output', 'angle.input')
+
+    results = evaluate.evaluate_graph(build_graph, {'arm.upper': 3, 'arm.lower': 4, 'arm.reach': [5, 7]})
+    np.testing.assert_allclose(np.degrees(results['angle.output']), [90, 180], atol=1e-6)
+
+
+def test_utility_nodes():
+    build_graph = graph.BuildGraph()
+    build_graph.add_node('reverse', 'reverse')
+    build_graph.add_node('condition', 'condition')
+    build_graph.add_node('plusMinusAverage', 'average')
+    build_graph.add_node('remapValue', 'remap')
+    build_graph.add_connection('ctl.switch', 'reverse.inputX')
+    build_graph.add_connection('ctl.switch', 'condition.firstTerm')
+    build_graph.add_value('condition.secondTerm', 0.5)
+    build_graph.add_value('condition.operation', 2)
+    build_graph.add_value('condition.colorIfTrue', (1, 2, 3))
+    build_graph.add_value('average.operation', 3)
+    build_graph.add_connection('ctl.switch', 'average.input1D[0]')
+    build_graph.add_value('average.input1D[1]', 1)
+    build_graph.add_connection('ctl.switch', 'remap.inputValue')
+    build_graph.add_value('remap.inputMax', 0.5)
+    build_graph.add_value('remap.outputMax', 10)
+
+    results = evaluate.evaluate_graph(build_graph, {'ctl.switch': [0, 0.25, 1]})
+    np.testing.assert_allclose(results['reverse.outputX'], [1, 0.75, 0])
+    np.testing.assert_allclose(results['condition.outColor'], [[1, 1, 1], [1, 1, 1], [1, 2, 3]])
+    np.testing.assert_allclose(results['average.output1D'], [0.5, 0.625, 1])
+    np.testing.assert_allclose(results['remap.outValue'], [0, 5, 10])
+
+
+def test_only_the_requested_outputs_are_evaluated():
+    build_graph = graph.BuildGraph()
+    build_graph.add_node('curveInfo', 'info')
+    build_graph.add_node('negate', 'negate')
+    build_graph.add_connection('curveShape1.worldSpace[0]', 'info.inputCurve')
+    build_graph.add_connection('ctl.translateX', 'negate.input')
+    build_graph.add_connection('negate.output', 'jnt.translateX')
+
+    evaluator = evaluate.GraphEvaluator(build_graph)
+    with pytest.raises(RuntimeError, match='curveInfo'):
+        evaluator.evaluate({'ctl.translateX': 1})
+    assert evaluator.get_inputs(['jnt.translateX']) == ['ctl.translateX']
+    results = evaluator.evaluate({'ctl.translateX': [1, 2]}, outputs=['jnt.translateX'])
+    assert list(results) == ['jnt.translateX']
+    np.testing.assert_allclose(results['jnt.translateX'], [-1, -2])
@@ -0,0 +1,67 @@
+"""
+Lowering of expressions before any node is built. Needs maya.cmds to import, but never touches the scene.
+"""
+import ast
+import math
+
+import pytest
+
+pytest.importorskip('maya.cmds')
+
+from riggler.core import expression
+
+
+A, B, C = ('plug', 'x.a'), ('plug', 'x.b'), ('plug', 'x.c')
+
+
+def _lower(source: str) -> tuple:
+    return expression._lower(ast.parse(source, mode='eval').body, {'a': 'x.a', 'b': 'x.b', 'c': 'x.c', 'k': 3})
+
+
+def test_constants_are_computed():
+    assert _lower('2 * pi') == ('const', 2 * math.pi)
+    assert _lower('k ** 2 - 1') == ('const', 8)
+    assert _lower('max(2, k)') == ('const', 3)
+
+
+def test_sums_are_flattened():
+    assert _lower('a - b') == ('sum', (A,), (B,))
+    assert _lower('a + (b + c) + 1 - 1') == ('sum', (A, B, C), ())
+    assert _lower('1 - (a - 4)') == ('sum', (('const', 5),), (A,))
+    assert _lower('-a') == ('sum', (), (A,))
+    # Subtracting a product flips its constant factor instead of adding a subtract node
+    assert _lower('a - 2*b') == ('sum', (A, ('product', (('const', -2), B), ())), ())
+
+
+def test_products_are_flattened():
+    assert _lower('a / 4') == ('product', (('const', 0.25), A), ())
+    assert _lower('a * b / (c * 2)') == ('product', (('const', 0.5), A, B), (C,))
+    assert _lower('0 * a') == ('const', 0)
+    assert _lower('b * a') == _lower('a * b')
+    with pytest.raises(RuntimeError, match='Division by zero'):
+        _lower('a / 0')
+
+
+def test_powers_and_calls():
+    assert _lower('sqrt(a)') == ('power', A, ('const', 0.5))
+    assert _lower('a ** 1') == A
+    assert _lower('a ** 0') == ('const', 1)
+    assert _lower('a % 2') == ('modulo', A, ('const', 2))
+    # Nested min calls merge into one node along with their constant arguments
+    assert _lower('min(a, min(b, 3), 5)') == ('call', 'min', (('const', 3), A, B))
+    with pytest.raises(RuntimeError, match='takes 1 or 2 arguments'):
+        _lower('log(a, 2, 3)')
+
+
+def test_constants_follow_the_maya_nodes():
+    assert _lower('round(2.5)') == ('const', 3)
+    assert _lower('round(-2.5)') == ('const', -3)
+    assert _lower('-7 % 3') == ('const', 2)
+    assert _lower('7 % -3') == ('const', -2)
+
+
+@pytest.mark.parametrize('source', ['(-8) ** (1/3)', 'acos(2)', 'log(0)', 'sqrt(-1)', 'a + 5 % 0'])
+def test_constants_without_a_real_result_raise(source):
+    # Raised while lowering, before any node is built
+    with pytest.raises(RuntimeError, match='no real result|cannot be computed'):
+        expression.compile_expression(source, a='x.a')
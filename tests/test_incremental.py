@@ -0,0 +1,27 @@
+"""
+Input hashes of incremental builds. Needs maya.cmds to import, but never touches the scene.
+"""
+import pytest
+
+pytest.importorskip('maya.cmds')
+
+from riggler.core import incremental
+
+
+def test_floats_are_rounded_and_negative_zero_is_zero():
+    assert incremental._round_floats(1.23456789) == 1.234568
+    assert str(incremental._round_floats(-0.0000001)) == '0.0'
+    assert incremental._round_floats({'a': (0.1 + 0.2, [2.0000004, 'x', 3])}) == {'a': [0.3, [2.0, 'x', 3]]}
+
+
+def test_evaluation_noise_hashes_the_same():
+    guides = {'arm_guide': [1.0, 0.0, 2.5]}
+    noisy = {'arm_guide': [1.0000000001, -0.0000000001, 2.4999999999]}
+    assert incremental.hash_inputs({'guides': guides}) == incremental.hash_inputs({'guides': noisy})
+
+
+def test_changes_and_key_order():
+    assert incremental.hash_inputs({'a': 1, 'b': 2}) == incremental.hash_inputs({'b': 2, 'a': 1})
+    assert incremental.hash_inputs({'a': 1.0}) != incremental.hash_inputs({'a': 1.001})
+    # Values JSON can't hold are hashed by their repr
+    assert incremental.hash_inputs({'a': {1, 2}}) == incremental.hash_inputs({'a': {2, 1}})
@@ -0,0 +1,54 @@
+"""
+Maya ASCII emitted straight from recorded graphs, runs without Maya
+"""
+from riggler.core import graph, mayaascii
+
+
+def _build_graph() -> graph.BuildGraph:
+    # Created out of order, so the decompose reads a node created after it
+    build_graph = graph.BuildGraph()
+    build_graph.add_node('decomposeMatrix', 'decompose')
+    build_graph.add_node('multMatrix', 'mult')
+    build_graph.add_value('mult.matrixIn[0]', [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0.5, 2.0, 0, 1], is_matrix=True)
+    build_graph.add_connection('ctl.worldMatrix[0]', 'mult.matrixIn[1]')
+    build_graph.add_connection('mult.matrixSum', 'decompose.inputMatrix')
+    build_graph.add_connection('decompose.outputTranslate', 'jnt.translate')
+    return build_graph
+
+
+def test_nodes_come_after_their_sources():
+    lines = mayaascii.emit_graph(_build_graph())
+    create_lines = [line for line in lines if line.startswith('createNode')]
+    assert create_lines == ['createNode multMatrix -n "mult";', 'createNode decomposeMatrix -n "decompose";']
+    assert lines[1] == '\tsetAttr ".matrixIn[0]" -type "matrix" 1 0 0 0 0 1 0 0 0 0 1 0 0.5 2 0 1;'
+
+
+def test_external_connections_are_commented_out():
+    lines = mayaascii.emit_graph(_build_graph())
+    assert 'connectAttr "mult.matrixSum" "decompose.inputMatrix";' in lines
+    assert '// connectAttr "ctl.worldMatrix[0]" "mult.matrixIn[1]";' in lines
+    assert '// connectAttr "decompose.outputTranslate" "jnt.translate";' in lines
+
+    lines = mayaascii.emit_graph(_build_graph(), external_connections=True)
+    assert 'connectAttr "ctl.worldMatrix[0]" "mult.matrixIn[1]";' in lines
+    # Multi attributes of nodes outside of the file are appended to instead of indexed
+    build_graph = graph.BuildGraph()
+    build_graph.add_node('sum', 'sum')
+    build_graph.add_connection('sum.output', 'other.input[3]')
+    assert mayaascii.emit_graph(build_graph, external_connections=True)[-1] == 'connectAttr "sum.output" "other.input" -na;'
+
+
+def test_values_are_formatted_like_maya():
+    assert mayaascii._set_attr_line('useScale', False) == '\tsetAttr ".useScale" no;'
+    assert mayaascii._set_attr_line('input', 2.0) == '\tsetAttr ".input" 2;'
+    assert mayaascii._set_attr_line('point1', (1, 2.5, -3)) == '\tsetAttr ".point1" 1 2.5 -3;'
+    assert mayaascii._set_attr_line('notes', 'say "hi"') == '\tsetAttr ".notes" -type "string" "say \\"hi\\"";'
+
+
+def test_saved_file_has_the_header_and_units(tmp_path):
+    path = tmp_path / 'graph.ma'
+    mayaascii.save_graph(_build_graph(), path, angle='radian')
+    lines = path.read_text().splitlines()
+    assert lines[0] == f'//Maya ASCII {mayaascii.MAYA_VERSION} scene'
+    assert 'currentUnit -l centimeter -a radian -t film;' in lines
+    assert lines[-1] == '// End of graph.ma'
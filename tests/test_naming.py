@@ -0,0 +1,37 @@
+"""
+The name index used inside naming.unique_names(). Needs maya.cmds to import, but never touches the scene.
+"""
+import pytest
+
+pytest.importorskip('maya.cmds')
+
+from riggler.core import naming
+
+
+def test_free_names_are_handed_out_as_is():
+    registry = naming.NameRegistry(['arm_jnt'])
+    assert registry.get_unique_name('leg_jnt') == 'leg_jnt'
+    assert 'leg_jnt' in registry
+    assert registry.get_unique_name('arm_jnt') == 'arm_jnt1'
+
+
+def test_default_names_are_numbered_from_one():
+    registry = naming.NameRegistry(['multMatrix1', 'multMatrix2'])
+    assert registry.get_unique_name('multMatrix', exact=False) == 'multMatrix3'
+    assert registry.get_unique_name('multMatrix', exact=False) == 'multMatrix4'
+    assert len(registry) == 4
+
+
+def test_taken_names_outside_of_the_registry_are_skipped():
+    pending = {'sum1', 'sum2'}
+    registry = naming.NameRegistry()
+    assert registry.get_unique_name('sum', exact=False, taken=pending.__contains__) == 'sum3'
+
+
+def test_discarded_names_are_handed_out_again():
+    registry = naming.NameRegistry()
+    names = [registry.get_unique_name('ctl', exact=False) for _ in range(3)]
+    assert names == ['ctl1', 'ctl2', 'ctl3']
+    registry.discard('ctl2')
+    assert registry.get_unique_name('ctl', exact=False) == 'ctl2'
+    assert registry.get_unique_name('ctl', exact=False) == 'ctl4'
@@ -0,0 +1,60 @@
+"""
+Constant folding of math nodes. Needs maya.cmds to import, but never touches the scene since every node here is folded.
+"""
+import pytest
+
+pytest.importorskip('maya.cmds')
+
+from riggler.core import nodes
+
+
+MATRIX = (1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 2, 3, 4, 1)
+
+
+def test_constant_inputs_are_computed():
+    with nodes.constant_folding():
+        assert nodes.get_folded_input(f'{nodes.create_sum_node([1, 2, 3.5])}.output') == 6.5
+        assert nodes.get_folded_input(f'{nodes.create_multiply_node([2, 4])}.output') == 8
+        assert nodes.get_folded_input(f'{nodes.create_subtract_node(1, 3)}.output') == -2
+        assert nodes.get_folded_input(f'{nodes.create_absolute_node(-2)}.output') == 2
+
+
+def test_folded_nodes_feed_later_folds():
+    with nodes.constant_folding():
+        total = nodes.create_sum_node([1, 2])
+        product = nodes.create_multiply_node([f'{total}.output', 4])
+        assert nodes.get_folded_input(f'{product}.output') == 12
+
+
+def test_identity_operands_forward_the_plug():
+    with nodes.constant_folding():
+        assert nodes.get_folded_input(f'{nodes.create_sum_node(["ctl.tx", 0])}.output') == 'ctl.tx'
+        assert nodes.get_folded_input(f'{nodes.create_multiply_node(["ctl.tx", 0.5, 2])}.output') == 'ctl.tx'
+        assert nodes.get_folded_input(f'{nodes.create_multMatrix_node(["ctl.worldMatrix[0]", nodes.IDENTITY_MATRIX])}.matrixSum') == 'ctl.worldMatrix[0]'
+
+
+def test_matrix_folds():
+    inverse = (1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, -2, -3, -4, 1)
+    with nodes.constant_folding():
+        node = nodes.create_inverseMatrix_node(MATRIX)
+        assert nodes.get_folded_input(f'{node}.outputMatrix') == pytest.approx(inverse)
+        node = nodes.create_multMatrix_node([MATRIX, inverse])
+        assert nodes.get_folded_input(f'{node}.matrixSum') == pytest.approx(nodes.IDENTITY_MATRIX)
+
+
+def test_only_neighbouring_constant_matrices_are_merged():
+    with nodes.constant_folding():
+        node, inputs = nodes._fold_node('multMatrix', [MATRIX, MATRIX, 'ctl.worldMatrix[0]', MATRIX])
+    assert node is None
+    assert len(inputs) == 3
+    assert inputs[0] == pytest.approx((1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 4, 6, 8, 1))
+    assert inputs[1:] == ['ctl.worldMatrix[0]', MATRIX]
+
+
+def test_nodes_without_a_result_are_left_alone():
+    with nodes.constant_folding():
+        assert nodes._fold_node('divide', [1, 0]) == (None, [1, 0])
+        assert nodes._fold_node('power', [-8, 1 / 3]) == (None, [-8, 1 / 3])
+        assert nodes._fold_node('subtract', [1]) == (None, [1])
+    # Nothing is folded outside of the context
+    assert nodes._fold_node('sum', [1, 2]) == (None, [1, 2])
@@ -0,0 +1,42 @@
+"""
+Splitting component specs into independent jobs. Needs maya.cmds to import, but never touches the scene.
+"""
+import pytest
+
+pytest.importorskip('maya.cmds')
+
+from riggler.core import parallel
+
+
+def _specs(*pairs) -> list[dict]:
+    return [{'name': name, 'parent': parent} for name, parent in pairs]
+
+
+def _names(jobs: list) -> list[list[str]]:
+    return [[spec['name'] for spec in job] for job in jobs]
+
+
+SPECS = _specs(
+    ('root', None), ('spine', 'root'), ('arm_L', 'spine'), ('hand_L', 'arm_L'), ('arm_R', 'spine'), ('leg_L', 'root'), ('prop', None),
+)
+
+
+def test_separate_trees_are_separate_jobs():
+    assert _names(parallel.split_jobs(SPECS, 1)) == [['root', 'spine', 'leg_L', 'arm_L', 'arm_R', 'hand_L'], ['prop']]
+
+
+def test_the_largest_job_is_split_at_its_root():
+    jobs = _names(parallel.split_jobs(SPECS, 3))
+    assert jobs == [['prop'], ['root'], ['spine', 'arm_L', 'arm_R', 'hand_L'], ['leg_L']]
+    # Every spec ends up in exactly one job, after its parent when they share a job
+    assert sorted(name for job in jobs for name in job) == sorted(spec['name'] for spec in SPECS)
+
+
+def test_splitting_stops_when_nothing_is_left_to_split():
+    jobs = parallel.split_jobs(_specs(('a', None), ('b', None)), 8)
+    assert _names(jobs) == [['a'], ['b']]
+
+
+def test_parent_cycles_raise():
+    with pytest.raises(RuntimeError, match='cycle'):
+        parallel.split_jobs(_specs(('a', None), ('b', 'c'), ('c', 'b')), 2)
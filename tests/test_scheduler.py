@@ -0,0 +1,31 @@
+"""
+Build ordering of registered components. Needs maya.cmds to import, but never touches the scene.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('maya.cmds')
+
+from riggler.core import scheduler
+
+
+def _components(*pairs) -> list:
+    return [SimpleNamespace(name=name, parent=parent) for name, parent in pairs]
+
+
+def test_parents_come_before_their_children():
+    components = _components(('hand', 'arm'), ('arm', 'spine'), ('leg', 'hips'), ('spine', 'hips'), ('hips', None))
+    ordered = [component.name for component in scheduler.sort_components(components)]
+    assert ordered == ['hips', 'spine', 'arm', 'hand', 'leg']
+
+
+def test_given_order_is_kept_otherwise():
+    # world isn't registered, it's expected to be built already
+    components = _components(('tail', 'world'), ('head', 'world'), ('jaw', 'head'))
+    assert [component.name for component in scheduler.sort_components(components)] == ['tail', 'head', 'jaw']
+
+
+def test_parent_cycles_raise():
+    with pytest.raises(RuntimeError, match='its own ancestor'):
+        scheduler.sort_components(_components(('a', 'c'), ('b', 'a'), ('c', 'b')))